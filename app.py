@@ -2,15 +2,37 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import json
+import os
+import time
+
+import requests
 import streamlit as st
-from backend.indexer import index_site
-from backend.retriever import HybridRetriever
-from backend.embedder import embed_texts, get_openai_client
-from backend.rag import build_prompt, generate_answer_with_openai
+
+# the UI is a thin client; run the API with `uvicorn backend.service:app`
+API_URL = os.getenv("RAG_API_URL", "http://127.0.0.1:8000").rstrip("/")
+
+
+def api(method: str, path: str, **kwargs):
+    resp = requests.request(method, API_URL + path, timeout=kwargs.pop("timeout", 60), **kwargs)
+    if resp.status_code >= 400:
+        try:
+            detail = resp.json().get("detail", resp.text)
+        except ValueError:
+            detail = resp.text
+        raise RuntimeError(f"{resp.status_code}: {detail}")
+    return resp
+
 
 st.set_page_config(layout="wide")
 st.title("Chat with Any Website — RAG Pipeline")
 
+try:
+    server = api("GET", "/sites", timeout=5).json()
+except Exception as e:
+    st.error(f"❌ API not reachable at {API_URL}: {e}")
+    st.stop()
+
 ############################################
 # Sidebar — Settings & Crawler
 ############################################
@@ -19,28 +41,72 @@ with st.sidebar:
 
     url = st.text_input("Site URL", "")
     max_pages = st.number_input("Max Pages", min_value=1, max_value=500, value=20)
+    render = st.checkbox("Render JavaScript pages (requires Chrome)", value=False)
 
     use_llm = st.checkbox("Use OpenAI LLM for answers (requires OPENAI_API_KEY)", value=False)
+    rerank = st.checkbox("Rerank results with a cross-encoder", value=False)
 
     if st.button("Crawl & Build Index"):
         if not url.strip():
             st.error("Please enter a valid website URL.")
         else:
             with st.spinner("Crawling website and building index..."):
+                status = st.empty()
                 try:
-                    store, bm25_texts, metas = index_site(url, max_pages=max_pages)
+                    job = api("POST", "/index", json={"url": url.strip(), "max_pages": int(max_pages), "render": render}).json()
+                    while job["status"] in ("queued", "running"):
+                        p = job["progress"]
+                        if p:
+                            status.caption(
+                                f"Pages fetched: {p['pages']} · Chunks: {p['chunks']} · "
+                                f"Embedded: {p['embedded']} · {p['vectors_per_sec']:.1f} vectors/sec · "
+                                f"Duplicates: {p['duplicate_pages']} pages, "
+                                f"{p['embeddings_saved']} embeddings saved"
+                            )
+                        time.sleep(0.5)
+                        job = api("GET", f"/index/{job['id']}").json()
                 except Exception as e:
                     st.error(f"❌ Error indexing site: {e}")
                     st.stop()
 
-                st.session_state["store"] = store
-                st.session_state["bm25"] = bm25_texts
-                st.session_state["metas"] = metas
-
-            if not bm25_texts:
-                st.warning("⚠ No readable content found. Try another site.")
+            if job["status"] == "failed":
+                st.error(f"❌ Error indexing site: {job['error']}")
             else:
-                st.success("✅ Index created successfully!")
+                st.session_state["site"] = job["url"]
+                server = api("GET", "/sites").json()
+                indexed = next((s for s in server["sites"] if s["root_url"] == job["url"]), None)
+                if not indexed or not indexed["chunks"]:
+                    st.warning("⚠ No readable content found. Try another site.")
+                else:
+                    st.success("✅ Index created successfully!")
+                    for name, c in server["embed_cache"].items():
+                        st.caption(
+                            f"Embedding cache ({name}): {c['hits']} hits / {c['misses']} misses "
+                            f"({c['hit_rate']:.0%}), {c['entries']} entries"
+                        )
+
+    if server["sites"]:
+        st.header("Indexed Sites")
+        chunks = {s["root_url"]: s["chunks"] for s in server["sites"]}
+        choice = st.selectbox(
+            "Query a site indexed earlier (no re-crawl)",
+            list(chunks),
+            format_func=lambda u: f"{u} ({chunks[u]} chunks)",
+        )
+        if st.button("Use this site"):
+            st.session_state["site"] = choice
+        if "site" in st.session_state:
+            st.caption(f"Querying: {st.session_state['site']}")
+        mem = server["memory"]
+        st.caption(
+            f"Loaded indexes: {mem['loaded']} · {mem['used_mb']:.0f} / {mem['budget_mb']:.0f} MB · "
+            f"{mem['evictions']} evicted"
+        )
+        ac = server["answer_cache"]
+        st.caption(
+            f"Answer cache: {ac['exact_hits']} exact / {ac['semantic_hits']} similar hits, "
+            f"{ac['misses']} misses ({ac['hit_rate']:.0%}), {ac['entries']} entries"
+        )
 
 
 ############################################
@@ -49,59 +115,59 @@ with st.sidebar:
 query = st.text_input("Ask a question about the site:")
 
 if st.button("Ask"):
-    if "store" not in st.session_state:
+    if "site" not in st.session_state:
         st.error("Please crawl a website first.")
         st.stop()
 
-    store = st.session_state["store"]
-    texts = st.session_state["bm25"]
-    metas = st.session_state["metas"]
-
-    if not texts or not metas:
-        st.error("⚠ Index is empty; no text to search.")
-        st.stop()
+    if use_llm and not server["llm_available"]:
+        st.warning("OPENAI_API_KEY not set. Showing retrieved context only.")
 
-    # Embed query (local)
-    qvec = embed_texts([query], provider="local")[0:1]
+    # Conversation history
+    history = st.session_state.get("history", [])
 
-    retriever = HybridRetriever(store, texts, metas)
+    st.subheader("💬 Answer")
+    box = st.empty()
+    answer = ""
     try:
-        retrieved = retriever.retrieve(query, qvec, top_k=5)
+        resp = api(
+            "POST", "/answer", stream=True, timeout=300,
+            json={"site": st.session_state["site"], "query": query, "top_k": 5,
+                  "history": history, "use_llm": use_llm, "rerank": rerank},
+        )
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "sources":
+                st.session_state["last_retrieved"] = event["results"]
+                timings = event["timings"]
+                st.caption("Latency: " + " · ".join(
+                    f"{k[:-3]} {v:.1f} ms" for k, v in timings.items() if k.endswith("_ms")
+                ))
+            elif event["type"] == "token":
+                answer = event["text"] if event.get("replace") else answer + event["text"]
+                box.markdown(answer)
+            elif event["type"] == "done":
+                info = f"Time to first token {event['ttft_ms']:.0f} ms · total {event['total_ms']:.0f} ms"
+                if "prompt_tokens" in event:
+                    info += (
+                        f" · prompt {event['prompt_tokens']} tokens ({event['chunks']} chunks, "
+                        f"{event['dropped']} dropped, {event['trimmed']} trimmed)"
+                    )
+                if event.get("cache"):
+                    info += f" · cached answer ({event['cache']} match, similarity {event['similarity']:.2f})"
+                st.caption(info)
+            elif event["type"] == "error":
+                st.error(f"❌ LLM error: {event['message']}. Showing retrieved excerpts instead.")
     except Exception as e:
         st.error(f"❌ Retrieval failed: {e}")
         st.stop()
 
-    st.session_state["last_retrieved"] = retrieved
-
-    # Conversation history
-    history = st.session_state.get("history", [])
-
-    # Build prompt for LLM
-    prompt = build_prompt(query, retrieved, conversation_history=history)
-
-    answer = None
-    if use_llm:
-        client = get_openai_client()
-        if client is None:
-            st.warning("OPENAI_API_KEY not set. Showing retrieved context only.")
-        else:
-            try:
-                answer = generate_answer_with_openai(prompt)
-            except Exception as e:
-                st.error(f"❌ LLM error: {e}")
-
-    # If no LLM answer (or LLM disabled), just show concatenated excerpt
-    if answer is None:
-        joined = "\n\n".join(item["meta"]["text"][:400] for item in retrieved)
-        answer = "Here are the most relevant excerpts from the site:\n\n" + joined
-
-    st.subheader("💬 Answer")
-    st.write(answer)
-
-    # Save conversation
-    history.append({"role": "user", "text": query})
-    history.append({"role": "assistant", "text": answer})
-    st.session_state["history"] = history
+    # Save conversation (an answer that never arrived is not a turn)
+    if answer:
+        history.append({"role": "user", "text": query})
+        history.append({"role": "assistant", "text": answer})
+        st.session_state["history"] = history
 
 ############################################
 # Right column — Sources
@@ -123,5 +189,8 @@ else:
         st.markdown(f"**[{i}] {title}**  \nScore: `{score:.4f}`")
         if url:
             st.markdown(f"[Open source page]({url})")
+        others = [u for u in meta.get("sources", []) if u != url]
+        if others:
+            st.caption("Also on: " + ", ".join(others))
         st.write(text_preview + ("..." if len(meta.get("text", "")) > 600 else ""))
         st.markdown("---")
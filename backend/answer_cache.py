@@ -0,0 +1,157 @@
+# backend/answer_cache.py
+
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))  # seconds
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, punctuation dropped, whitespace collapsed."""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+class AnswerCache:
+    """
+    Two-level cache of generated answers.
+
+    Entries live in a namespace: a tuple starting with (site, index
+    version) followed by whatever else changes the answer (top_k, LLM on
+    or off, ...). Level 1 is an exact match on the normalised query,
+    level 2 a FAISS inner-product search over the namespace's past query
+    vectors, accepted at cosine >= threshold.
+
+    Seeing a new version of a site drops every entry of its old versions.
+    Entries expire after ttl seconds and the least recently used go
+    beyond max_entries.
+    """
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()  # id -> {"ns", "key", "value", "created"}
+        self._exact = {}  # (ns, normalised query) -> id
+        self._vectors = {}  # ns -> IndexIDMap2 over unit query vectors
+        self._versions = {}  # site -> current version
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    # ---------- bookkeeping ----------
+    def _check_version(self, ns):
+        site, version = ns[0], ns[1]
+        if self._versions.get(site) == version:
+            return
+        self._versions[site] = version
+        for i in [i for i, e in self._entries.items() if e["ns"][0] == site and e["ns"][1] != version]:
+            self._drop(i)
+        for old in [n for n in self._vectors if n[0] == site and n[1] != version]:
+            del self._vectors[old]
+
+    def _drop(self, i):
+        entry = self._entries.pop(i)
+        self._exact.pop((entry["ns"], entry["key"]), None)
+        index = self._vectors.get(entry["ns"])
+        if index is not None:
+            index.remove_ids(np.array([i], dtype="int64"))
+
+    def _fresh(self, i) -> bool:
+        if time.time() - self._entries[i]["created"] > self.ttl:
+            self._drop(i)
+            return False
+        self._entries.move_to_end(i)
+        return True
+
+    @staticmethod
+    def _unit(qvec) -> np.ndarray:
+        v = np.array(np.atleast_2d(qvec)[:1], dtype="float32", order="C")
+        faiss.normalize_L2(v)
+        return v
+
+    # ---------- lookups ----------
+    def exact(self, ns, query: str):
+        """Cached value for this exact (normalised) query, or None. Counts no miss."""
+        with self._lock:
+            self._check_version(ns)
+            i = self._exact.get((ns, normalize_query(query)))
+            if i is not None and self._fresh(i):
+                self.counters["exact_hits"] += 1
+                return self._entries[i]["value"]
+        return None
+
+    def similar(self, ns, qvec):
+        """(value, similarity) of the nearest past query above threshold, or (None, best)."""
+        with self._lock:
+            self._check_version(ns)
+            index = self._vectors.get(ns)
+            if index is not None and index.ntotal:
+                D, I = index.search(self._unit(qvec), 1)
+                sim, i = float(D[0, 0]), int(I[0, 0])
+                if i in self._entries and sim >= self.threshold and self._fresh(i):
+                    self.counters["semantic_hits"] += 1
+                    return self._entries[i]["value"], sim
+            else:
+                sim = 0.0
+            self.counters["misses"] += 1
+            return None, sim
+
+    def put(self, ns, query: str, qvec, value):
+        with self._lock:
+            self._check_version(ns)
+            key = normalize_query(query)
+            old = self._exact.get((ns, key))
+            if old is not None:
+                self._drop(old)
+            i = next(self._ids)
+            self._entries[i] = {"ns": ns, "key": key, "value": value, "created": time.time()}
+            self._exact[(ns, key)] = i
+            if qvec is not None:
+                v = self._unit(qvec)
+                index = self._vectors.get(ns)
+                if index is None:
+                    index = self._vectors[ns] = faiss.IndexIDMap2(faiss.IndexFlatIP(v.shape[1]))
+                index.add_with_ids(v, np.array([i], dtype="int64"))
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._exact.clear()
+            self._vectors.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            hits = c["exact_hits"] + c["semantic_hits"]
+            total = hits + c["misses"]
+            c["hit_rate"] = hits / total if total else 0.0
+            c["entries"] = len(self._entries)
+            return c
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Process-wide answer cache shared by all sessions."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = AnswerCache()
+        return _CACHE
@@ -0,0 +1,217 @@
+# backend/bm25.py
+import json
+import os
+import re
+import shutil
+from collections import Counter
+
+import numpy as np
+
+from backend.metastore import StringColumn
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens; used for both documents and queries."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a term-major CSR matrix (one postings list per term).
+
+    Each posting stores the doc id and its precomputed BM25 weight
+    idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)), so scoring
+    a query is a bincount over the postings of its terms, and top-k is an
+    argpartition. Same formula and IDF floor as rank_bm25.BM25Okapi.
+    """
+    def __init__(self, vocab, indptr, docs, weights, n_docs, k1=1.5, b=0.75, epsilon=0.25):
+        self.vocab = vocab  # StringColumn or list of terms, term id -> term
+        self.indptr = indptr
+        self.docs = docs
+        self.weights = weights
+        self.n_docs = n_docs
+        self.k1, self.b, self.epsilon = k1, b, epsilon
+        self._term_ids = None
+
+    def __len__(self):
+        return self.n_docs
+
+    @classmethod
+    def build(cls, texts=None, tokenized=None, k1=1.5, b=0.75, epsilon=0.25):
+        """Build from raw texts (tokenized with `tokenize`) or pre-tokenized docs."""
+        if tokenized is None:
+            tokenized = (tokenize(t) for t in texts)
+
+        term_ids = {}
+        doc_col, term_col, tf_col, doc_len = [], [], [], []
+        for d, tokens in enumerate(tokenized):
+            doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                tid = term_ids.setdefault(term, len(term_ids))
+                doc_col.append(d)
+                term_col.append(tid)
+                tf_col.append(tf)
+
+        n_docs = len(doc_len)
+        n_terms = len(term_ids)
+        doc_col = np.asarray(doc_col, dtype=np.int32)
+        term_col = np.asarray(term_col, dtype=np.int32)
+        tf = np.asarray(tf_col, dtype=np.float32)
+        doc_len = np.asarray(doc_len, dtype=np.float32)
+
+        # idf, with negative values floored like rank_bm25
+        df = np.bincount(term_col, minlength=n_terms).astype(np.float64)
+        idf = np.log(n_docs - df + 0.5) - np.log(df + 0.5)
+        if n_terms:
+            avg_idf = idf.sum() / n_terms
+            idf[idf < 0] = epsilon * avg_idf
+
+        avgdl = doc_len.sum() / n_docs if n_docs else 0.0
+        norm = k1 * (1 - b + b * doc_len[doc_col] / avgdl) if avgdl else k1
+        weights = (idf[term_col] * (tf * (k1 + 1) / (tf + norm))).astype(np.float32)
+
+        # term-major ordering -> CSR
+        order = np.argsort(term_col, kind="stable")
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df.astype(np.int64), out=indptr[1:])
+
+        vocab = [None] * n_terms
+        for term, tid in term_ids.items():
+            vocab[tid] = term
+        index = cls(vocab, indptr, doc_col[order], weights[order], n_docs, k1, b, epsilon)
+        index._term_ids = term_ids
+        return index
+
+    # ---------- scoring ----------
+    def term_ids(self) -> dict:
+        if self._term_ids is None:
+            self._term_ids = {self.vocab[i]: i for i in range(len(self.indptr) - 1)}
+        return self._term_ids
+
+    def _query_terms(self, tokens):
+        ids = self.term_ids()
+        counts = Counter(ids[t] for t in tokens if t in ids)
+        return list(counts.items())
+
+    def get_scores(self, tokens) -> np.ndarray:
+        """Dense score array over all docs (rank_bm25-compatible)."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for tid, qf in self._query_terms(tokens):
+            lo, hi = self.indptr[tid], self.indptr[tid + 1]
+            scores += qf * np.bincount(self.docs[lo:hi], self.weights[lo:hi], minlength=self.n_docs).astype(np.float32)
+        return scores
+
+    def top_k(self, query: str, k: int):
+        """
+        (doc_ids, scores) of the k best docs with a non-zero score,
+        highest first. Only postings of the query terms are read.
+        """
+        terms = self._query_terms(tokenize(query))
+        if not terms or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        docs = np.concatenate([self.docs[self.indptr[t]:self.indptr[t + 1]] for t, _ in terms])
+        weights = np.concatenate(
+            [qf * self.weights[self.indptr[t]:self.indptr[t + 1]] for t, qf in terms]
+        )
+        if len(docs) * 16 < self.n_docs:
+            # few postings: accumulate only over the touched docs
+            touched, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights, minlength=len(touched))
+        else:
+            # dense accumulation is cheaper than sorting many postings
+            scores = np.bincount(docs, weights, minlength=self.n_docs)
+            touched = np.flatnonzero(scores)
+            scores = scores[touched]
+        keep = scores > 0
+        touched, scores = touched[keep], scores[keep]
+
+        if len(touched) > k:
+            part = np.argpartition(-scores, k - 1)[:k]
+        else:
+            part = np.arange(len(touched))
+        part = part[np.argsort(-scores[part], kind="stable")]
+        return touched[part].astype(np.int64), scores[part].astype(np.float32)
+
+    def top_k_batch(self, queries: list[str], k: int):
+        """
+        top_k for many queries at once: postings of all queries are
+        gathered into one (query, doc, weight) triple list, summed with a
+        single unique + bincount, and ranked per query with one lexsort.
+        Returns a list of (doc_ids, scores), one per query.
+        """
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        q_col, d_col, w_col = [], [], []
+        for qi, query in enumerate(queries):
+            for t, qf in self._query_terms(tokenize(query)):
+                lo, hi = self.indptr[t], self.indptr[t + 1]
+                q_col.append(np.full(hi - lo, qi, dtype=np.int64))
+                d_col.append(self.docs[lo:hi])
+                w_col.append(qf * self.weights[lo:hi])
+        if not q_col or k <= 0:
+            return [empty for _ in queries]
+
+        keys = np.concatenate(q_col) * self.n_docs + np.concatenate(d_col)
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse, np.concatenate(w_col), minlength=len(uniq))
+        keep = sums > 0
+        uniq, sums = uniq[keep], sums[keep]
+        q_of, d_of = uniq // self.n_docs, uniq % self.n_docs
+
+        # order by query, then score descending; keep the first k per query
+        order = np.lexsort((-sums, q_of))
+        q_sorted = q_of[order]
+        starts = np.searchsorted(q_sorted, np.arange(len(queries) + 1))
+        out = []
+        for qi in range(len(queries)):
+            sel = order[starts[qi]:min(starts[qi] + k, starts[qi + 1])]
+            out.append((d_of[sel].astype(np.int64), sums[sel].astype(np.float32)))
+        return out
+
+    # ---------- persistence ----------
+    def save(self, path: str, extra: dict | None = None, arrays: dict | None = None):
+        """
+        Write the index as a directory. `extra` goes into info.json and
+        `arrays` (name -> ndarray) are saved next to the postings.
+        """
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        vocab = StringColumn()
+        for i in range(len(self.indptr) - 1):
+            vocab.append(self.vocab[i])
+        vocab.save(os.path.join(tmp, "vocab"))
+        np.save(os.path.join(tmp, "indptr.npy"), self.indptr)
+        np.save(os.path.join(tmp, "docs.npy"), self.docs)
+        np.save(os.path.join(tmp, "weights.npy"), self.weights)
+        for name, arr in (arrays or {}).items():
+            np.save(os.path.join(tmp, name + ".npy"), arr)
+        info = {"n_docs": self.n_docs, "k1": self.k1, "b": self.b, "epsilon": self.epsilon}
+        info.update(extra or {})
+        with open(os.path.join(tmp, "info.json"), "w") as f:
+            json.dump(info, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Memory-maps the postings; returns (index, info dict). Extra arrays
+        can be read with load_array(path, name).
+        """
+        with open(os.path.join(path, "info.json")) as f:
+            info = json.load(f)
+        index = cls(
+            StringColumn.load(os.path.join(path, "vocab")),
+            np.load(os.path.join(path, "indptr.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "docs.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "weights.npy"), mmap_mode="r"),
+            info["n_docs"], info["k1"], info["b"], info["epsilon"],
+        )
+        return index, info
+
+    @staticmethod
+    def load_array(path: str, name: str):
+        return np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
@@ -0,0 +1,189 @@
+# backend/catalog.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urldefrag, urlsplit
+
+from backend.retriever import drop_retriever
+from backend.vectordb import FaissStore
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = os.getenv("INDEX_DIR", "data/index")
+CATALOG_RAM_MB = int(os.getenv("CATALOG_RAM_MB", "2048"))
+
+_SIDECARS = (".index", ".meta", ".bm25")
+
+
+def normalize_root(root_url: str) -> str:
+    url, _ = urldefrag(root_url.strip())
+    parts = urlsplit(url)
+    return parts._replace(scheme=parts.scheme.lower(), netloc=parts.netloc.lower()).geturl()
+
+
+def site_key(root_url: str) -> str:
+    """Directory name for a root URL: host + short hash of the full URL."""
+    root = normalize_root(root_url)
+    host = urlsplit(root).netloc.replace(":", "_") or "site"
+    return f"{host}-{hashlib.sha1(root.encode('utf-8')).hexdigest()[:10]}"
+
+
+def index_path_for(root_url: str, base_dir: str = INDEX_DIR) -> str:
+    return os.path.join(base_dir, site_key(root_url), "site")
+
+
+def _disk_bytes(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(dirpath, f)) for f in files)
+    return total
+
+
+def store_bytes(store) -> int:
+    """
+    Footprint charged against the RAM budget: the index, metadata and BM25
+    files on disk. Memory-mapped parts are counted too, as an upper bound
+    on what the OS keeps resident once they are hot.
+    """
+    if not store.index_path:
+        return 0
+    return sum(
+        _disk_bytes(store.index_path + s) for s in _SIDECARS if os.path.exists(store.index_path + s)
+    )
+
+
+class IndexCatalog:
+    """
+    One FaissStore per root URL under base_dir, shared by every caller in
+    the process.
+
+    catalog.json records which sites have been indexed; get() loads an
+    index on first use (memory-mapped) and keeps it while it is among the
+    most recently used ones that fit in ram_mb. Older ones are unloaded,
+    and reloaded from disk the next time they are asked for.
+    """
+    def __init__(self, base_dir: str = INDEX_DIR, ram_mb: int = CATALOG_RAM_MB):
+        self.base_dir = base_dir
+        self.budget = ram_mb * 2**20
+        self.path = os.path.join(base_dir, "catalog.json")
+        self.sites = {}  # key -> {"root_url", "index_path", "chunks", "updated"}
+        self._loaded = OrderedDict()  # key -> (store, bytes), least recently used first
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.stats = {"hits": 0, "loads": 0, "evictions": 0}
+        self.load()
+
+    # ---------- catalog file ----------
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.sites = json.load(f)
+
+    def save(self):
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.sites, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def index_path(self, root_url: str) -> str:
+        return index_path_for(root_url, self.base_dir)
+
+    def list_sites(self) -> list[dict]:
+        """Indexed sites, most recently updated first."""
+        with self._lock:
+            return sorted(self.sites.values(), key=lambda s: s["updated"], reverse=True)
+
+    # ---------- stores ----------
+    def get(self, root_url: str):
+        """The site's store (loaded if needed), or None if it was never indexed."""
+        key = site_key(root_url)
+        with self._lock:
+            hit = self._loaded.get(key)
+            if hit is not None:
+                self._loaded.move_to_end(key)
+                self.stats["hits"] += 1
+                return hit[0]
+            if key not in self.sites:
+                return None
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:  # one load per site even if many sessions ask at once
+            with self._lock:
+                hit = self._loaded.get(key)
+                if hit is not None:
+                    self._loaded.move_to_end(key)
+                    return hit[0]
+            store = FaissStore(dim=384, index_path=self.sites[key]["index_path"])
+            if not store.load(mmap=True):
+                logger.warning("Index for %s is missing on disk", root_url)
+                return None
+            with self._lock:
+                self.stats["loads"] += 1
+                self._insert(key, store)
+        return store
+
+    def put(self, root_url: str, store):
+        """Register a freshly (re)built store for root_url and keep it loaded."""
+        key = site_key(root_url)
+        with self._lock:
+            self.sites[key] = {
+                "root_url": normalize_root(root_url),
+                "index_path": store.index_path,
+                "chunks": len(store.metadata),
+                "updated": time.time(),
+            }
+            self.save()
+            old = self._loaded.pop(key, None)
+            if old is not None and old[0] is not store:
+                drop_retriever(old[0])
+            self._insert(key, store)
+
+    def evict(self, root_url: str):
+        with self._lock:
+            self._drop(site_key(root_url))
+
+    def _insert(self, key, store):
+        self._loaded[key] = (store, store_bytes(store))
+        used = sum(b for _, b in self._loaded.values())
+        # evict least recently used first; never the store just inserted
+        while used > self.budget and len(self._loaded) > 1:
+            oldest = next(iter(self._loaded))
+            used -= self._loaded[oldest][1]
+            self._drop(oldest)
+            self.stats["evictions"] += 1
+
+    def _drop(self, key):
+        entry = self._loaded.pop(key, None)
+        if entry is not None:
+            drop_retriever(entry[0])
+            logger.info("Unloaded index %s", key)
+
+    def memory(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": len(self._loaded),
+                "used_mb": sum(b for _, b in self._loaded.values()) / 2**20,
+                "budget_mb": self.budget / 2**20,
+                **self.stats,
+            }
+
+
+_CATALOG = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_catalog() -> IndexCatalog:
+    """Process-wide catalog shared by all sessions."""
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            _CATALOG = IndexCatalog()
+        return _CATALOG
@@ -1,18 +1,120 @@
-import math
-
-def chunk_text(text, chunk_size=500, overlap=100):
-    words = text.split()
-    chunks = []
-    if not words:
-        return []
-    start = 0
-    n = len(words)
-    while start < n:
-        end = min(start + chunk_size, n)
-        chunk_words = words[start:end]
-        chunk_text = " ".join(chunk_words)
-        chunks.append(chunk_text)
-        if end == n:
-            break
-        start = end - overlap
-    return chunks
+import re
+
+import numpy as np
+
+from backend.embedder import LOCAL_MODEL, get_local_model
+from backend.metrics import count, timed
+
+HEADING_MAX_TOKENS = 16  # a short block without closing punctuation is treated as a heading
+
+_BLOCK_SEP_RE = re.compile(r"\n\s*\n")
+_WORD_RE = re.compile(r"\S+")
+
+
+def get_tokenizer(model: str = LOCAL_MODEL):
+    """
+    (tokenizer, max_tokens) of a local embedding model. max_tokens is the
+    model's max_seq_length minus the [CLS]/[SEP] it adds, i.e. the longest
+    chunk it embeds without truncation.
+    """
+    st = get_local_model(model)
+    return st.tokenizer, st.max_seq_length - 2
+
+
+def token_offsets(text: str, tokenizer) -> np.ndarray:
+    """
+    (n_tokens, 2) char [start, end) of every token in `text`, from one
+    call to a fast (Rust) tokenizer. tokenizer="words" counts whitespace
+    words instead.
+    """
+    if tokenizer == "words":
+        spans = [m.span() for m in _WORD_RE.finditer(text)]
+    else:
+        spans = tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )["offset_mapping"]
+    return np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+
+
+def _blocks(text: str) -> np.ndarray:
+    """(n_blocks, 2) char spans of the \\n\\n-separated blocks the cleaner emits."""
+    bounds = [0]
+    for m in _BLOCK_SEP_RE.finditer(text):
+        bounds += [m.start(), m.end()]
+    bounds.append(len(text))
+    return np.asarray(bounds, dtype=np.int64).reshape(-1, 2)
+
+
+@timed("chunk")
+def chunk_spans(
+    text: str,
+    max_tokens: int | None = None,
+    overlap: int = 32,
+    tokenizer=None,
+    offsets: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Token-bounded, structure-preserving chunking. Returns (n_chunks, 2)
+    char [start, end) offsets into `text`; no strings are copied.
+
+    Whole blocks (paragraphs / headings / list items) are packed greedily
+    up to max_tokens tokens; a chunk never ends on a heading, which moves
+    to the next chunk instead. A single block longer than max_tokens is
+    cut into token windows overlapping by `overlap` tokens.
+
+    tokenizer / max_tokens default to the local embedding model's, so no
+    chunk is truncated at embedding time; tokenizer="words" counts
+    whitespace words. Pass precomputed token `offsets` to skip
+    tokenization.
+    """
+    if tokenizer is None:
+        tokenizer, model_max = get_tokenizer()
+        max_tokens = max_tokens or model_max
+    if max_tokens is None:
+        raise ValueError("max_tokens is required with a custom tokenizer")
+    if offsets is None:
+        offsets = token_offsets(text, tokenizer)
+    count("tokens", len(offsets))
+    if len(offsets) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    max_tokens = max(int(max_tokens), 1)
+    overlap = min(max(overlap, 0), max_tokens - 1)
+
+    # token range of each block; drop blocks without tokens
+    blocks = _blocks(text)
+    tok_lo = np.searchsorted(offsets[:, 0], blocks[:, 0], side="left")
+    tok_hi = np.searchsorted(offsets[:, 0], blocks[:, 1], side="left")
+    keep = tok_hi > tok_lo
+    blocks, tok_lo, tok_hi = blocks[keep], tok_lo[keep], tok_hi[keep]
+    n_tok = tok_hi - tok_lo
+    # trim block spans to their first / last token
+    starts, ends = offsets[tok_lo, 0], offsets[tok_hi - 1, 1]
+
+    last_chars = np.fromiter((text[e - 1] for e in ends), dtype="<U1", count=len(ends))
+    heading = (n_tok <= HEADING_MAX_TOKENS) & ~np.isin(last_chars, list(".!?:;,"))
+    cum = np.concatenate([[0], np.cumsum(n_tok)])
+
+    spans = []
+    b, n_blocks = 0, len(n_tok)
+    while b < n_blocks:
+        if n_tok[b] > max_tokens:
+            # oversized block: overlapping token windows
+            lo, hi = tok_lo[b], tok_hi[b]
+            win = np.arange(lo, hi - overlap, max_tokens - overlap)
+            win_end = np.minimum(win + max_tokens, hi)
+            spans.append(np.stack([offsets[win, 0], offsets[win_end - 1, 1]], axis=1))
+            b += 1
+            continue
+        # furthest block e such that blocks b..e-1 fit
+        e = int(np.searchsorted(cum, cum[b] + max_tokens, side="right")) - 1
+        e = max(min(e, n_blocks), b + 1)
+        while e - 1 > b and heading[e - 1] and e < n_blocks:
+            e -= 1
+        spans.append([[starts[b], ends[e - 1]]])
+        b = e
+    return np.concatenate([np.asarray(s, dtype=np.int64).reshape(-1, 2) for s in spans])
+
+
+def chunk_text(text, max_tokens=None, overlap=32, tokenizer=None):
+    """Chunk strings for `text` (see chunk_spans)."""
+    return [text[s:e] for s, e in chunk_spans(text, max_tokens, overlap, tokenizer)]
@@ -1,86 +1,404 @@
 # backend/crawler.py
 
-import requests
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue as queue_mod
+import threading
 import time
 from collections import deque
-import logging
-from backend.utils import obey_robots, normalize_url
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.extractor import extract_page
+from backend.metrics import timed
+from backend.renderer import MIN_TEXT_LEN, get_render_pool
+from backend.utils import fetch_robots, is_allowed, normalize_url
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = "ChatWithSiteBot/1.0"
+
+# crawls at least this big parse pages in a process pool by default
+PROCESS_PARSE_MIN_PAGES = 200
+
 
 def extract_links(html, base_url):
-    soup = BeautifulSoup(html, "html.parser")
-    out = set()
-    for a in soup.find_all("a", href=True):
-        href = a["href"].strip()
-        if href.startswith("mailto:") or href.startswith("tel:"):
-            continue
-        full = urljoin(base_url, href)
-        full = normalize_url(full)
-        out.add(full)
-    return out
+    return extract_page(html, base_url)["links"]
 
 
-def crawl(
+def make_session(pool_size: int = 8) -> requests.Session:
+    """
+    Pooled keep-alive session shared by all crawl workers.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class HostRateLimiter:
+    """
+    Per-host token bucket.
+
+    Each host refills at 1 / delay tokens per second up to `burst` tokens,
+    so different hosts never wait on each other and a single host is never
+    hit faster than its delay (or its robots.txt Crawl-delay, if larger).
+    """
+    def __init__(self, delay: float = 1.0, burst: int = 1):
+        self.delay = max(delay, 0.0)
+        self.burst = max(burst, 1)
+        self._delays = {}
+        self._buckets = {}
+        self._locks = {}
+
+    def set_delay(self, host: str, delay: float):
+        self._delays[host] = max(self.delay, delay)
+
+    async def acquire(self, host: str):
+        delay = self._delays.get(host, self.delay)
+        if delay <= 0:
+            return
+
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            tokens, last = self._buckets.get(host, (float(self.burst), time.monotonic()))
+            while True:
+                now = time.monotonic()
+                tokens = min(self.burst, tokens + (now - last) / delay)
+                last = now
+                if tokens >= 1.0:
+                    self._buckets[host] = (tokens - 1.0, last)
+                    return
+                await asyncio.sleep((1.0 - tokens) * delay)
+
+
+@timed("fetch")
+def _fetch(session, url, known=None):
+    """
+    GET a page, conditionally if we have validators from a previous crawl.
+    Returns a page dict, or None for errors / non-200 responses.
+
+    For a previously known URL, 404/410 is reported as gone=True and any
+    other failure (5xx, timeout, connection error) as error=True: the
+    page is kept as it was, not removed.
+    """
+    headers = {}
+    if known:
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+    page = {
+        "url": url,
+        "html": None,
+        "etag": None,
+        "last_modified": None,
+        "not_modified": False,
+        "gone": False,
+        "error": False,
+    }
+    try:
+        resp = session.get(url, timeout=10, headers=headers)
+    except requests.RequestException as e:
+        if known is None:
+            raise
+        logger.warning("Fetching %s failed, keeping the indexed copy: %s", url, e)
+        page["error"] = True
+        return page
+    page["etag"] = resp.headers.get("ETag")
+    page["last_modified"] = resp.headers.get("Last-Modified")
+    if resp.status_code == 304 and known is not None:
+        page["not_modified"] = True
+        page["etag"] = page["etag"] or known.get("etag")
+        page["last_modified"] = page["last_modified"] or known.get("last_modified")
+        return page
+    if resp.status_code in (404, 410) and known is not None:
+        page["gone"] = True
+        return page
+    if resp.status_code != 200:
+        if known is None:
+            return None
+        logger.warning("Fetching %s returned %s, keeping the indexed copy", url, resp.status_code)
+        page["error"] = True
+        return page
+    page["html"] = resp.text
+    return page
+
+
+async def crawl_async(
     start_url,
     max_pages=50,
     allowed_domains=None,
     delay=1.0,
     url_prefix=None,
+    concurrency=8,
+    session=None,
+    on_page=None,
+    stop=None,
+    known=None,
+    parse_workers=None,
+    render=False,
 ):
     """
-    BFS crawl, but **restricted** to URLs that start with `url_prefix`
-    (or, if not provided, restricted to same domain).
+    Concurrent BFS crawl with a bounded worker pool.
 
-    This prevents wandering off into portals/categories/etc.
+    Fetches run on a thread pool over one pooled `requests.Session`;
+    politeness is enforced per host by `HostRateLimiter` instead of a
+    global sleep after every page. Same restrictions and return value
+    as `crawl()`.
+
+    If `on_page` (async callable taking a page dict) is given, each page
+    is handed to it as soon as it arrives and is NOT kept in the returned
+    dict. Setting the `stop` threading.Event ends the crawl early.
+
+    known: optional {url: {"etag", "last_modified", "links"}} from a
+    previous crawl. Those URLs are fetched with conditional GETs; a 304
+    yields a page with html=None / not_modified=True and the crawl
+    follows the stored links instead; a 404/410 yields gone=True. Any
+    other failure on a known URL yields error=True (not counted against
+    max_pages) and the stored links are still followed, so one failing
+    page does not cut the pages behind it off the crawl.
+
+    Each fetched page is parsed once by `extract_page`; its links drive the
+    crawl and page["content"] carries the extracted title / description /
+    text. parse_workers > 0 parses in that many processes (off the GIL),
+    0 parses on the fetch threads; None picks os.cpu_count() processes for
+    crawls of PROCESS_PARSE_MIN_PAGES pages or more.
+
+    render: pages whose extracted text is shorter than MIN_TEXT_LEN
+    (client-side rendered) are re-fetched through the shared headless
+    browser pool (backend.renderer) and parsed again. Pass a RenderPool
+    to use a specific pool; True uses get_render_pool().
     """
+    known = known or {}
     start_url = normalize_url(start_url)
     url_prefix = url_prefix or start_url
 
     if allowed_domains is None:
         allowed_domains = {urlparse(start_url).netloc}
 
-    if not obey_robots(start_url):
+    robots = fetch_robots(start_url)
+    if not is_allowed(start_url, robots):
         logger.warning("Crawling disallowed by robots.txt for %s", start_url)
         return {}
 
-    queue = deque([start_url])
-    seen = set()
-    pages = {}
+    limiter = HostRateLimiter(delay=delay)
+    if robots["crawl_delay"]:
+        limiter.set_delay(urlparse(start_url).netloc, robots["crawl_delay"])
 
-    while queue and len(pages) < max_pages:
-        url = queue.popleft()
-        if url in seen:
-            continue
-        seen.add(url)
+    concurrency = max(int(concurrency), 1)
+    own_session = session is None
+    session = session or make_session(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    if parse_workers is None:
+        parse_workers = (os.cpu_count() or 1) if max_pages >= PROCESS_PARSE_MIN_PAGES else 0
+    if parse_workers > 0:
+        # spawn, not fork: this may run on a thread next to other threads
+        parser = ProcessPoolExecutor(parse_workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        parser = executor
+    if render is True:
+        render = get_render_pool()
+    loop = asyncio.get_running_loop()
 
-        parsed = urlparse(url)
-        if parsed.netloc not in allowed_domains:
-            continue
+    queue = asyncio.Queue()
+    queue.put_nowait(start_url)
+    seen = {start_url}
+    pages = {}
+    fetched = 0
+    # Budget slots are reserved before a worker's first await, so workers
+    # can't all pass the check and overshoot max_pages. URLs met while every
+    # slot is reserved wait in `deferred` until a discarded page frees one.
+    in_flight = 0
+    deferred = deque()
 
-        # HARD LIMIT: stay under prefix
-        if not url.startswith(url_prefix):
-            continue
+    def done():
+        return fetched >= max_pages or (stop is not None and stop.is_set())
 
+    async def render_page(page, content):
+        url = page["url"]
+        await limiter.acquire(urlparse(url).netloc)
         try:
-            resp = requests.get(url, timeout=10, headers={"User-Agent": "ChatWithSiteBot/1.0"})
-            if resp.status_code != 200:
+            html = await loop.run_in_executor(executor, render.render, url)
+        except Exception as e:
+            logger.warning("Rendering %s failed, keeping static HTML: %s", url, e)
+            return content
+        page["html"] = html
+        return await loop.run_in_executor(parser, extract_page, html, url)
+
+    def enqueue(links):
+        # Only push more URLs if we still have budget
+        if done():
+            return
+        for link in links:
+            if link in seen:
                 continue
-            html = resp.text
-            pages[url] = html
+            seen.add(link)
+            # HARD LIMIT: stay under prefix
+            if (
+                link.startswith(url_prefix)
+                and urlparse(link).netloc in allowed_domains
+                and is_allowed(link, robots)
+            ):
+                queue.put_nowait(link)
 
-            # Only push more URLs if we still have budget
-            if len(pages) < max_pages:
-                for link in extract_links(html, url):
-                    if link not in seen and link.startswith(url_prefix):
-                        queue.append(link)
+    async def worker():
+        nonlocal fetched, in_flight
+        while True:
+            url = await queue.get()
+            slot = False
+            try:
+                if done():
+                    continue
+                if fetched + in_flight >= max_pages:
+                    deferred.append(url)
+                    continue
+                in_flight += 1
+                slot = True
 
-            time.sleep(delay)
-        except Exception as e:
-            logger.exception("Error fetching %s: %s", url, e)
-            continue
+                await limiter.acquire(urlparse(url).netloc)
+                page = await loop.run_in_executor(
+                    executor, _fetch, session, url, known.get(url)
+                )
+                if page is None or done():
+                    continue
+                if page["gone"]:
+                    if on_page is not None:
+                        await on_page(page)
+                    continue
+                if page["error"]:
+                    page["links"] = sorted(known[url].get("links", []))
+                    if on_page is not None:
+                        await on_page(page)
+                    enqueue(page["links"])
+                    continue
+                if page["not_modified"]:
+                    links = known[url].get("links", [])
+                else:
+                    content = await loop.run_in_executor(parser, extract_page, page["html"], url)
+                    if render and len(content["text"]) < MIN_TEXT_LEN:
+                        content = await render_page(page, content)
+                    links = content.pop("links")
+                    page["content"] = content
+                page["links"] = sorted(links)
+
+                in_flight -= 1
+                slot = False
+                fetched += 1
+                if on_page is None:
+                    if page["html"] is not None:
+                        pages[url] = page["html"]
+                else:
+                    await on_page(page)
+
+                enqueue(links)
+            except Exception as e:
+                logger.exception("Error fetching %s: %s", url, e)
+            finally:
+                if slot:  # page discarded: free its slot for a deferred URL
+                    in_flight -= 1
+                    if deferred and not done():
+                        queue.put_nowait(deferred.popleft())
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await queue.join()
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        executor.shutdown(wait=False)
+        if parser is not executor:
+            parser.shutdown(wait=False, cancel_futures=True)
+        if own_session:
+            session.close()
 
     return pages
+
+
+@timed("crawl")
+def crawl(
+    start_url,
+    max_pages=50,
+    allowed_domains=None,
+    delay=1.0,
+    url_prefix=None,
+    concurrency=8,
+    parse_workers=None,
+    render=False,
+):
+    """
+    BFS crawl, but **restricted** to URLs that start with `url_prefix`
+    (or, if not provided, restricted to same domain).
+
+    This prevents wandering off into portals/categories/etc.
+    Returns {url: html}. Runs `crawl_async` on a fresh event loop.
+    """
+    return asyncio.run(
+        crawl_async(
+            start_url,
+            max_pages=max_pages,
+            allowed_domains=allowed_domains,
+            delay=delay,
+            url_prefix=url_prefix,
+            concurrency=concurrency,
+            parse_workers=parse_workers,
+            render=render,
+        )
+    )
+
+
+def iter_crawl(start_url, queue_size=16, **crawl_kwargs):
+    """
+    Streaming variant of `crawl()`: yields page dicts
+    ({"url", "html", "etag", "last_modified", "not_modified", "gone",
+    "error", "links", "content"}) as they arrive; "content" (extract_page output
+    without links) is only set on freshly fetched pages.
+
+    The crawl runs on a background thread and hands pages over through a
+    bounded queue, so at most `queue_size` raw pages are held in memory and
+    a slow consumer applies backpressure to the fetchers.
+    """
+    q = queue_mod.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    sentinel = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue_mod.Full:
+                continue
+
+    async def on_page(page):
+        await asyncio.get_running_loop().run_in_executor(None, put, page)
+
+    def run():
+        try:
+            asyncio.run(crawl_async(start_url, on_page=on_page, stop=stop, **crawl_kwargs))
+        except Exception as e:
+            logger.exception("Crawl failed for %s: %s", start_url, e)
+        finally:
+            put(sentinel)
+
+    thread = threading.Thread(target=run, name="crawler", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is sentinel:
+                break
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,239 @@
+# backend/dedup.py
+import json
+import os
+import zlib
+
+import numpy as np
+
+from backend.bm25 import tokenize
+
+SHINGLE = 3          # words per shingle
+MAX_DISTANCE = 3     # Hamming distance (of 64 bits) still counted as a near-duplicate
+
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: spreads 32-bit crc values over all 64 bits
+    x = (x ^ (x >> np.uint64(30))) * _M1
+    x = (x ^ (x >> np.uint64(27))) * _M2
+    return x ^ (x >> np.uint64(31))
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over word 3-shingles. Texts differing in a few words
+    get hashes a few bits apart; identical texts (up to case, punctuation
+    and whitespace) get the same hash.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return 0
+    with np.errstate(over="ignore"):
+        h = _mix(np.fromiter((zlib.crc32(t.encode()) for t in tokens), np.uint64, len(tokens)))
+        if len(h) >= SHINGLE:
+            h = _mix(h[:-2] * _M1 ^ h[1:-1] * _M2 ^ h[2:])
+    bits = np.unpackbits(h.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    majority = bits.sum(axis=0) * 2 > len(h)
+    return int.from_bytes(np.packbits(majority, bitorder="little").tobytes(), "little")
+
+
+def dedup_path(index_path: str) -> str:
+    return index_path + ".dedup.json"
+
+
+def load_sources(path: str) -> dict:
+    """chunk_id -> URLs of every page using it, from a saved Deduper ({} if none)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {cid: urls for cid, (_, urls) in json.load(f).get("chunks", {}).items()}
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """
+    Near-duplicate lookup for 64-bit SimHashes. Hashes are split into
+    max_distance + 1 bands; two hashes within max_distance bits agree on
+    at least one band (pigeonhole), so only band collisions are compared.
+    """
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        n_bands = max_distance + 1
+        width = -(-64 // n_bands)
+        self._bands = [(i * width, (1 << min(width, 64 - i * width)) - 1) for i in range(n_bands)]
+        self._tables = [{} for _ in self._bands]
+
+    def add(self, h: int, key):
+        for (shift, mask), table in zip(self._bands, self._tables):
+            table.setdefault((h >> shift) & mask, []).append((h, key))
+
+    def remove(self, h: int, key):
+        for (shift, mask), table in zip(self._bands, self._tables):
+            bucket = table.get((h >> shift) & mask)
+            if bucket and (h, key) in bucket:
+                bucket.remove((h, key))
+
+    def find(self, h: int):
+        """Key of the closest indexed hash within max_distance, else None."""
+        best, best_d = None, self.max_distance + 1
+        for (shift, mask), table in zip(self._bands, self._tables):
+            for other, key in table.get((h >> shift) & mask, ()):
+                d = hamming(h, other)
+                if d < best_d:
+                    best, best_d = key, d
+                    if d == 0:
+                        return key
+        return best
+
+
+class Deduper:
+    """
+    Exact / near-duplicate detection for pages and chunks before they are
+    embedded, persisted next to the index:
+
+      chunks: chunk_id -> {"simhash", "urls"}  (every page that uses it)
+      pages:  url -> simhash                   (pages whose chunks were built)
+
+    A duplicate page or chunk is not embedded; the page references the
+    existing chunk instead, so a chunk is shared by several URLs and only
+    leaves the store once no page references it (see release()).
+    """
+    def __init__(self, path: str | None = None, max_distance: int = MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self.chunks = {}
+        self.pages = {}
+        self._chunk_index = SimHashIndex(max_distance)
+        self._page_index = SimHashIndex(max_distance)
+        self.stats = {"pages": 0, "dup_pages": 0, "chunks": 0, "dup_chunks": 0, "reused_chunks": 0}
+
+    # ---------- persistence ----------
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for cid, (h, urls) in data.get("chunks", {}).items():
+            self.chunks[cid] = {"simhash": int(h, 16), "urls": urls}
+            self._chunk_index.add(int(h, 16), cid)
+        for url, h in data.get("pages", {}).items():
+            self.pages[url] = int(h, 16)
+            self._page_index.add(int(h, 16), url)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {
+            "chunks": {cid: [f"{c['simhash']:016x}", c["urls"]] for cid, c in self.chunks.items()},
+            "pages": {url: f"{h:016x}" for url, h in self.pages.items()},
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        self.__init__(self.path, self.max_distance)
+
+    # ---------- pages ----------
+    def match_page(self, url: str, text: str):
+        """
+        URL of an indexed page that `text` duplicates, else None (and the
+        page is registered as a canonical page).
+        """
+        self.stats["pages"] += 1
+        h = simhash(text)
+        canonical = self._page_index.find(h)
+        if canonical is not None and canonical != url:
+            self.stats["dup_pages"] += 1
+            return canonical
+        self.drop_page(url)
+        self.pages[url] = h
+        self._page_index.add(h, url)
+        return None
+
+    def reuse_page(self, url: str, chunk_ids) -> list[str]:
+        """Reference a canonical page's chunks from duplicate page `url`."""
+        chunk_ids = [cid for cid in chunk_ids if cid in self.chunks]
+        for cid in chunk_ids:
+            self.ref(cid, url)
+        self.stats["reused_chunks"] += len(chunk_ids)
+        return chunk_ids
+
+    def drop_page(self, url: str):
+        h = self.pages.pop(url, None)
+        if h is not None:
+            self._page_index.remove(h, url)
+
+    # ---------- chunks ----------
+    def match_chunk(self, text: str):
+        """(chunk_id of an existing near-duplicate or None, simhash of text)."""
+        self.stats["chunks"] += 1
+        h = simhash(text)
+        cid = self._chunk_index.find(h)
+        if cid is not None:
+            self.stats["dup_chunks"] += 1
+        return cid, h
+
+    def add_chunk(self, chunk_id: str, h: int, url: str) -> bool:
+        """
+        Register a new chunk used by `url`. If chunk_id is already in use
+        the existing entry is kept and only gains the reference; returns
+        whether the chunk is new (i.e. still has to be embedded).
+        """
+        if chunk_id in self.chunks:
+            self.ref(chunk_id, url)
+            return False
+        self.chunks[chunk_id] = {"simhash": h, "urls": [url]}
+        self._chunk_index.add(h, chunk_id)
+        return True
+
+    def ref(self, chunk_id: str, url: str) -> bool:
+        """Add `url` to a chunk's sources; False if the chunk is unknown."""
+        c = self.chunks.get(chunk_id)
+        if c is None:
+            return False
+        if url not in c["urls"]:
+            c["urls"].append(url)
+        return True
+
+    def release(self, url: str, chunk_ids) -> list[str]:
+        """
+        Drop `url`'s references to chunk_ids; returns the chunks no page
+        references any more (to be removed from the store). Chunks the
+        deduper never saw are returned as-is.
+        """
+        orphans = []
+        for cid in chunk_ids:
+            c = self.chunks.get(cid)
+            if c is None:
+                orphans.append(cid)
+                continue
+            if url in c["urls"]:
+                c["urls"].remove(url)
+            if not c["urls"]:
+                del self.chunks[cid]
+                self._chunk_index.remove(c["simhash"], cid)
+                orphans.append(cid)
+        return orphans
+
+    def sources(self, chunk_id: str) -> list[str]:
+        """All URLs whose content this chunk stands for."""
+        c = self.chunks.get(chunk_id)
+        return list(c["urls"]) if c else []
+
+    def report(self) -> dict:
+        """Duplicates seen in this run and the embeddings they saved."""
+        s = self.stats
+        saved = s["dup_chunks"] + s["reused_chunks"]
+        return {
+            **s,
+            "embeddings_saved": saved,
+            "saved_ratio": saved / (s["chunks"] + s["reused_chunks"]) if saved else 0.0,
+        }
@@ -0,0 +1,195 @@
+# backend/embed_cache.py
+import atexit
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, size-bounded on-disk embedding cache for one
+    (provider, model) pair.
+
+    Layout under `path/`:
+      rows.bin   memory-mapped (sha256 digest, float32 vector) records,
+                 grown by doubling
+      ticks.npy  (n,) int64 last-use counter for LRU eviction
+      dim.npy    vector width
+
+    Every row carries the digest of the text its vector belongs to: the key
+    index is rebuilt from rows.bin on load and a lookup only returns a
+    vector whose row still holds its key. An evicted row's digest is
+    cleared before its vector is overwritten, so a crash mid-write leaves
+    an empty row, never a vector filed under another text. Only the LRU
+    ticks are persisted on flush() (and at interpreter exit).
+    """
+    def __init__(self, path: str, dim: int | None = None, max_bytes: int = 1 << 30):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dim = dim
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._slots = {}  # digest -> row
+        self._ticks = np.zeros(0, dtype=np.int64)
+        self._tick = 0
+        self._used = 0  # rows handed out so far (live or emptied)
+        self._rows = None
+        self._dirty = False
+
+        os.makedirs(path, exist_ok=True)
+        self._load()
+        atexit.register(self.flush)
+
+    # ---------- persistence ----------
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _dtype(self):
+        return np.dtype([("key", np.uint8, 32), ("vec", np.float32, self.dim)])
+
+    def _load(self):
+        if not os.path.exists(self._file("rows.bin")) or not os.path.exists(self._file("dim.npy")):
+            return
+        self.dim = int(np.load(self._file("dim.npy")))
+        rows = os.path.getsize(self._file("rows.bin")) // self._dtype().itemsize
+        if rows == 0:
+            return
+        self._open_rows(rows)
+        keys = self._rows["key"]
+        live = np.flatnonzero(keys.any(axis=1))
+        self._slots = {keys[i].tobytes(): int(i) for i in live}
+        self._used = int(live[-1]) + 1 if len(live) else 0
+
+        ticks = np.full(rows, -1, dtype=np.int64)
+        if os.path.exists(self._file("ticks.npy")):
+            saved = np.load(self._file("ticks.npy"))[:rows]
+            ticks[:len(saved)] = saved
+        self._tick = int(ticks.max()) + 1
+        self._ticks = np.full(rows, -1, dtype=np.int64)  # empty rows are reused first
+        # rows written after the last flush count as just used
+        self._ticks[live] = np.where(ticks[live] < 0, self._tick, ticks[live])
+
+    def _open_rows(self, rows: int):
+        fname = self._file("rows.bin")
+        if self._rows is not None:
+            self._rows.flush()
+            self._rows = None  # release the old mapping before resizing
+        else:
+            np.save(self._file("dim.npy"), np.int64(self.dim))
+        dtype = self._dtype()
+        with open(fname, "ab") as f:
+            f.truncate(rows * dtype.itemsize)
+        self._rows = np.memmap(fname, dtype=dtype, mode="r+", shape=(rows,))
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            if self._rows is not None:
+                self._rows.flush()
+            np.save(self._file("ticks.npy"), self._ticks[:self._used])
+            self._dirty = False
+
+    # ---------- lookup / insert ----------
+    @property
+    def capacity(self) -> int:
+        return max(1, self.max_bytes // (self.dim * 4)) if self.dim else 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def get_many(self, keys: list[bytes]):
+        """
+        Returns (vectors, missing) where vectors[i] is a float32 array or
+        None, and missing lists the indices that were not cached.
+        """
+        out = [None] * len(keys)
+        missing = []
+        with self._lock:
+            if self._rows is not None:
+                row_keys, vecs = self._rows["key"], self._rows["vec"]
+            for i, k in enumerate(keys):
+                row = self._slots.get(k)
+                if row is not None and row_keys[row].tobytes() != k:
+                    del self._slots[k]  # row was reused: never serve another text's vector
+                    row = None
+                if row is None:
+                    missing.append(i)
+                    continue
+                out[i] = np.array(vecs[row])
+                self._ticks[row] = self._tick
+                self._tick += 1
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            if len(missing) < len(keys):
+                self._dirty = True
+        return out, missing
+
+    def put_many(self, keys: list[bytes], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            new = {}
+            for k, v in zip(keys, vectors):
+                if k not in self._slots:
+                    new[k] = v
+            if not new:
+                return
+            new = list(new.items())[-self.capacity:]
+
+            rows = self._alloc_rows(len(new))
+            row_keys, vecs = self._rows["key"], self._rows["vec"]
+            for row, (k, v) in zip(rows, new):
+                vecs[row] = v
+                row_keys[row] = np.frombuffer(k, dtype=np.uint8)  # after the vector
+                self._ticks[row] = self._tick
+                self._tick += 1
+                self._slots[k] = row
+            self._dirty = True
+
+    def _alloc_rows(self, count: int) -> list[int]:
+        used = self._used
+        fresh = max(0, min(count, self.capacity - used))
+        rows = list(range(used, used + fresh))
+        if fresh:
+            allocated = len(self._ticks)
+            if used + fresh > allocated:
+                grow = min(self.capacity, max(1024, allocated * 2, used + fresh))
+                self._open_rows(grow)
+                self._ticks = np.concatenate(
+                    [self._ticks, np.full(grow - allocated, -1, dtype=np.int64)]
+                )
+            self._used += fresh
+
+        evict = count - fresh
+        if evict:
+            # full: reuse the least recently used (or emptied) rows
+            lru = np.argpartition(self._ticks[:used], evict - 1)[:evict]
+            row_keys = self._rows["key"]
+            for row in lru:
+                if self._slots.pop(row_keys[row].tobytes(), None) is not None:
+                    self.evictions += 1
+            row_keys[lru] = 0  # cleared before the new vectors are written
+            rows += [int(r) for r in lru]
+        return rows
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,146 @@
+# backend/embed_engine.py
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:  # imported lazily: pulls in torch
+    from sentence_transformers import SentenceTransformer
+
+BACKENDS = ("torch", "int8", "onnx")
+
+# quantized ONNX export shipped with the sentence-transformers hub models
+ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+
+
+def load_model(name: str, backend: str = "torch") -> "SentenceTransformer":
+    """
+    SentenceTransformer for `backend`:
+      - "torch": fp32 PyTorch
+      - "int8":  PyTorch with dynamically int8-quantized Linear layers
+      - "onnx":  ONNX Runtime with the quantized ONNX_FILE export
+                 (needs sentence-transformers[onnx])
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        return SentenceTransformer(name, device="cpu", backend="onnx", model_kwargs={"file_name": ONNX_FILE})
+    model = SentenceTransformer(name, device="cpu" if backend == "int8" else None)
+    if backend == "int8":
+        import torch
+
+        torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def token_lengths(model: "SentenceTransformer", texts) -> np.ndarray:
+    """Token count of each text as the model will see it (truncated, with special tokens)."""
+    ids = model.tokenizer(
+        list(texts), add_special_tokens=True, truncation=True, max_length=model.max_seq_length
+    )["input_ids"]
+    return np.fromiter((len(i) for i in ids), dtype=np.int64, count=len(ids))
+
+
+def plan_batches(lengths: np.ndarray, token_budget: int, max_batch: int) -> list[np.ndarray]:
+    """
+    Length-sorted batches (longest first) whose padded size
+    (batch size * longest text in it) stays within token_budget.
+    Returns index arrays into the original order.
+    """
+    order = np.argsort(-lengths, kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        longest = max(int(lengths[order[start]]), 1)
+        size = int(min(max(token_budget // longest, 1), max_batch))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+# ---------- worker processes ----------
+_WORKER_MODEL = None
+
+
+def _init_worker(name, backend, threads):
+    global _WORKER_MODEL
+    import torch
+
+    torch.set_num_threads(threads)
+    _WORKER_MODEL = load_model(name, backend)
+
+
+def _encode_batch(texts):
+    return _WORKER_MODEL.encode(
+        texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False
+    ).astype("float32")
+
+
+class LocalEmbeddingEngine:
+    """
+    CPU embedding scheduler for a local sentence-transformers model.
+
+    Texts are sorted by token length and cut into batches that fit a
+    padded-token budget, which bounds activation memory per batch: short
+    chunks go in big batches, long ones in small batches, and there is
+    little padding either way. With workers > 0 the batches are
+    spread over that many processes, each holding its own copy of the
+    model and cores // workers torch threads. Vectors come back in input
+    order.
+    """
+    def __init__(
+        self,
+        model: str,
+        backend: str = "torch",
+        workers: int = 0,
+        token_budget: int = 16_384,
+        max_batch: int = 256,
+    ):
+        self.name = model
+        self.backend = backend
+        self.workers = max(int(workers), 0)
+        self.token_budget = token_budget
+        self.max_batch = max_batch
+        self.model = load_model(model, backend)
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            threads = max((os.cpu_count() or 1) // self.workers, 1)
+            self._pool = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.name, self.backend, threads),
+            )
+        return self._pool
+
+    def encode(self, texts) -> np.ndarray:
+        texts = list(texts)
+        dim = self.model.get_sentence_embedding_dimension()
+        out = np.zeros((len(texts), dim), dtype="float32")
+        if not texts:
+            return out
+        batches = plan_batches(token_lengths(self.model, texts), self.token_budget, self.max_batch)
+        groups = [[texts[i] for i in idx] for idx in batches]
+
+        if self.workers and len(batches) > 1:
+            results = self._get_pool().map(_encode_batch, groups)
+        else:
+            results = (
+                self.model.encode(g, batch_size=len(g), convert_to_numpy=True, show_progress_bar=False)
+                for g in groups
+            )
+        for idx, vecs in zip(batches, results):
+            out[idx] = vecs
+        return out
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
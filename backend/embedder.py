@@ -1,7 +1,20 @@
 # backend/embedder.py
 import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from backend.embed_cache import EmbeddingCache, text_key
+from backend.embed_engine import LocalEmbeddingEngine
+from backend.metrics import count, timed
+from backend.openai_embed import OpenAIEmbedder
+
+if TYPE_CHECKING:  # imported on first local encode: pulls in torch
+    from sentence_transformers import SentenceTransformer
 
 try:
     from openai import OpenAI
@@ -9,17 +22,66 @@ try:
 except Exception:
     OPENAI_AVAILABLE = False
 
+LOCAL_MODEL = "all-MiniLM-L6-v2"
+OPENAI_MODEL = "text-embedding-3-large"
+
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "data/cache/embeddings")
+EMBED_CACHE_MAX_MB = int(os.getenv("EMBED_CACHE_MAX_MB", "1024"))
+
+# local encoding: "torch" | "int8" | "onnx", worker processes (0 = in-process)
+# and padded tokens per batch (the memory budget)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "0"))
+EMBED_TOKEN_BUDGET = int(os.getenv("EMBED_TOKEN_BUDGET", "16384"))
+
+# OpenAI embeddings: Matryoshka truncation (unset = full 3072 dims),
+# concurrent requests and the account's rate limits
+OPENAI_DIMENSIONS = int(os.getenv("OPENAI_EMBED_DIMENSIONS", "0")) or None
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_EMBED_CONCURRENCY", "4"))
+OPENAI_RPM = float(os.getenv("OPENAI_EMBED_RPM", "3000"))
+OPENAI_TPM = float(os.getenv("OPENAI_EMBED_TPM", "1000000"))
+
+# in-process LRU of query -> vector (queries repeat; the disk cache is for chunks)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "4096"))
+
 _MODEL_CACHE = {}
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
 _OPENAI_CLIENT = None
+_OPENAI_EMBEDDER = None
+_EMBED_CACHES = {}
 
 
-def get_local_model(name: str = "all-MiniLM-L6-v2") -> SentenceTransformer:
+def get_local_model(name: str = LOCAL_MODEL) -> "SentenceTransformer":
     """Load / cache the local sentence-transformers model."""
+    if name == LOCAL_MODEL:
+        return get_local_engine().model
     if name not in _MODEL_CACHE:
+        from sentence_transformers import SentenceTransformer
+
         _MODEL_CACHE[name] = SentenceTransformer(name)
     return _MODEL_CACHE[name]
 
 
+def get_local_engine() -> LocalEmbeddingEngine:
+    """Process-wide embedding engine for LOCAL_MODEL, configured from EMBED_* env vars."""
+    global _ENGINE
+    with _ENGINE_LOCK:  # concurrent first requests load the model once
+        if _ENGINE is None:
+            _ENGINE = LocalEmbeddingEngine(
+                LOCAL_MODEL,
+                backend=EMBED_BACKEND,
+                workers=EMBED_WORKERS,
+                token_budget=EMBED_TOKEN_BUDGET,
+            )
+    return _ENGINE
+
+
+def local_model_id() -> str:
+    """Cache key of the local model; quantized variants give different vectors."""
+    return LOCAL_MODEL if EMBED_BACKEND == "torch" else f"{LOCAL_MODEL}@{EMBED_BACKEND}"
+
+
 def get_openai_client():
     """Return OpenAI client if API key is set, else None."""
     global _OPENAI_CLIENT
@@ -34,7 +96,71 @@ def get_openai_client():
     return _OPENAI_CLIENT
 
 
-def embed_texts(texts, provider: str = "local"):
+def get_openai_embedder():
+    """Shared OpenAIEmbedder (one rate limiter per process), or None without a client."""
+    global _OPENAI_EMBEDDER
+    if _OPENAI_EMBEDDER is None:
+        client = get_openai_client()
+        if client is None:
+            return None
+        _OPENAI_EMBEDDER = OpenAIEmbedder(
+            client,
+            OPENAI_MODEL,
+            dimensions=OPENAI_DIMENSIONS,
+            concurrency=OPENAI_CONCURRENCY,
+            rpm=OPENAI_RPM,
+            tpm=OPENAI_TPM,
+        )
+    return _OPENAI_EMBEDDER
+
+
+def openai_model_id() -> str:
+    """Cache key of the OpenAI model; truncated vectors differ from full ones."""
+    return OPENAI_MODEL if not OPENAI_DIMENSIONS else f"{OPENAI_MODEL}@{OPENAI_DIMENSIONS}"
+
+
+def get_embedding_cache(provider: str, model: str) -> EmbeddingCache:
+    """One on-disk cache per (provider, model); vectors differ between models."""
+    key = (provider, model)
+    if key not in _EMBED_CACHES:
+        path = os.path.join(EMBED_CACHE_DIR, f"{provider}__{model.replace('/', '_')}")
+        _EMBED_CACHES[key] = EmbeddingCache(path, max_bytes=EMBED_CACHE_MAX_MB << 20)
+    return _EMBED_CACHES[key]
+
+
+def embed_cache_stats() -> dict:
+    """Hit/miss counters per cache, keyed "provider/model"."""
+    return {f"{p}/{m}": c.stats() for (p, m), c in _EMBED_CACHES.items()}
+
+
+def flush_embed_caches():
+    for cache in _EMBED_CACHES.values():
+        cache.flush()
+
+
+def _resolve_provider(provider: str):
+    """Returns (provider, model) actually used for `provider`."""
+    if provider in ("openai", "auto"):
+        client = get_openai_client()
+        if client is None and provider == "openai":
+            raise RuntimeError("OPENAI_API_KEY not set or openai package unavailable.")
+        if client is not None:
+            return "openai", openai_model_id()
+    # "local" and fallback
+    return "local", local_model_id()
+
+
+@timed("encode")
+def _encode(texts, provider: str, model: str):
+    count("embedded", len(texts))
+    if provider == "openai":
+        return get_openai_embedder().embed(texts)
+
+    return get_local_engine().encode(texts)
+
+
+@timed("embed")
+def embed_texts(texts, provider: str = "local", use_cache: bool = True):
     """
     Embed a list of texts.
 
@@ -42,26 +168,125 @@ def embed_texts(texts, provider: str = "local"):
       - "local"  -> sentence-transformers (no API key needed)
       - "openai" -> OpenAI embeddings (if OPENAI_API_KEY set)
       - "auto"   -> try OpenAI, fall back to local
+
+    With use_cache, vectors are looked up in the on-disk embedding cache
+    by sha256 of the text and only the misses are sent to the model.
     """
-    if provider == "local":
-        model = get_local_model()
-        embs = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-        return embs.astype("float32")
+    provider, model = _resolve_provider(provider)
+    if not use_cache or not texts:
+        return _encode(texts, provider, model)
 
-    if provider in ("openai", "auto"):
-        client = get_openai_client()
-        if client is None and provider == "openai":
-            raise RuntimeError("OPENAI_API_KEY not set or openai package unavailable.")
-        if client is not None:
-            # Small, simple batching; can be improved later.
-            res = client.embeddings.create(
-                input=texts,
-                model="text-embedding-3-large",
-            )
-            embs = [item.embedding for item in res.data]
-            return np.array(embs, dtype="float32")
+    cache = get_embedding_cache(provider, model)
+    keys = [text_key(t) for t in texts]
+    cached, missing = cache.get_many(keys)
+    if missing:
+        # embed each distinct missing text once
+        todo = {}
+        for i in missing:
+            todo.setdefault(keys[i], texts[i])
+        vecs = _encode(list(todo.values()), provider, model)
+        cache.put_many(list(todo), vecs)
+        fresh = dict(zip(todo, vecs))
+        for i in missing:
+            cached[i] = fresh[keys[i]]
+    return np.vstack(cached).astype("float32")
+
+
+class QueryVectorCache:
+    """Thread-safe LRU of (model, query text) -> vector."""
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, key, vec):
+        with self._lock:
+            self._data[key] = vec
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._data),
+            }
 
-    # Fallback
-    model = get_local_model()
-    embs = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-    return embs.astype("float32")
+
+_QUERY_CACHE = QueryVectorCache()
+
+
+@timed("embed_query")
+def embed_query(query: str, provider: str = "local") -> np.ndarray:
+    """
+    (1, dim) vector for one query, from an in-process LRU when the same
+    query was embedded before. Bypasses the on-disk chunk cache.
+    """
+    provider, model = _resolve_provider(provider)
+    key = (model, query)
+    vec = _QUERY_CACHE.get(key)
+    if vec is None:
+        vec = _encode([query], provider, model)[0:1].astype("float32")
+        vec.setflags(write=False)  # shared between callers
+        _QUERY_CACHE.put(key, vec)
+    return vec
+
+
+@timed("embed_query")
+def embed_queries(queries, provider: str = "local") -> np.ndarray:
+    """
+    (n, dim) vectors for many queries: embed_query()'s LRU per query, one
+    encode for the misses. Bypasses the on-disk chunk cache.
+    """
+    provider, model = _resolve_provider(provider)
+    vecs = [_QUERY_CACHE.get((model, q)) for q in queries]
+    todo = list(dict.fromkeys(q for q, v in zip(queries, vecs) if v is None))
+    if todo:
+        fresh = {}
+        for q, vec in zip(todo, _encode(todo, provider, model).astype("float32")):
+            vec = vec[None, :]
+            vec.setflags(write=False)
+            _QUERY_CACHE.put((model, q), vec)
+            fresh[q] = vec
+        vecs = [fresh[q] if v is None else v for q, v in zip(queries, vecs)]
+    return np.vstack(vecs)
+
+
+def query_cache_stats() -> dict:
+    return _QUERY_CACHE.stats()
+
+
+def warm_up() -> dict:
+    """
+    Load the local model and run one dummy encode, so the first user
+    query does not pay for it. Returns the seconds spent importing
+    sentence-transformers / torch, loading the model and encoding.
+    """
+    t0 = time.perf_counter()
+    already = "sentence_transformers" in sys.modules
+    import sentence_transformers  # noqa: F401
+    t1 = time.perf_counter()
+    engine = get_local_engine()
+    t2 = time.perf_counter()
+    engine.encode(["warm up"])
+    t3 = time.perf_counter()
+    return {
+        "import_s": 0.0 if already else t1 - t0,
+        "load_s": t2 - t1,
+        "first_encode_ms": (t3 - t2) * 1000,
+    }
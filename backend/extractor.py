@@ -0,0 +1,79 @@
+# backend/extractor.py
+
+import re
+from urllib.parse import urljoin
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from backend.metrics import timed
+from backend.utils import normalize_url
+
+DROP_TAGS = ("script", "style", "noscript", "iframe", "header", "footer", "nav")
+BLOCK_TAGS = ("h1", "h2", "h3", "p", "li")
+
+_PARSER = lxml_html.HTMLParser(encoding="utf-8", remove_comments=False)
+
+
+def _get_text(el) -> str:
+    # same as BeautifulSoup's get_text(separator=" ", strip=True): itertext
+    # yields each text node separately, skipping comment / PI text but not
+    # the text that follows them
+    return " ".join(s for s in (s.strip() for s in el.itertext()) if s)
+
+
+def _drop(el):
+    """
+    Remove `el` and its subtree but keep its tail as a separate text node
+    (held by an empty comment), like BeautifulSoup's decompose(): the text
+    on either side is not glued together.
+    """
+    if el.tail:
+        marker = etree.Comment("")
+        marker.tail = el.tail
+        el.addnext(marker)
+    el.getparent().remove(el)
+
+
+@timed("extract")
+def extract_page(html: str, url: str) -> dict:
+    """
+    Single-pass replacement for crawler.extract_links + cleaner.extract_text_and_meta.
+
+    Parses once with lxml (libxml2) and returns
+      {"url", "title", "description", "text", "links"}
+    where links are collected from the raw page (before nav/header/footer
+    are dropped, as extract_links does) and the rest matches
+    extract_text_and_meta.
+    """
+    out = {"url": url, "title": "", "description": "", "text": "", "links": set()}
+    if not html or not html.strip():
+        return out
+    # bytes + explicit encoding: lxml rejects str input with an XML encoding declaration
+    root = lxml_html.document_fromstring(html.encode("utf-8", "replace"), parser=_PARSER)
+
+    for a in root.iter("a"):
+        href = a.get("href")
+        if href is None:
+            continue
+        href = href.strip()
+        if href.startswith("mailto:") or href.startswith("tel:"):
+            continue
+        out["links"].add(normalize_url(urljoin(url, href)))
+
+    for el in list(root.iter(*DROP_TAGS)):
+        if el.getparent() is not None:
+            _drop(el)
+
+    title = next(root.iter("title"), None)
+    if title is not None:
+        out["title"] = _get_text(title)
+
+    for md in root.iter("meta"):
+        if md.get("name") == "description":
+            out["description"] = (md.get("content") or "").strip()
+            break
+
+    blocks = [t for t in (_get_text(el) for el in root.iter(*BLOCK_TAGS)) if t]
+    out["text"] = re.sub(r"\n\s+\n", "\n\n", "\n\n".join(blocks))
+    return out
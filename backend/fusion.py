@@ -0,0 +1,59 @@
+import numpy as np
+
+FUSION_METHODS = ("rrf", "minmax", "zscore", "weighted")
+
+RRF_K = 60
+
+
+def _rrf(scores: np.ndarray) -> np.ndarray:
+    # scores are already in rank order; only the rank is used, and tied
+    # scores share the best rank so their order in the list doesn't matter
+    ranks = np.searchsorted(-scores, -scores, side="left") + 1
+    return 1.0 / (RRF_K + ranks)
+
+
+def _minmax(scores: np.ndarray) -> np.ndarray:
+    lo, hi = scores.min(), scores.max()
+    if hi - lo < 1e-12:
+        return np.ones_like(scores)
+    return (scores - lo) / (hi - lo)
+
+
+def _zscore(scores: np.ndarray) -> np.ndarray:
+    std = scores.std()
+    if std < 1e-12:
+        return np.zeros_like(scores)
+    return (scores - scores.mean()) / std
+
+
+def _weighted(scores: np.ndarray) -> np.ndarray:
+    # raw scores, as the retriever originally summed them
+    return scores
+
+
+_NORMALISERS = {"rrf": _rrf, "minmax": _minmax, "zscore": _zscore, "weighted": _weighted}
+
+
+def fuse(branches, weights, method: str = "rrf"):
+    """
+    Fuse ranked candidate lists from several retrievers.
+
+    branches: list of ranked lists of (key, score), best first
+    weights:  one weight per branch
+    method:   "rrf" (reciprocal rank), "minmax" / "zscore" (per-query
+              score normalisation) or "weighted" (raw scores)
+
+    Returns {key: fused score}. A key missing from a branch gets nothing
+    from that branch.
+    """
+    if method not in _NORMALISERS:
+        raise ValueError(f"fusion method must be one of {FUSION_METHODS}")
+    normalise = _NORMALISERS[method]
+    fused = {}
+    for ranked, weight in zip(branches, weights):
+        if not ranked:
+            continue
+        scores = normalise(np.asarray([s for _, s in ranked], dtype=np.float64))
+        for (key, _), s in zip(ranked, scores):
+            fused[key] = fused.get(key, 0.0) + weight * float(s)
+    return fused
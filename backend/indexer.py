@@ -2,11 +2,16 @@
 
 import hashlib
 import os
+import time
 from urllib.parse import urldefrag
-from backend.crawler import crawl
-from backend.cleaner import extract_text_and_meta
-from backend.chunker import chunk_text
-from backend.embedder import embed_texts
+from backend.crawler import iter_crawl
+from backend.catalog import get_catalog, index_path_for
+from backend.chunker import chunk_spans
+from backend.dedup import Deduper, dedup_path
+from backend.embedder import embed_texts, flush_embed_caches
+from backend.manifest import PageManifest
+from backend.metrics import count, timed
+from backend.retriever import get_retriever
 from backend.vectordb import FaissStore
 
 
@@ -14,60 +19,238 @@ def page_hash(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def index_site(root_url: str, max_pages: int = 10, index_path: str = "data/index/site"):
+def chunk_page(meta_page: dict) -> list[dict]:
+    """
+    Split a cleaned page into chunk metas. start / end are the chunk's
+    character offsets into the page text.
+
+    chunk_id is content-addressed (hash of the chunk text), so re-chunking
+    a changed page never hands an old id to different text while another
+    page still references it.
+    """
+    url = meta_page["url"]
+    text = meta_page["text"]
+    return [
+        {
+            "url": url,
+            "title": meta_page["title"],
+            "description": meta_page["description"],
+            "chunk_id": hashlib.md5(text[start:end].encode("utf-8")).hexdigest(),
+            "text": text[start:end],
+            "start": int(start),
+            "end": int(end),
+        }
+        for start, end in chunk_spans(text)
+    ]
+
+
+@timed("index_site")
+def index_site(
+    root_url: str,
+    max_pages: int = 10,
+    index_path: str | None = None,
+    batch_size: int = 256,
+    progress=None,
+    parse_workers: int | None = None,
+    render: bool = False,
+    delay: float = 1.0,
+):
     """
     Default site indexer:
     - Crawls ONLY under this exact URL (no domain-wide wandering)
     - Cleans, chunks, embeds, indexes.
+
+    Stages are streamed: pages are cleaned and chunked as the crawler
+    yields them and every `batch_size` chunks are embedded and added to
+    the store right away, so raw HTML is never accumulated.
+
+    Re-indexing the same root is incremental: a page manifest stored next
+    to the index drives conditional GETs, pages whose text hash is
+    unchanged are skipped, changed pages have their old chunks replaced,
+    and pages that disappeared (404/410, or no longer linked) are removed
+    from the store. Pages that fail to fetch otherwise are left as they were.
+
+    Exact and near-duplicate pages and chunks (SimHash, see backend.dedup)
+    are not embedded: the page references the existing chunk instead, and
+    the deduper keeps each chunk's list of source URLs. A chunk leaves the
+    store once no page references it.
+
+    index_path: defaults to a per-site directory under INDEX_DIR (see
+    backend.catalog); the finished store is registered in the process-wide
+    catalog so other sessions can query it without re-crawling.
+
+    parse_workers: HTML parsing processes for the crawler (see crawl_async).
+    render: re-fetch JS-rendered pages through the headless browser pool
+    (needs Chrome; off by default).
+    delay: per-host politeness delay between requests (s).
+
+    progress: optional callable receiving
+      {"pages", "chunks", "embedded", "vectors_per_sec", "unchanged",
+       "removed", "duplicate_pages", "embeddings_saved"} after each page
+      and each embedded batch.
     """
     # strip #fragment (e.g. #Spin-offs)
     root_clean, _ = urldefrag(root_url)
+    index_path = index_path or index_path_for(root_clean)
+
+    manifest = PageManifest(index_path + ".manifest.json")
+    manifest.load()
+    deduper = Deduper(dedup_path(index_path))
+    deduper.load()
+
+    store = None
+    if manifest.root_url == root_clean:
+        store = FaissStore(dim=384, index_path=index_path)
+        if not store.load():
+            store = None
+    if store is None:
+        manifest.reset(root_clean)
+        deduper.reset()
+
+    stats = {
+        "pages": 0, "chunks": 0, "embedded": 0, "vectors_per_sec": 0.0,
+        "unchanged": 0, "removed": 0, "duplicate_pages": 0, "embeddings_saved": 0,
+    }
+    embed_seconds = 0.0
+    pending = []
+
+    def report():
+        dedup = deduper.report()
+        stats["duplicate_pages"] = dedup["dup_pages"]
+        stats["embeddings_saved"] = dedup["embeddings_saved"]
+        if progress:
+            progress(dict(stats))
 
-    pages = crawl(
+    def flush():
+        nonlocal store, embed_seconds
+        t0 = time.perf_counter()
+        vecs = embed_texts([m["text"] for m in pending], provider="local")
+        embed_seconds += time.perf_counter() - t0
+
+        if store is None:
+            store = FaissStore(dim=vecs.shape[1], index_path=index_path)
+        store.add(vecs, pending)
+
+        stats["embedded"] += len(pending)
+        stats["vectors_per_sec"] = stats["embedded"] / embed_seconds if embed_seconds else 0.0
+        pending.clear()
+        report()
+
+    pages = iter_crawl(
         root_clean,
         max_pages=max_pages,
         url_prefix=root_clean,  # 🔒 lock to this page / subtree
+        known=manifest.validators(),
+        parse_workers=parse_workers,
+        render=render,
+        delay=delay,
     )
 
-    all_metas = []
-    texts_for_bm25 = []
+    seen = set()
+    kept = set()
+    gone = []
+    for page in pages:
+        url = page["url"]
+        if page["gone"]:
+            gone.append(url)
+            continue
+        if page["error"]:
+            # transient failure: keep the indexed copy and its manifest entry
+            kept.add(url)
+            continue
+        seen.add(url)
+        stats["pages"] += 1
+        count("pages")
+        validators = {
+            "etag": page["etag"],
+            "last_modified": page["last_modified"],
+            "links": page["links"],
+        }
+
+        if page["not_modified"]:
+            manifest.update(url, **validators)
+            stats["unchanged"] += 1
+            report()
+            continue
+
+        meta_page = page["content"]  # parsed once by the crawler
+        h = page_hash(meta_page["text"])
+        entry = manifest.get(url)
+        if entry is not None and entry["hash"] == h:
+            manifest.update(url, **validators)
+            stats["unchanged"] += 1
+            report()
+            continue
+
+        if entry is not None:
+            orphans = deduper.release(url, entry["chunk_ids"])
+            deduper.drop_page(url)
+            if store is not None:
+                store.remove(orphans)
 
-    for url, html in pages.items():
-        meta_page = extract_text_and_meta(html, url)
         if not meta_page["text"].strip():
+            manifest.update(url, hash=h, chunk_ids=[], **validators)
+            report()
             continue
 
-        chunks = chunk_text(meta_page["text"])
-        for i, chunk in enumerate(chunks):
-            chunk_meta = {
-                "url": url,
-                "title": meta_page["title"],
-                "description": meta_page["description"],
-                "chunk_id": f"{hashlib.md5((url + str(i)).encode()).hexdigest()}",
-                "text": chunk,
-            }
-            all_metas.append(chunk_meta)
-            texts_for_bm25.append(chunk)
-
-    if not all_metas:
-        store = FaissStore(dim=384, index_path=index_path)
-        return store, texts_for_bm25, all_metas
+        canonical = deduper.match_page(url, meta_page["text"])
+        if canonical is not None:
+            # same content as a page already indexed: share its chunks
+            chunk_ids = deduper.reuse_page(url, manifest.get(canonical)["chunk_ids"])
+            manifest.update(url, hash=h, chunk_ids=chunk_ids, **validators)
+            report()
+            continue
 
-    dim = None
-    store = None
-    batch_size = 64
+        chunk_ids = []
+        for chunk_meta in chunk_page(meta_page):
+            cid = chunk_meta["chunk_id"]
+            dup, sh = deduper.match_chunk(chunk_meta["text"])
+            if dup is not None and deduper.ref(dup, url):
+                cid = dup
+            elif deduper.add_chunk(cid, sh, url):
+                chunk_ids.append(cid)
+                stats["chunks"] += 1
+                count("chunks")
+                pending.append(chunk_meta)
+                if len(pending) >= batch_size:
+                    flush()
+                continue
+            # an existing chunk stands for this one: reference it, don't embed
+            if cid not in chunk_ids:
+                chunk_ids.append(cid)
+        manifest.update(url, hash=h, chunk_ids=chunk_ids, **validators)
+        report()
 
-    for start in range(0, len(all_metas), batch_size):
-        batch_metas = all_metas[start:start + batch_size]
-        batch_texts = [m["text"] for m in batch_metas]
-        vecs = embed_texts(batch_texts, provider="local")
+    if pending:
+        flush()
 
-        if store is None:
-            dim = vecs.shape[1]
-            store = FaissStore(dim=dim, index_path=index_path)
+    # Drop pages that disappeared: 404/410 responses, plus anything the
+    # crawl could no longer reach if it finished under its page budget.
+    # Pages that failed to fetch are kept. (An empty crawl is treated as a
+    # fetch failure, not a wiped site.)
+    if seen and len(seen) < max_pages:
+        gone += [u for u in manifest.pages if u not in seen and u not in kept]
+    for url in gone:
+        entry = manifest.drop(url)
+        deduper.drop_page(url)
+        if entry is not None:
+            orphans = deduper.release(url, entry["chunk_ids"])
+            if store is not None:
+                stats["removed"] += store.remove(orphans)
+    report()
 
-        store.add(vecs, batch_metas)
+    if store is None:
+        store = FaissStore(dim=384, index_path=index_path)
+        return store, [], []
 
     os.makedirs(os.path.dirname(index_path), exist_ok=True)
     store.save()
+    manifest.save()
+    deduper.save()
+    flush_embed_caches()
+    get_retriever(store)  # build + persist BM25 once, at index time
+    get_catalog().put(root_clean, store)
+
+    all_metas = store.metas()
+    texts_for_bm25 = [m["text"] for m in all_metas]
     return store, texts_for_bm25, all_metas
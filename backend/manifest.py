@@ -0,0 +1,64 @@
+# backend/manifest.py
+import json
+import os
+
+
+class PageManifest:
+    """
+    Persistent record of what was indexed for a site, used for incremental
+    re-indexing:
+
+      url -> {"hash", "etag", "last_modified", "chunk_ids", "links"}
+
+    `hash` is the sha256 of the cleaned page text, `chunk_ids` are the
+    FaissStore chunks built from it, `links` are its out-links (so a 304
+    page can still be expanded by the crawler).
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.root_url = None
+        self.pages = {}
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.root_url = data.get("root_url")
+        self.pages = data.get("pages", {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"root_url": self.root_url, "pages": self.pages}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def reset(self, root_url: str):
+        self.root_url = root_url
+        self.pages = {}
+
+    def get(self, url: str):
+        return self.pages.get(url)
+
+    def update(self, url: str, **fields):
+        entry = self.pages.setdefault(
+            url,
+            {"hash": None, "etag": None, "last_modified": None, "chunk_ids": [], "links": []},
+        )
+        entry.update(fields)
+        return entry
+
+    def drop(self, url: str):
+        return self.pages.pop(url, None)
+
+    def validators(self) -> dict:
+        """
+        {url: {"etag", "last_modified", "links"}} of every indexed page, for
+        conditional crawling (pages without validators are fetched in full,
+        but still report 404/410 as gone and errors as kept).
+        """
+        return {
+            url: {"etag": e.get("etag"), "last_modified": e.get("last_modified"), "links": e.get("links", [])}
+            for url, e in self.pages.items()
+        }
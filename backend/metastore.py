@@ -0,0 +1,304 @@
+# backend/metastore.py
+import json
+import os
+import shutil
+
+import numpy as np
+
+ROW_FIELDS = ("chunk_id", "text")
+SPAN_FIELDS = ("start", "end")  # chunk char offsets into the page text
+PAGE_FIELDS = ("url", "title", "description")
+
+
+class StringColumn:
+    """
+    Append-only column of strings packed as one utf-8 blob + int64 offsets.
+
+    A saved column is memory-mapped on load; strings appended afterwards
+    live in a small in-memory tail until the next save.
+    """
+    def __init__(self, blob=None, offsets=None):
+        self._blob = blob if blob is not None else np.zeros(0, dtype=np.uint8)
+        self._off = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self._tail = []
+
+    @property
+    def _base_n(self):
+        return len(self._off) - 1
+
+    def __len__(self):
+        return self._base_n + len(self._tail)
+
+    def __getitem__(self, i: int) -> str:
+        if i >= self._base_n:
+            return self._tail[i - self._base_n]
+        return self._blob[self._off[i]:self._off[i + 1]].tobytes().decode("utf-8")
+
+    def append(self, s: str):
+        self._tail.append(s or "")
+
+    def save(self, prefix: str):
+        encoded = [s.encode("utf-8") for s in self._tail]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.concatenate([self._off, self._off[-1] + np.cumsum(lengths)])
+        with open(prefix + ".bin", "wb") as f:
+            f.write(memoryview(self._blob))
+            for b in encoded:
+                f.write(b)
+        np.save(prefix + ".off.npy", offsets)
+
+    @classmethod
+    def load(cls, prefix: str):
+        offsets = np.load(prefix + ".off.npy", mmap_mode="r")
+        if offsets[-1] > 0:
+            blob = np.memmap(prefix + ".bin", dtype=np.uint8, mode="r")
+        else:
+            blob = np.zeros(0, dtype=np.uint8)
+        return cls(blob, offsets)
+
+
+class IntColumn:
+    """
+    Append-only int32 column: a saved (memory-mapped) array plus an
+    in-memory tail, like StringColumn. -1 marks a missing value.
+    """
+    def __init__(self, values=None):
+        self._base = values if values is not None else np.zeros(0, dtype=np.int32)
+        self._tail = []
+
+    def __len__(self):
+        return len(self._base) + len(self._tail)
+
+    def __getitem__(self, i: int) -> int:
+        base = len(self._base)
+        return int(self._base[i]) if i < base else self._tail[i - base]
+
+    def append(self, v):
+        self._tail.append(-1 if v is None else int(v))
+
+    def save(self, prefix: str):
+        np.save(prefix + ".npy", np.concatenate([self._base, np.asarray(self._tail, dtype=np.int32)]))
+
+    @classmethod
+    def load(cls, prefix: str, n: int):
+        if not os.path.exists(prefix + ".npy"):  # saved before this column existed
+            return cls(np.full(n, -1, dtype=np.int32))
+        return cls(np.load(prefix + ".npy", mmap_mode="r"))
+
+
+class MetaStore:
+    """
+    Columnar chunk metadata, aligned with FAISS row ids.
+
+    Per row: chunk_id, text (packed string columns), start / end (int32
+    char offsets of the chunk in its page text, omitted from get() when
+    unknown), page (int32 into the page table) and an alive flag (False
+    once removed). url / title /
+    description are interned once per page instead of per chunk.
+
+    Saved as a directory of flat files that load() memory-maps, so a cold
+    start only touches the pages of the rows actually decoded by get().
+    """
+    def __init__(self):
+        self.rows = {f: StringColumn() for f in ROW_FIELDS}
+        self.spans = {f: IntColumn() for f in SPAN_FIELDS}
+        self.pages = {f: StringColumn() for f in PAGE_FIELDS}
+        self._page_of = np.zeros(0, dtype=np.int32)
+        self._page_tail = []
+        self._alive = bytearray()  # 1 per live row; grows amortised O(1)
+        self._n_alive = 0
+        self._page_ids = None  # (url, title, description) -> page id, built lazily
+        self._cid_rows = None  # chunk_id -> [rows], built lazily
+        self._url_rows = None  # url -> {live rows}, built lazily
+        self._bitmap = None  # packed _alive for FAISS id selectors, built lazily
+
+    def __len__(self):
+        """Number of live rows."""
+        return self._n_alive
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.rows["text"])
+
+    def _page_index(self):
+        if self._page_ids is None:
+            self._page_ids = {
+                tuple(self.pages[f][p] for f in PAGE_FIELDS): p
+                for p in range(len(self.pages["url"]))
+            }
+        return self._page_ids
+
+    def _chunk_index(self):
+        if self._cid_rows is None:
+            self._cid_rows = {}
+            for i in self.live_rows():
+                self._cid_rows.setdefault(self.rows["chunk_id"][i], []).append(int(i))
+        return self._cid_rows
+
+    def _url_index(self):
+        if self._url_rows is None:
+            self._url_rows = {}
+            urls = self.pages["url"]
+            for i in self.live_rows():
+                self._url_rows.setdefault(urls[self._page(int(i))], set()).add(int(i))
+        return self._url_rows
+
+    def _page(self, i: int) -> int:
+        base = len(self._page_of)
+        return int(self._page_of[i]) if i < base else self._page_tail[i - base]
+
+    # ---------- mutation ----------
+    def append(self, metas: list[dict]):
+        pages = self._page_index()
+        start = self.n_rows
+        for j, m in enumerate(metas):
+            key = tuple(m.get(f) or "" for f in PAGE_FIELDS)
+            p = pages.get(key)
+            if p is None:
+                p = pages[key] = len(self.pages["url"])
+                for f, v in zip(PAGE_FIELDS, key):
+                    self.pages[f].append(v)
+            self._page_tail.append(p)
+            for f in ROW_FIELDS:
+                self.rows[f].append(str(m.get(f, "")))
+            for f in SPAN_FIELDS:
+                self.spans[f].append(m.get(f))
+            if self._cid_rows is not None:
+                self._cid_rows.setdefault(str(m.get("chunk_id", "")), []).append(start + j)
+            if self._url_rows is not None:
+                self._url_rows.setdefault(key[0], set()).add(start + j)
+        self._alive.extend(b"\x01" * len(metas))
+        self._n_alive += len(metas)
+        self._bitmap = None
+
+    def remove(self, chunk_ids) -> list[int]:
+        """Mark rows with these chunk_ids dead; returns the rows removed."""
+        index = self._chunk_index()
+        dead = []
+        for cid in chunk_ids:
+            dead += index.pop(str(cid), [])
+        self._kill(dead)
+        return dead
+
+    def remove_rows(self, rows):
+        """Mark these rows dead (already dead ones are skipped)."""
+        dead = [int(i) for i in rows if self.is_alive(int(i))]
+        if self._cid_rows is not None:
+            for i in dead:
+                cid = self.rows["chunk_id"][i]
+                self._cid_rows[cid].remove(i)
+                if not self._cid_rows[cid]:
+                    del self._cid_rows[cid]
+        self._kill(dead)
+
+    def _kill(self, dead):
+        for i in dead:
+            self._alive[i] = 0
+            if self._url_rows is not None:
+                rows = self._url_rows.get(self.pages["url"][self._page(i)])
+                if rows is not None:
+                    rows.discard(i)
+        self._n_alive -= len(dead)
+        self._bitmap = None
+
+    def compacted(self, rows=None) -> "MetaStore":
+        """
+        New in-memory store holding only `rows` (default: the live rows),
+        renumbered 0..n-1 in that order (pages no longer referenced are
+        dropped).
+        """
+        store = MetaStore()
+        store.append([self.decode(int(i)) for i in (self.live_rows() if rows is None else rows)])
+        return store
+
+    # ---------- reads ----------
+    def is_alive(self, i: int) -> bool:
+        return 0 <= i < len(self._alive) and bool(self._alive[i])
+
+    def get(self, i: int):
+        """Decode one row into a meta dict, or None if removed / unknown."""
+        if not self.is_alive(i):
+            return None
+        return self.decode(i)
+
+    def decode(self, i: int) -> dict:
+        """Meta dict of row i, live or not."""
+        p = self._page(i)
+        meta = {f: self.pages[f][p] for f in PAGE_FIELDS}
+        for f in ROW_FIELDS:
+            meta[f] = self.rows[f][i]
+        for f in SPAN_FIELDS:
+            v = self.spans[f][i]
+            if v >= 0:
+                meta[f] = v
+        return meta
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(np.frombuffer(self._alive, dtype=np.uint8))
+
+    def alive_bitmap(self) -> np.ndarray:
+        """Live rows as a little-endian bitmap (faiss.IDSelectorBitmap layout)."""
+        bitmap = self._bitmap
+        if bitmap is None:
+            bitmap = self._bitmap = np.packbits(np.frombuffer(self._alive, dtype=np.uint8), bitorder="little")
+        return bitmap
+
+    def rows_for_url(self, url: str) -> list[int]:
+        """Live rows whose page url is `url`, in row order."""
+        return sorted(self._url_index().get(url, ()))
+
+    def chunk_ids_for_url(self, url: str) -> list[str]:
+        return [self.rows["chunk_id"][i] for i in self.rows_for_url(url)]
+
+    def metas(self) -> list[dict]:
+        """All live metas in row order (decodes everything)."""
+        return [self.get(int(i)) for i in self.live_rows()]
+
+    # ---------- persistence ----------
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for f, col in self.rows.items():
+            col.save(os.path.join(tmp, f))
+        for f, col in self.spans.items():
+            col.save(os.path.join(tmp, f))
+        for f, col in self.pages.items():
+            col.save(os.path.join(tmp, "page_" + f))
+        page_of = np.concatenate([self._page_of, np.asarray(self._page_tail, dtype=np.int32)])
+        np.save(os.path.join(tmp, "page_of.npy"), page_of)
+        np.save(os.path.join(tmp, "alive.npy"), np.frombuffer(self._alive, dtype=np.uint8).astype(bool))
+        # swap the new directory in; open memmaps keep reading the old files
+        old = path + ".old"
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str):
+        store = cls()
+        store.rows = {f: StringColumn.load(os.path.join(path, f)) for f in ROW_FIELDS}
+        n = len(store.rows["text"])
+        store.spans = {f: IntColumn.load(os.path.join(path, f), n) for f in SPAN_FIELDS}
+        store.pages = {f: StringColumn.load(os.path.join(path, "page_" + f)) for f in PAGE_FIELDS}
+        store._page_of = np.load(os.path.join(path, "page_of.npy"), mmap_mode="r")
+        alive = np.load(os.path.join(path, "alive.npy"))
+        store._alive = bytearray(alive.astype(np.uint8).tobytes())
+        store._n_alive = int(alive.sum())
+        return store
+
+    @classmethod
+    def from_json(cls, path: str, n_rows: int):
+        """Convert a legacy `{row_id: meta}` JSON sidecar."""
+        with open(path, "r", encoding="utf-8") as f:
+            id_to_meta = {int(k): v for k, v in json.load(f).items()}
+        store = cls()
+        blank = {"chunk_id": ""}
+        store.append([id_to_meta.get(i, blank) for i in range(n_rows)])
+        for i in range(n_rows):
+            if i not in id_to_meta:
+                store._alive[i] = 0
+                store._n_alive -= 1
+        return store
@@ -0,0 +1,165 @@
+# backend/metrics.py
+"""
+Process-wide pipeline instrumentation.
+
+  - stage timers: `with stage("embed"):` or `@timed("embed")` record a
+    latency histogram per stage, plus the RSS high-water mark seen when
+    the stage ended;
+  - counters: `count("pages")`, `count("tokens", n)`, ...;
+  - output: snapshot() (a dict, for JSON reports), prometheus() (text
+    exposition format, served at /metrics by the API) and, with
+    METRICS_LOG=1, one JSON log line per finished stage.
+
+Work done in worker processes (parse_workers, EMBED_WORKERS) is timed
+from the calling side only.
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+METRICS_LOG = os.getenv("METRICS_LOG", "0") == "1"
+
+# histogram bucket upper bounds, seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int | None:
+    """Current resident set size (Linux), else None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+    return max(peak, rss_bytes() or 0)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.stages = {}  # name -> {"count", "sum", "max", "buckets", "rss_peak"}
+
+    def count(self, name: str, n: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, seconds: float):
+        rss = rss_bytes()
+        with self._lock:
+            s = self.stages.get(name)
+            if s is None:
+                s = self.stages[name] = {
+                    "count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(BUCKETS), "rss_peak": 0,
+                }
+            s["count"] += 1
+            s["sum"] += seconds
+            s["max"] = max(s["max"], seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    s["buckets"][i] += 1
+                    break
+            if rss is not None:
+                s["rss_peak"] = max(s["rss_peak"], rss)
+        if METRICS_LOG:
+            event = {"event": "stage", "stage": name, "ms": round(seconds * 1000, 3), "rss": rss}
+            logger.info(json.dumps(event))
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def timed(self, name: str):
+        """Decorator: time every call of the function as stage `name`."""
+        def wrap(fn):
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - t0)
+            return inner
+        return wrap
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = {
+                name: {
+                    "count": s["count"],
+                    "total_s": s["sum"],
+                    "mean_ms": s["sum"] / s["count"] * 1000 if s["count"] else 0.0,
+                    "max_ms": s["max"] * 1000,
+                    "rss_peak_mb": s["rss_peak"] / 2**20,
+                }
+                for name, s in self.stages.items()
+            }
+            counters = dict(self.counters)
+        peak = peak_rss_bytes()
+        rss = rss_bytes()
+        return {
+            "stages": stages,
+            "counters": counters,
+            "rss_mb": rss / 2**20 if rss is not None else None,
+            "rss_peak_mb": peak / 2**20 if peak is not None else None,
+        }
+
+    def prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE rag_{name}_total counter")
+                lines.append(f"rag_{name}_total {value}")
+            lines.append("# TYPE rag_stage_seconds histogram")
+            for name, s in sorted(self.stages.items()):
+                cum = 0
+                for bound, n in zip(BUCKETS, s["buckets"]):
+                    cum += n
+                    lines.append(f'rag_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cum}')
+                lines.append(f'rag_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {s["count"]}')
+                lines.append(f'rag_stage_seconds_sum{{stage="{name}"}} {s["sum"]}')
+                lines.append(f'rag_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+            lines.append("# TYPE rag_stage_rss_peak_bytes gauge")
+            for name, s in sorted(self.stages.items()):
+                lines.append(f'rag_stage_rss_peak_bytes{{stage="{name}"}} {s["rss_peak"]}')
+        rss, peak = rss_bytes(), peak_rss_bytes()
+        if rss is not None:
+            lines += ["# TYPE rag_rss_bytes gauge", f"rag_rss_bytes {rss}"]
+        if peak is not None:
+            lines += ["# TYPE rag_rss_peak_bytes gauge", f"rag_rss_peak_bytes {peak}"]
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+count = METRICS.count
+stage = METRICS.stage
+timed = METRICS.timed
@@ -0,0 +1,185 @@
+# backend/openai_embed.py
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    import openai
+except Exception:  # optional; OpenAIEmbedder is only built when a client exists
+    openai = None
+
+logger = logging.getLogger(__name__)
+
+# API limits for /v1/embeddings
+MAX_ITEMS = 2048            # inputs per request
+MAX_REQUEST_TOKENS = 300_000
+MAX_INPUT_TOKENS = 8191
+
+CHARS_PER_TOKEN = 3  # conservative estimate when tiktoken is missing
+
+_ENCODING = None
+
+
+def _encoding():
+    global _ENCODING
+    if _ENCODING is None:
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _ENCODING = False
+    return _ENCODING
+
+
+def fit_input(text: str):
+    """(text truncated to MAX_INPUT_TOKENS, its token count)."""
+    text = text or " "  # the API rejects empty strings
+    enc = _encoding()
+    if enc:
+        ids = enc.encode(text, disallowed_special=())
+        if len(ids) > MAX_INPUT_TOKENS:
+            return enc.decode(ids[:MAX_INPUT_TOKENS]), MAX_INPUT_TOKENS
+        return text, len(ids)
+    text = text[:MAX_INPUT_TOKENS * CHARS_PER_TOKEN]
+    return text, len(text) // CHARS_PER_TOKEN + 1
+
+
+class RateLimiter:
+    """
+    Thread-safe requests-per-minute + tokens-per-minute token buckets.
+    pause() stops every caller for a while (after a 429).
+    """
+    def __init__(self, rpm: float, tpm: float):
+        self.rpm, self.tpm = rpm, tpm
+        self._req, self._tok = rpm, tpm
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: int):
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed, self._last = now - self._last, now
+                self._req = min(self.rpm, self._req + elapsed * self.rpm / 60)
+                self._tok = min(self.tpm, self._tok + elapsed * self.tpm / 60)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._req >= 1 and self._tok >= tokens:
+                        self._req -= 1
+                        self._tok -= tokens
+                        return
+                    wait = max(
+                        (1 - self._req) * 60 / self.rpm,
+                        (tokens - self._tok) * 60 / self.tpm,
+                    )
+            time.sleep(max(wait, 0.01))
+
+
+def _retry_after(err) -> float | None:
+    response = getattr(err, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class OpenAIEmbedder:
+    """
+    Batched, concurrent client for the OpenAI embeddings endpoint.
+
+    Inputs are truncated to the per-input token limit and packed into
+    requests of at most max_items inputs / max_tokens tokens. Requests run
+    on `concurrency` threads under a shared RPM/TPM RateLimiter; 429s,
+    timeouts, connection errors and 5xx are retried with exponential
+    backoff and jitter (honouring Retry-After). `dimensions` asks the API
+    for Matryoshka-truncated vectors (text-embedding-3-* only).
+
+    Point OPENAI_BASE_URL at a mock server to test without the API.
+    """
+    def __init__(
+        self,
+        client,
+        model: str,
+        dimensions: int | None = None,
+        concurrency: int = 4,
+        rpm: float = 3_000,
+        tpm: float = 1_000_000,
+        max_items: int = MAX_ITEMS,
+        max_tokens: int = MAX_REQUEST_TOKENS,
+        max_retries: int = 6,
+        backoff: float = 0.5,
+    ):
+        # retries are ours; the SDK's own would bypass the rate limiter
+        self.client = client.with_options(max_retries=0)
+        self.model = model
+        self.dimensions = dimensions
+        self.concurrency = max(int(concurrency), 1)
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def pack(self, texts):
+        """[(inputs, n_tokens)] requests covering texts in order."""
+        requests = []
+        inputs, n_tok = [], 0
+        for text in texts:
+            text, t = fit_input(text)
+            if inputs and (len(inputs) >= self.max_items or n_tok + t > self.max_tokens):
+                requests.append((inputs, n_tok))
+                inputs, n_tok = [], 0
+            inputs.append(text)
+            n_tok += t
+        if inputs:
+            requests.append((inputs, n_tok))
+        return requests
+
+    def _request(self, inputs, n_tokens):
+        kwargs = {"input": inputs, "model": self.model}
+        if self.dimensions:
+            kwargs["dimensions"] = self.dimensions
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(n_tokens)
+            try:
+                res = self.client.embeddings.create(**kwargs)
+            except (
+                openai.RateLimitError,
+                openai.APITimeoutError,
+                openai.APIConnectionError,
+                openai.InternalServerError,
+            ) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2 ** attempt * (0.5 + random.random())
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if isinstance(e, openai.RateLimitError):
+                    self.limiter.pause(delay)
+                logger.warning("Embedding request failed (%s); retry %d in %.1fs", e, attempt + 1, delay)
+                time.sleep(delay)
+                continue
+            data = sorted(res.data, key=lambda d: d.index)
+            return np.asarray([d.embedding for d in data], dtype="float32")
+
+    def embed(self, texts) -> np.ndarray:
+        texts = list(texts)
+        requests = self.pack(texts)
+        if not requests:
+            return np.zeros((0, self.dimensions or 0), dtype="float32")
+        with ThreadPoolExecutor(min(self.concurrency, len(requests))) as ex:
+            parts = list(ex.map(lambda r: self._request(*r), requests))
+        return np.vstack(parts)
@@ -1,22 +1,170 @@
 # backend/rag.py
+import logging
+import os
+import re
+
 from backend.embedder import get_openai_client
+from backend.metrics import count
 
-def build_prompt(query: str, retrieved_chunks: list[dict], conversation_history=None) -> str:
+logger = logging.getLogger(__name__)
+
+# token budgets for build_prompt
+CONTEXT_TOKENS = int(os.getenv("CONTEXT_TOKENS", "3000"))
+HISTORY_TOKENS = int(os.getenv("HISTORY_TOKENS", "400"))
+MIN_TRIM_TOKENS = 64  # a chunk cut shorter than this is not worth sending
+
+CHARS_PER_TOKEN = 4  # estimate when tiktoken is missing
+
+_ENCODING = None
+
+
+def _encoding():
+    global _ENCODING
+    if _ENCODING is None:
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("o200k_base")  # gpt-4o family
+        except Exception as e:
+            logger.warning(
+                "tiktoken unavailable (%s); estimating prompt tokens as chars/%d", e, CHARS_PER_TOKEN
+            )
+            _ENCODING = False
+    return _ENCODING
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc:
+        return len(enc.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_tokens(text: str, n: int) -> str:
+    enc = _encoding()
+    if enc:
+        ids = enc.encode(text, disallowed_special=())
+        return text if len(ids) <= n else enc.decode(ids[:n])
+    return text[:n * CHARS_PER_TOKEN]
+
+
+def _overlap(a: str, b: str, probe: int = 40) -> int:
+    """Length of the longest suffix of a that is a prefix of b (at least `probe` chars)."""
+    if len(b) < probe:
+        return 0
+    pos = a.find(b[:probe])
+    while pos != -1:
+        if b.startswith(a[pos:]):
+            return len(a) - pos
+        pos = a.find(b[:probe], pos + 1)
+    return 0
+
+
+def _new_text(text: str, kept: list[str]) -> str:
     """
-    retrieved_chunks: list of {"meta": {...}, "score": float}
+    text minus what the already-kept chunks of the same page cover:
+    "" if it is contained in one, else with the overlapping head / tail
+    (the chunker's overlap window) cut off.
     """
-    history_text = ""
-    if conversation_history:
-        for turn in conversation_history[-6:]:
-            history_text += f"{turn['role'].upper()}: {turn['text']}\n"
+    for other in kept:
+        if text in other:
+            return ""
+        head = _overlap(other, text)
+        if head:
+            text = text[head:]
+        tail = _overlap(text, other)
+        if tail:
+            text = text[:-tail]
+    return text.strip()
 
-    context_blocks = []
-    for i, item in enumerate(retrieved_chunks):
+
+def pack_context(retrieved_chunks: list[dict], budget: int = CONTEXT_TOKENS):
+    """
+    Greedily fill `budget` tokens with the highest-scoring chunks.
+
+    Chunks are taken in score order; text already covered by a chunk of
+    the same page that was kept is dropped, and the first chunk that does
+    not fit is cut to the remaining budget (if that leaves at least
+    MIN_TRIM_TOKENS). Returns (blocks, stats) where blocks are
+    {"meta", "score", "text"} in score order and stats counts
+    "context_tokens", "dropped" (duplicate or over budget) and "trimmed".
+    """
+    blocks, kept = [], {}
+    used = dropped = trimmed = 0
+    for item in sorted(retrieved_chunks, key=lambda x: x["score"], reverse=True):
         meta = item["meta"]
+        url = meta.get("url") or ""
+        text = _new_text(meta.get("text") or "", kept.get(url, []))
+        if not text:
+            dropped += 1
+            continue
+        header = f"[{len(blocks)}] {meta.get('title') or '(no title)'} ({url})\n"
+        n = count_tokens(header + text)
+        if used + n > budget:
+            room = budget - used - count_tokens(header)
+            if room < MIN_TRIM_TOKENS:
+                dropped += 1
+                continue
+            text = truncate_tokens(text, room)
+            n = count_tokens(header + text)
+            trimmed += 1
+        kept.setdefault(url, []).append(meta.get("text") or "")
+        blocks.append({"meta": meta, "score": item["score"], "text": text})
+        used += n
+    return blocks, {"context_tokens": used, "dropped": dropped, "trimmed": trimmed}
+
+
+def _gist(text: str, words: int = 25) -> str:
+    first = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0].split()
+    return " ".join(first[:words]) + (" ..." if len(first) > words else "")
+
+
+def pack_history(conversation_history, budget: int = HISTORY_TOKENS) -> str:
+    """
+    Recent turns verbatim, newest first, while they fit in `budget`;
+    older turns are summarised to the gist of each (first sentence) in
+    whatever room is left.
+    """
+    if not conversation_history:
+        return ""
+    lines, used = [], 0
+    turns = list(conversation_history)
+    while turns:
+        line = f"{turns[-1]['role'].upper()}: {turns[-1]['text']}\n"
+        n = count_tokens(line)
+        if used + n > budget:
+            break
+        lines.insert(0, line)
+        used += n
+        turns.pop()
+    if turns:
+        gist = "; ".join(f"{t['role']}: {_gist(t['text'])}" for t in turns)
+        summary = truncate_tokens(f"(earlier: {gist})\n", max(budget - used, 0))
+        if summary.strip():
+            lines.insert(0, summary if summary.endswith("\n") else summary + "\n")
+    return "".join(lines)
+
+
+def pack_prompt(
+    query: str,
+    retrieved_chunks: list[dict],
+    conversation_history=None,
+    context_tokens: int = CONTEXT_TOKENS,
+    history_tokens: int = HISTORY_TOKENS,
+):
+    """
+    (prompt, blocks, stats): build_prompt plus the packed blocks (see
+    pack_context; citation [i] is blocks[i]) and stats, with
+    "prompt_tokens" for the whole prompt.
+    """
+    blocks, stats = pack_context(retrieved_chunks, context_tokens)
+    history_text = pack_history(conversation_history, history_tokens)
+
+    context_blocks = []
+    for i, block in enumerate(blocks):
+        meta = block["meta"]
         title = meta.get("title") or "(no title)"
         url = meta.get("url") or ""
-        text = meta.get("text") or ""
-        context_blocks.append(f"[{i}] {title} ({url})\n{text}")
+        context_blocks.append(f"[{i}] {title} ({url})\n{block['text']}")
 
     context = "\n\n---\n\n".join(context_blocks)
 
@@ -46,7 +194,21 @@ QUESTION:
 
 Answer concisely, but with enough detail to be useful. When you use information from a block, cite it like [0], [1], etc.
 """
-    return prompt.strip()
+    prompt = prompt.strip()
+    stats["prompt_tokens"] = count_tokens(prompt)
+    count("prompt_tokens", stats["prompt_tokens"])
+    stats["chunks"] = len(blocks)
+    return prompt, blocks, stats
+
+
+def build_prompt(query: str, retrieved_chunks: list[dict], conversation_history=None) -> str:
+    """
+    retrieved_chunks: list of {"meta": {...}, "score": float}
+
+    Context and history are packed into CONTEXT_TOKENS / HISTORY_TOKENS
+    (see pack_prompt).
+    """
+    return pack_prompt(query, retrieved_chunks, conversation_history)[0]
 
 
 def generate_answer_with_openai(prompt: str, model: str = "gpt-4o-mini") -> str:
@@ -58,3 +220,24 @@ def generate_answer_with_openai(prompt: str, model: str = "gpt-4o-mini") -> str:
         messages=[{"role": "user", "content": prompt}],
     )
     return resp.choices[0].message.content
+
+
+def stream_answer_with_openai(prompt: str, model: str = "gpt-4o-mini"):
+    """Like generate_answer_with_openai, but yields the answer text as it is generated."""
+    client = get_openai_client()
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY not set or openai client unavailable.")
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def excerpt_answer(retrieved_chunks: list[dict]) -> str:
+    """Answer shown without an LLM: the top excerpts."""
+    joined = "\n\n".join(item["meta"]["text"][:400] for item in retrieved_chunks)
+    return "Here are the most relevant excerpts from the site:\n\n" + joined
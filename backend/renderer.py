@@ -0,0 +1,214 @@
+# backend/renderer.py
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from backend.extractor import extract_page
+
+logger = logging.getLogger(__name__)
+
+MIN_TEXT_LEN = 200  # extracted text below this = likely rendered client-side
+
+RENDER_POOL_SIZE = int(os.getenv("RENDER_POOL_SIZE", "2"))
+
+# after Chrome fails to start, wait this long (s) before trying again
+RENDER_RETRY_S = float(os.getenv("RENDER_RETRY_S", "60"))
+
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m4v", "*.mp3", "*.ogg", "*.wav",
+]
+
+# Installed before any page script runs: counts in-flight fetch/XHR
+# requests and records the time of the last request or DOM mutation.
+_INSTRUMENT_JS = """
+(() => {
+  const s = window.__render = {pending: 0, last: Date.now()};
+  const touch = () => { s.last = Date.now(); };
+  const fetch0 = window.fetch;
+  if (fetch0) {
+    window.fetch = function () {
+      s.pending++; touch();
+      return fetch0.apply(this, arguments).finally(() => { s.pending--; touch(); });
+    };
+  }
+  const send0 = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    s.pending++; touch();
+    this.addEventListener('loadend', () => { s.pending--; touch(); });
+    return send0.apply(this, arguments);
+  };
+  new MutationObserver(touch).observe(document, {subtree: true, childList: true, characterData: true});
+})();
+"""
+
+_PROBE_JS = """
+const s = window.__render || {pending: 0, last: 0};
+return [document.readyState, s.pending, Date.now() - s.last,
+        document.body ? document.body.scrollHeight : 0];
+"""
+
+
+def needs_render(html: str) -> bool:
+    """True if the static HTML has too little text to be the real page."""
+    return len(extract_page(html or "", "").get("text", "")) < MIN_TEXT_LEN
+
+
+class RenderPool:
+    """
+    Pool of warm headless Chrome instances shared across URLs.
+
+    Browsers are started lazily (up to `size`) and reused; render() waits
+    for network idle (no fetch/XHR in flight) and a quiet DOM instead of
+    fixed sleeps, scrolling while the page keeps growing. Images, fonts
+    and media are blocked. A browser that errors is replaced.
+
+    If Chrome cannot be started, render() raises RuntimeError straight
+    away (or keeps to the browsers already running) for `retry_after`
+    seconds, then tries to start one again.
+    """
+    def __init__(
+        self,
+        size: int = RENDER_POOL_SIZE,
+        idle_ms: int = 500,
+        timeout: float = 15.0,
+        max_scrolls: int = 6,
+        retry_after: float = RENDER_RETRY_S,
+    ):
+        self.size = max(int(size), 1)
+        self.idle_ms = idle_ms
+        self.timeout = timeout
+        self.max_scrolls = max_scrolls
+        self.retry_after = retry_after
+        self.unavailable = None  # last start-up error, until a browser starts
+        self._failed_at = 0.0
+        self._idle = queue.Queue()
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def _make_driver(self):
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.page_load_strategy = "eager"  # don't wait for blocked subresources
+        # CHROMEDRIVER overrides the driver binary; otherwise Selenium Manager resolves it once
+        driver = webdriver.Chrome(service=Service(os.getenv("CHROMEDRIVER")), options=options)
+        driver.set_page_load_timeout(self.timeout)
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _INSTRUMENT_JS})
+        return driver
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                cooling = (
+                    self.unavailable is not None
+                    and time.monotonic() - self._failed_at < self.retry_after
+                )
+                if cooling and not self._drivers:
+                    raise RuntimeError(f"headless browser unavailable: {self.unavailable}")
+                if not cooling and len(self._drivers) < self.size:
+                    try:
+                        driver = self._make_driver()
+                    except Exception as e:
+                        self.unavailable, self._failed_at = e, time.monotonic()
+                        if not self._drivers:
+                            raise RuntimeError(f"headless browser unavailable: {e}") from e
+                        logger.warning("Could not start another browser, using %d: %s", len(self._drivers), e)
+                    else:
+                        self.unavailable = None
+                        self._drivers.append(driver)
+                        return driver
+            # all busy; re-check periodically in case one was discarded
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _wait_stable(self, driver, deadline):
+        """Poll until the document is loaded, no requests are pending and the DOM is quiet."""
+        height = 0
+        while time.monotonic() < deadline:
+            state, pending, quiet_ms, height = driver.execute_script(_PROBE_JS)
+            if state == "complete" and pending == 0 and quiet_ms >= self.idle_ms:
+                break
+            time.sleep(0.05)
+        return height
+
+    def render(self, url: str) -> str:
+        """Rendered HTML of `url` (document after scripts have settled)."""
+        driver = self._acquire()
+        try:
+            deadline = time.monotonic() + self.timeout
+            driver.get(url)
+            height = self._wait_stable(driver, deadline)
+            # lazy-loaded content: scroll while the page keeps growing
+            for _ in range(self.max_scrolls):
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                new_height = self._wait_stable(driver, deadline)
+                if new_height <= height:
+                    break
+                height = new_height
+            html = driver.page_source
+        except Exception:
+            logger.warning("Render failed for %s; replacing browser", url)
+            self._discard(driver)
+            raise
+        # leave the page so its timers and requests stop
+        try:
+            driver.get("about:blank")
+        except Exception:
+            self._discard(driver)
+            return html
+        self._idle.put(driver)
+        return html
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self._idle = queue.Queue()
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_render_pool() -> RenderPool:
+    """Process-wide RenderPool, closed at interpreter exit."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = RenderPool()
+            atexit.register(_POOL.close)
+    return _POOL
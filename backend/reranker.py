@@ -0,0 +1,148 @@
+# backend/reranker.py
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from backend.embed_engine import BACKENDS
+from backend.metrics import timed
+
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BACKEND = os.getenv("RERANK_BACKEND", "torch")
+RERANK_POOL = int(os.getenv("RERANK_POOL", "30"))  # first-stage candidates to rerank
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+RERANK_ONNX_FILE = os.getenv("RERANK_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+
+
+def load_cross_encoder(name: str, backend: str = "torch", max_length: int = 256):
+    """CrossEncoder for `backend` ("torch", "int8" or "onnx", as in embed_engine.load_model)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    from sentence_transformers import CrossEncoder
+
+    if backend == "onnx":
+        return CrossEncoder(
+            name, device="cpu", max_length=max_length,
+            backend="onnx", model_kwargs={"file_name": RERANK_ONNX_FILE},
+        )
+    model = CrossEncoder(name, device="cpu", max_length=max_length)
+    if backend == "int8":
+        import torch
+
+        torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+class CrossEncoderReranker:
+    """
+    Second-stage reranker: scores (query, chunk text) pairs with a small
+    cross-encoder on CPU, in batches taken in first-stage order.
+
+    budget_ms bounds the time spent per query (0 = no limit): before each
+    batch the cost of the next one is estimated from the batches so far,
+    and scoring stops if it would overrun. Scored candidates come first,
+    by cross-encoder score; the rest keep their first-stage order, with
+    scores placed below the lowest cross-encoder score so the two scales
+    never mix.
+    """
+    def __init__(
+        self,
+        model: str = RERANK_MODEL,
+        backend: str = RERANK_BACKEND,
+        batch_size: int = 16,
+        max_length: int = 256,
+        budget_ms: float = RERANK_BUDGET_MS,
+    ):
+        self.name = model
+        self.backend = backend
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.model = load_cross_encoder(model, backend, max_length)
+
+    def score(self, query: str, texts) -> np.ndarray:
+        pairs = [(query, t) for t in texts]
+        return np.asarray(
+            self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False), dtype="float32"
+        )
+
+    @timed("rerank")
+    def rerank(
+        self,
+        query: str,
+        candidates: list[dict],
+        top_k: int = 5,
+        budget_ms: float | None = None,
+        timings: dict | None = None,
+    ):
+        """
+        candidates: first-stage results ({"meta", "score"}) best first.
+        Returns the top_k reranked, each with "first_score" and "reranked"
+        (whether the cross-encoder scored it). Scored candidates also
+        carry "rerank_score", which is their "score"; unscored ones get a
+        "score" below every scored one, decreasing in first-stage order.
+        timings, if given, receives rerank_ms and reranked (how many
+        candidates were scored).
+        """
+        budget = self.budget_ms if budget_ms is None else budget_ms
+        t0 = time.perf_counter()
+        scores = []
+        for start in range(0, len(candidates), self.batch_size):
+            elapsed = (time.perf_counter() - t0) * 1000
+            if scores and budget and elapsed + elapsed / len(scores) * self.batch_size > budget:
+                break
+            batch = candidates[start:start + self.batch_size]
+            scores.extend(self.score(query, [c["meta"].get("text") or "" for c in batch]).tolist())
+
+        n = len(scores)
+        scored = [
+            {**c, "first_score": c["score"], "rerank_score": s, "score": s, "reranked": True}
+            for c, s in zip(candidates[:n], scores)
+        ]
+        scored.sort(key=lambda c: c["rerank_score"], reverse=True)
+        floor = min(scores) if scores else None
+        rest = [
+            {
+                **c,
+                "first_score": c["score"],
+                "score": c["score"] if floor is None else floor - 1.0 - j,
+                "reranked": False,
+            }
+            for j, c in enumerate(candidates[n:])
+        ]
+        if timings is not None:
+            timings.update(rerank_ms=(time.perf_counter() - t0) * 1000, reranked=n)
+        return (scored + rest)[:top_k]
+
+
+def retrieve_reranked(
+    retriever,
+    reranker,
+    query: str,
+    qvec,
+    top_k: int = 5,
+    pool: int = RERANK_POOL,
+    budget_ms: float | None = None,
+    timings: dict | None = None,
+    **kwargs,
+):
+    """
+    retriever.retrieve() for `pool` candidates, reranked down to top_k.
+    timings, if given, receives the timings of both stages.
+    """
+    candidates = retriever.retrieve(query, qvec, top_k=max(pool, top_k), timings=timings, **kwargs)
+    return reranker.rerank(query, candidates, top_k=top_k, budget_ms=budget_ms, timings=timings)
+
+
+_RERANKER = None
+_RERANKER_LOCK = threading.Lock()
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """Process-wide reranker, loaded on first use."""
+    global _RERANKER
+    with _RERANKER_LOCK:
+        if _RERANKER is None:
+            _RERANKER = CrossEncoderReranker()
+        return _RERANKER
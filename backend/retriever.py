@@ -1,6 +1,15 @@
 # backend/retriever.py
-from rank_bm25 import BM25Okapi
-import numpy as np
+import os
+import threading
+import time
+
+from backend.bm25 import BM25Index, tokenize
+from backend.dedup import dedup_path, load_sources
+from backend.embedder import embed_queries
+from backend.fusion import FUSION_METHODS, fuse
+from backend.metrics import count, timed
+
+DEFAULT_DEPTH = 50
 
 
 class HybridRetriever:
@@ -9,52 +18,240 @@ class HybridRetriever:
     - faiss_store: FaissStore
     - texts: list[str] (aligned with metas)
     - metas: list[dict] (same index as texts)
+
+    Use from_store() / get_retriever() to reuse the BM25 statistics saved
+    next to the index instead of re-tokenizing the corpus; then BM25 doc i
+    is FAISS row rows[i] and metas are decoded from the store on demand.
+
+    fusion: how BM25 and dense scores are combined ("rrf", "minmax",
+    "zscore" or "weighted", see backend.fusion). depth: candidates taken
+    from each branch before fusion, independent of the final top_k.
+    sources: chunk_id -> URLs of every page using the chunk (the index's
+    Deduper file); each result meta gets them as "sources", defaulting to
+    its own url.
+
+    A retriever is shared by concurrent queries (see get_retriever), so it
+    keeps no per-query state: pass a dict as `timings` to get per-stage
+    timings of a call.
     """
-    def __init__(self, faiss_store, texts_for_bm25, metas):
+    def __init__(
+        self,
+        faiss_store,
+        texts_for_bm25=None,
+        metas=None,
+        bm25=None,
+        rows=None,
+        fusion: str = "rrf",
+        depth: int = DEFAULT_DEPTH,
+        sources: dict | None = None,
+    ):
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"fusion must be one of {FUSION_METHODS}")
         self.faiss = faiss_store
+        self.fusion = fusion
+        self.depth = depth
         self.texts = texts_for_bm25
         self.metas = metas
+        self.rows = rows
+        self.sources = sources or {}
+        self.version = getattr(faiss_store, "version", None)
 
-        tokenized = [t.split() for t in self.texts]
-        if len(tokenized) == 0:
+        if bm25 is not None:
+            self.bm25 = bm25
+        elif not self.texts:
             self.bm25 = None
         else:
-            self.bm25 = BM25Okapi(tokenized)
+            self.bm25 = BM25Index.build(self.texts)
 
-    def retrieve(self, query: str, qvec, top_k: int = 5, mix_weight: float = 0.5):
+    # ---------- persistence ----------
+    @staticmethod
+    def bm25_path(faiss_store):
+        return faiss_store.index_path + ".bm25" if faiss_store.index_path else None
+
+    def save(self):
+        """Persist BM25 postings alongside the FAISS index."""
+        path = self.bm25_path(self.faiss)
+        if not path or self.bm25 is None:
+            return
+        rows = self.rows if self.rows is not None else self.faiss.metadata.live_rows()
+        self.bm25.save(path, extra={"version": self.version}, arrays={"rows": rows})
+
+    @classmethod
+    def from_store(cls, faiss_store):
         """
-        Returns list of:
-          {"meta": {...}, "score": float}
+        Retriever over every live chunk in the store. Loads the saved BM25
+        statistics if they match the store version, else rebuilds them.
         """
-        candidates = {}
+        path = cls.bm25_path(faiss_store)
+        sources = load_sources(dedup_path(faiss_store.index_path)) if faiss_store.index_path else None
+        if path and os.path.isdir(path):
+            bm25, info = BM25Index.load(path)
+            if info.get("version") == faiss_store.version:
+                rows = BM25Index.load_array(path, "rows")
+                return cls(faiss_store, bm25=bm25, rows=rows, sources=sources)
+
+        rows = faiss_store.metadata.live_rows()
+        texts = [faiss_store.metadata.rows["text"][int(i)] for i in rows]
+        retriever = cls(faiss_store, texts, rows=rows, sources=sources)
+        retriever.save()
+        return retriever
+
+    def _meta(self, idx):
+        if self.metas is not None:
+            return self.metas[idx]
+        return self.faiss.metadata.get(int(self.rows[idx]))
+
+    def _fuse(self, query, bm25_hits, dense_results, top_k, mix_weight, fusion):
+        metas = {}
 
         # BM25 branch
-        if self.bm25 is not None and self.texts:
-            bm25_scores = self.bm25.get_scores(query.split())
-            bm25_idxs = np.argsort(bm25_scores)[::-1][:top_k]
-
-            for idx in bm25_idxs:
-                score = float(bm25_scores[idx])
-                meta = self.metas[idx]
-                key = meta["chunk_id"]
-                # small bonus if query appears in title
-                title = (meta.get("title") or "").lower()
-                if any(w.lower() in title for w in query.split()):
-                    score *= 1.2
-                prev = candidates.get(key, {"meta": meta, "score": 0.0})
-                prev["score"] += mix_weight * score
-                candidates[key] = prev
+        bm25_ranked = []
+        bm25_idxs, bm25_scores = bm25_hits
+        query_terms = tokenize(query)
+        for idx, score in zip(bm25_idxs, bm25_scores):
+            score = float(score)
+            meta = self._meta(idx)
+            if meta is None:
+                continue
+            key = meta["chunk_id"]
+            # small bonus if query appears in title
+            title = (meta.get("title") or "").lower()
+            if any(w in title for w in query_terms):
+                score *= 1.2
+            metas[key] = meta
+            bm25_ranked.append((key, score))
+        bm25_ranked.sort(key=lambda x: x[1], reverse=True)
 
         # Dense branch
-        dense_results = self.faiss.search(qvec, k=top_k)
+        dense_ranked = []
         for r in dense_results:
-            meta = r["meta"]
-            score = r["score"]
-            key = meta["chunk_id"]
-            prev = candidates.get(key, {"meta": meta, "score": 0.0})
-            prev["score"] += (1.0 - mix_weight) * score
-            candidates[key] = prev
+            key = r["meta"]["chunk_id"]
+            metas.setdefault(key, r["meta"])
+            dense_ranked.append((key, r["score"]))
+
+        fused = fuse([bm25_ranked, dense_ranked], [mix_weight, 1.0 - mix_weight], fusion)
 
         # Sort and slice
-        results = sorted(candidates.values(), key=lambda x: x["score"], reverse=True)
-        return results[:top_k]
+        ranked = sorted(fused.items(), key=lambda x: x[1], reverse=True)[:top_k]
+        return [{"meta": self._with_sources(metas[key]), "score": score} for key, score in ranked]
+
+    def _with_sources(self, meta):
+        # a copy: self.metas may be shared with other callers
+        return {**meta, "sources": self.sources.get(meta["chunk_id"]) or [meta.get("url", "")]}
+
+    @timed("retrieve")
+    def retrieve(
+        self,
+        query: str,
+        qvec,
+        top_k: int = 5,
+        mix_weight: float = 0.5,
+        fusion: str | None = None,
+        depth: int | None = None,
+        timings: dict | None = None,
+    ):
+        """
+        Returns list of:
+          {"meta": {...}, "score": float}
+
+        Each branch contributes its best `depth` candidates (default
+        self.depth, never less than top_k), fused with `fusion` (default
+        self.fusion; see backend.fusion). timings, if given, receives
+        bm25_ms / dense_ms / fuse_ms.
+        """
+        depth = max(depth or self.depth, top_k)
+        count("queries")
+        t0 = time.perf_counter()
+        bm25_hits = self.bm25.top_k(query, depth) if self.bm25 is not None else ([], [])
+        t1 = time.perf_counter()
+        dense_results = self.faiss.search(qvec, k=depth)
+        t2 = time.perf_counter()
+        results = self._fuse(query, bm25_hits, dense_results, top_k, mix_weight, fusion or self.fusion)
+        if timings is not None:
+            timings.update(
+                bm25_ms=(t1 - t0) * 1000,
+                dense_ms=(t2 - t1) * 1000,
+                fuse_ms=(time.perf_counter() - t2) * 1000,
+            )
+        return results
+
+    @timed("retrieve_batch")
+    def retrieve_batch(
+        self,
+        queries: list[str],
+        qvecs=None,
+        top_k: int = 5,
+        mix_weight: float = 0.5,
+        fusion: str | None = None,
+        depth: int | None = None,
+        timings: dict | None = None,
+    ):
+        """
+        retrieve() for many queries: one embed_queries call (if qvecs is not
+        given), one FAISS search over the query matrix, one batched BM25
+        pass, then per-query fusion. Returns one result list per query;
+        timings, if given, receives the stage totals for the batch.
+        """
+        if not queries:
+            return []
+        depth = max(depth or self.depth, top_k)
+        fusion = fusion or self.fusion
+        count("queries", len(queries))
+        t0 = time.perf_counter()
+        if qvecs is None:
+            qvecs = embed_queries(list(queries), provider="local")
+        t1 = time.perf_counter()
+        if self.bm25 is not None:
+            bm25_hits = self.bm25.top_k_batch(queries, depth)
+        else:
+            bm25_hits = [([], []) for _ in queries]
+        t2 = time.perf_counter()
+        dense = self.faiss.search_batch(qvecs, k=depth)
+        t3 = time.perf_counter()
+        results = [
+            self._fuse(q, b, d, top_k, mix_weight, fusion)
+            for q, b, d in zip(queries, bm25_hits, dense)
+        ]
+        if timings is not None:
+            timings.update(
+                embed_ms=(t1 - t0) * 1000,
+                bm25_ms=(t2 - t1) * 1000,
+                dense_ms=(t3 - t2) * 1000,
+                fuse_ms=(time.perf_counter() - t3) * 1000,
+            )
+        return results
+
+
+###########################################
+# Process-wide retriever cache
+###########################################
+_RETRIEVERS = {}
+_RETRIEVERS_LOCK = threading.Lock()
+
+
+def get_retriever(faiss_store) -> HybridRetriever:
+    """
+    Cached HybridRetriever for this index, keyed by (index path, version),
+    so queries never rebuild BM25. Stale versions of the same index are
+    dropped when a new one is built.
+    """
+    name = faiss_store.index_path or id(faiss_store)
+    key = (name, faiss_store.version)
+    with _RETRIEVERS_LOCK:
+        retriever = _RETRIEVERS.get(key)
+        if retriever is None:
+            retriever = HybridRetriever.from_store(faiss_store)
+            for k in [k for k in _RETRIEVERS if k[0] == name]:
+                del _RETRIEVERS[k]
+            _RETRIEVERS[key] = retriever
+    return retriever
+
+
+def drop_retriever(faiss_store):
+    """
+    Forget the cached retrievers built on this store object (e.g. when it
+    is unloaded). A newer store for the same index path keeps its own.
+    """
+    with _RETRIEVERS_LOCK:
+        for k in [k for k, r in _RETRIEVERS.items() if r.faiss is faiss_store]:
+            del _RETRIEVERS[k]
@@ -1,13 +1,9 @@
 # backend/scraper.py
 
-import time
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 
-MIN_TEXT_LEN = 200  # below this = likely dynamic content
+from backend.renderer import MIN_TEXT_LEN, get_render_pool, needs_render  # noqa: F401
 
 
 def fetch_requests(url: str) -> str:
@@ -21,33 +17,17 @@ def fetch_requests(url: str) -> str:
 
 
 def fetch_selenium(url: str) -> str:
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-
-    driver = webdriver.Chrome(ChromeDriverManager().install(), options=options)
-    driver.get(url)
-
-    # Scroll to bottom to force content load
-    last_height = driver.execute_script("return document.body.scrollHeight")
-    for _ in range(6):  # scroll a few times
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(1.2)
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
-            break
-        last_height = new_height
-
-    html = driver.page_source
-    driver.quit()
-    return html
+    """Render with a warm browser from the shared pool (see backend.renderer)."""
+    return get_render_pool().render(url)
 
 
 def fetch_page(url: str) -> str:
     html = fetch_requests(url)
-    if len(html) < MIN_TEXT_LEN:
-        return fetch_selenium(url)
+    if needs_render(html):
+        try:
+            return fetch_selenium(url)
+        except Exception:
+            pass
     return html
 
 
@@ -0,0 +1,368 @@
+# backend/service.py
+"""
+HTTP API over the indexer and retriever.
+
+    uvicorn backend.service:app --port 8000
+
+  POST /index               {"url", "max_pages", "render"} -> job (202)
+  GET  /index/{job_id}      job status + progress
+  GET  /sites               indexed sites, catalog memory, cache stats
+  POST /query               {"site", "query", "top_k", "fusion", "rerank"} -> results
+  POST /query/batch         {"site", "queries": [...], "top_k"} -> results per query
+  POST /answer              {"site", "query", "history", "use_llm"} -> NDJSON stream
+  GET  /metrics             Prometheus text format (see backend.metrics)
+
+Handlers never run model or index work on the event loop: query
+embedding and search go to a thread pool (torch and FAISS release the
+GIL; EMBED_WORKERS moves encoding to processes), and index jobs run on
+their own small pool so a crawl never starves queries. With WARM_UP=1
+(default) the embedding model is loaded before the first request.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Literal
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from backend.answer_cache import get_answer_cache
+from backend.catalog import get_catalog, normalize_root, site_key
+from backend.embedder import (
+    embed_cache_stats,
+    embed_query,
+    get_openai_client,
+    query_cache_stats,
+    warm_up,
+)
+from backend.indexer import index_site
+from backend.metrics import METRICS
+from backend.rag import excerpt_answer, pack_prompt, stream_answer_with_openai
+from backend.reranker import RERANK_POOL, get_reranker, retrieve_reranked
+from backend.retriever import get_retriever
+
+logger = logging.getLogger(__name__)
+
+QUERY_THREADS = int(os.getenv("QUERY_THREADS", str(min(8, os.cpu_count() or 1))))
+INDEX_WORKERS = int(os.getenv("INDEX_WORKERS", "1"))
+RERANK = os.getenv("RERANK", "0") == "1"  # default for requests that don't say
+WARM_UP = os.getenv("WARM_UP", "1") == "1"  # load models before serving
+
+_QUERY_POOL = ThreadPoolExecutor(QUERY_THREADS, thread_name_prefix="query")
+_INDEX_POOL = ThreadPoolExecutor(INDEX_WORKERS, thread_name_prefix="index")
+
+
+async def run_in_pool(pool, fn, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args, **kwargs))
+
+
+# ---------- index jobs ----------
+class JobRegistry:
+    """
+    In-memory index jobs: id -> {"id", "url", "status", "progress",
+    "error", "created", "finished"}. status goes queued -> running ->
+    done | failed. A site already queued or running is not submitted twice.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, max_pages: int, render: bool) -> dict:
+        root = normalize_root(url)
+        with self._lock:
+            for job in self.jobs.values():
+                if job["url"] == root and job["status"] in ("queued", "running"):
+                    return dict(job)
+            job = {
+                "id": uuid.uuid4().hex,
+                "url": root,
+                "status": "queued",
+                "progress": {},
+                "error": None,
+                "created": time.time(),
+                "finished": None,
+            }
+            self.jobs[job["id"]] = job
+        self.pool.submit(self._run, job, max_pages, render)
+        return dict(job)
+
+    def _run(self, job, max_pages, render):
+        def progress(p):
+            job["progress"] = p
+
+        job["status"] = "running"
+        try:
+            index_site(job["url"], max_pages=max_pages, render=render, progress=progress)
+            job["status"] = "done"
+        except Exception as e:
+            logger.exception("Index job %s failed", job["id"])
+            job["error"] = str(e)
+            job["status"] = "failed"
+        job["finished"] = time.time()
+
+    def get(self, job_id: str):
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+JOBS = JobRegistry(_INDEX_POOL)
+
+
+# ---------- request bodies ----------
+Fusion = Literal["rrf", "minmax", "zscore", "weighted"]  # backend.fusion.FUSION_METHODS
+
+
+class IndexRequest(BaseModel):
+    url: str
+    max_pages: int = Field(20, ge=1, le=5000)
+    render: bool = False
+
+
+class QueryRequest(BaseModel):
+    site: str
+    query: str
+    top_k: int = Field(5, ge=1, le=100)
+    fusion: Fusion | None = None
+    rerank: bool = RERANK
+    rerank_pool: int = Field(RERANK_POOL, ge=1, le=500)
+    rerank_budget_ms: float | None = None
+
+
+class BatchQueryRequest(BaseModel):
+    site: str
+    queries: list[str]
+    top_k: int = Field(5, ge=1, le=100)
+    fusion: Fusion | None = None
+
+
+class AnswerRequest(QueryRequest):
+    history: list[dict] = []
+    use_llm: bool = True
+
+
+# ---------- query path (runs on the query pool) ----------
+def _retriever_for(site: str):
+    store = get_catalog().get(site)
+    if store is None:
+        raise HTTPException(404, f"site not indexed: {site}")
+    if len(store.metadata) == 0:
+        raise HTTPException(409, "index is empty")
+    return get_retriever(store)
+
+
+def _query(req, qvec=None):
+    retriever = _retriever_for(req.site)
+    t0 = time.perf_counter()
+    if qvec is None:
+        qvec = embed_query(req.query)
+    timings = {"embed_ms": (time.perf_counter() - t0) * 1000}
+    if req.rerank:
+        results = retrieve_reranked(
+            retriever, get_reranker(), req.query, qvec, top_k=req.top_k,
+            pool=req.rerank_pool, budget_ms=req.rerank_budget_ms, fusion=req.fusion, timings=timings,
+        )
+    else:
+        results = retriever.retrieve(req.query, qvec, top_k=req.top_k, fusion=req.fusion, timings=timings)
+    return results, timings
+
+
+def _cache_lookup(req, use_llm):
+    """
+    Answer cache lookup for /answer: exact query first, then (after
+    embedding the query) nearest past query. Returns (ns, qvec, hit)
+    with hit = (value, "exact" | "semantic", similarity) or None.
+    Answers that depend on conversation history are not cached.
+    """
+    retriever = _retriever_for(req.site)
+    ns = (site_key(req.site), retriever.version, use_llm, req.top_k, req.fusion, req.rerank)
+    if req.history:
+        return ns, None, None
+    cache = get_answer_cache()
+    value = cache.exact(ns, req.query)
+    if value is not None:
+        return ns, None, (value, "exact", 1.0)
+    qvec = embed_query(req.query)
+    value, sim = cache.similar(ns, qvec)
+    return ns, qvec, (value, "semantic", sim) if value is not None else None
+
+
+def _query_batch(site, queries, top_k, fusion):
+    retriever = _retriever_for(site)
+    timings = {}
+    results = retriever.retrieve_batch(queries, top_k=top_k, fusion=fusion, timings=timings)
+    return results, timings
+
+
+# ---------- app ----------
+STARTUP = {}  # warm-up timings
+
+
+async def _warm_up():
+    if not WARM_UP:
+        return
+    t0 = time.perf_counter()
+    STARTUP.update(await run_in_pool(_QUERY_POOL, warm_up))
+    if RERANK:
+        reranker = await run_in_pool(_QUERY_POOL, get_reranker)
+        await run_in_pool(_QUERY_POOL, reranker.score, "warm up", ["warm up"])
+    STARTUP["warm_up_s"] = time.perf_counter() - t0
+    logger.info("Warm-up done: %s", STARTUP)
+
+
+def _shutdown():
+    _QUERY_POOL.shutdown(wait=False, cancel_futures=True)
+    _INDEX_POOL.shutdown(wait=False, cancel_futures=True)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    await _warm_up()
+    yield
+    _shutdown()
+
+
+app = FastAPI(title="Chat with Any Website", lifespan=_lifespan)
+
+
+@app.middleware("http")
+async def _time_requests(request: Request, call_next):
+    # time to response start: streamed bodies are timed by answer_ttft / answer_total
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    METRICS.observe(f"http {request.method} {getattr(route, 'path', 'unmatched')}", time.perf_counter() - t0)
+    return response
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(METRICS.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/index", status_code=202)
+async def submit_index(req: IndexRequest):
+    return JOBS.submit(req.url, req.max_pages, req.render)
+
+
+@app.get("/index/{job_id}")
+async def index_status(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(404, "unknown job")
+    return job
+
+
+@app.get("/sites")
+async def sites():
+    catalog = get_catalog()
+    return {
+        "sites": catalog.list_sites(),
+        "memory": catalog.memory(),
+        "embed_cache": embed_cache_stats(),
+        "answer_cache": get_answer_cache().stats(),
+        "query_cache": query_cache_stats(),
+        "startup": STARTUP,
+        "llm_available": get_openai_client() is not None,
+    }
+
+
+@app.post("/query")
+async def query(req: QueryRequest):
+    results, timings = await run_in_pool(_QUERY_POOL, _query, req)
+    return {"results": results, "timings": timings}
+
+
+@app.post("/query/batch")
+async def query_batch(req: BatchQueryRequest):
+    results, timings = await run_in_pool(
+        _QUERY_POOL, _query_batch, req.site, req.queries, req.top_k, req.fusion
+    )
+    return {"results": results, "timings": timings}
+
+
+@app.post("/answer")
+async def answer(req: AnswerRequest):
+    """
+    Newline-delimited JSON events:
+      {"type": "sources", "results": [...], "timings": {...}}
+      {"type": "token", "text": "..."}   (repeated)
+      {"type": "done", "ttft_ms", "total_ms", "prompt_tokens", ...}
+
+    If the LLM fails, {"type": "error", "message": "..."} is followed by
+    the excerpt answer as a token with "replace": true (it supersedes any
+    partial answer streamed before the error); that answer is not cached.
+
+    With the LLM, sources are the chunks packed into the prompt (so
+    citations [i] index them) and "done" carries the packing stats.
+    "done" also says whether the answer came from the answer cache
+    ("exact" / "semantic", with the query similarity) or not (null).
+    """
+    t0 = time.perf_counter()
+    use_llm = req.use_llm and get_openai_client() is not None
+    ns, qvec, hit = await run_in_pool(_QUERY_POOL, _cache_lookup, req, use_llm)
+    if hit is not None:
+        value, kind, sim = hit
+
+        def cached():
+            yield json.dumps({"type": "sources", "results": value["sources"], "timings": {}}) + "\n"
+            yield json.dumps({"type": "token", "text": value["answer"]}) + "\n"
+            ms = (time.perf_counter() - t0) * 1000
+            done = {"type": "done", "ttft_ms": ms, "total_ms": ms, "cache": kind, "similarity": sim}
+            yield json.dumps(done) + "\n"
+
+        return StreamingResponse(cached(), media_type="application/x-ndjson")
+
+    results, timings = await run_in_pool(_QUERY_POOL, _query, req, qvec)
+    stats = {}
+    if use_llm:
+        # tokenizes every candidate: keep it off the event loop
+        prompt, blocks, stats = await run_in_pool(
+            _QUERY_POOL, pack_prompt, req.query, results, conversation_history=req.history
+        )
+        results = [{"meta": b["meta"], "score": b["score"]} for b in blocks]
+
+    def events():
+        # a sync generator: Starlette iterates it on its thread pool
+        yield json.dumps({"type": "sources", "results": results, "timings": timings}) + "\n"
+        ttft = None
+        parts = []
+        failed = False
+        if use_llm:
+            try:
+                for text in stream_answer_with_openai(prompt):
+                    if ttft is None:
+                        ttft = (time.perf_counter() - t0) * 1000
+                    parts.append(text)
+                    yield json.dumps({"type": "token", "text": text}) + "\n"
+            except Exception as e:
+                logger.warning("LLM answer failed, falling back to excerpts: %s", e)
+                yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+                failed = True
+        if not use_llm or failed:
+            if ttft is None:
+                ttft = (time.perf_counter() - t0) * 1000
+            parts = [excerpt_answer(results)]
+            yield json.dumps({"type": "token", "text": parts[0], "replace": failed}) + "\n"
+        if not req.history and not failed:
+            get_answer_cache().put(ns, req.query, qvec, {"answer": "".join(parts), "sources": results})
+        total = (time.perf_counter() - t0) * 1000
+        if ttft is not None:
+            METRICS.observe("answer_ttft", ttft / 1000)
+        METRICS.observe("answer_total", total / 1000)
+        done = {"type": "done", "ttft_ms": ttft, "total_ms": total, "cache": None, **stats}
+        logger.info("answer %s", done)
+        yield json.dumps(done) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
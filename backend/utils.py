@@ -29,46 +29,59 @@ def normalize_url(url: str) -> str:
 ###########################################
 # Robots.txt Checker
 ###########################################
-def obey_robots(url: str) -> bool:
+def fetch_robots(url: str) -> dict:
     """
-    Checks robots.txt for the given site.
-    Returns True if allowed, False if disallowed.
+    Fetches and parses robots.txt for the given site.
+    Returns {"disallow": [path prefixes], "crawl_delay": float | None}
+    for the `*` user agent. Missing / broken robots.txt -> no rules.
     """
     parsed = urlparse(url)
     robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+    rules = {"disallow": [], "crawl_delay": None}
 
     try:
         r = requests.get(robots_url, timeout=5)
         if r.status_code != 200:
-            return True  # assume allowed if robots.txt missing
+            return rules  # assume allowed if robots.txt missing
 
-        lines = r.text.split("\n")
-        rules = []
         user_agent = None
-        allowed = True
-
-        for line in lines:
+        for line in r.text.split("\n"):
             line = line.strip().lower()
 
             if line.startswith("user-agent:"):
                 user_agent = line.replace("user-agent:", "").strip()
 
             # apply rules only for *
-            if user_agent == "*" and line.startswith("disallow:"):
+            if user_agent != "*":
+                continue
+            if line.startswith("disallow:"):
                 rule = line.replace("disallow:", "").strip()
-                rules.append(rule)
+                if rule:
+                    rules["disallow"].append(rule)
+            elif line.startswith("crawl-delay:"):
+                try:
+                    rules["crawl_delay"] = float(line.replace("crawl-delay:", "").strip())
+                except ValueError:
+                    pass
+
+        return rules
+
+    except Exception:
+        return rules  # if error → assume allowed
 
-        path = parsed.path
 
-        # if any rule is a prefix of path → disallow
-        for rule in rules:
-            if rule != "" and path.startswith(rule):
-                return False
+def is_allowed(url: str, rules: dict) -> bool:
+    """True if no disallow rule is a prefix of the URL path."""
+    path = urlparse(url).path
+    return not any(path.startswith(rule) for rule in rules.get("disallow", []))
 
-        return True
 
-    except:
-        return True  # if error → assume allowed
+def obey_robots(url: str) -> bool:
+    """
+    Checks robots.txt for the given site.
+    Returns True if allowed, False if disallowed.
+    """
+    return is_allowed(url, fetch_robots(url))
 
 
 ###########################################
@@ -1,38 +1,442 @@
 # backend/vectordb.py
 import faiss
+import logging
+import math
 import numpy as np
 import os
-import json
+import threading
+import uuid
+
+from backend.metastore import MetaStore
+from backend.metrics import count, timed
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq", "opq", "auto")
+STORAGE_TYPES = ("float32", "float16", "int8", "binary")
+
+# default vector storage for new stores (None = float32, or keep a loaded index's)
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE") or None
+
+_SQ_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# compact once more than this share of rows are removed (in the background
+# after remove(), inline in save())
+COMPACT_DEAD_FRACTION = float(os.getenv("COMPACT_DEAD_FRACTION", "0.2"))
+
+# "auto" thresholds on corpus size
+AUTO_FLAT_MAX = 20_000
+AUTO_HNSW_MAX = 500_000
+
+
+def choose_index_type(n: int) -> str:
+    """Pick an index type from corpus size."""
+    if n <= AUTO_FLAT_MAX:
+        return "flat"
+    if n <= AUTO_HNSW_MAX:
+        return "hnsw"
+    return "opq"
+
+
+def _nlist(n: int) -> int:
+    # ~4*sqrt(n) lists, but at least 39 training points per list
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def _pq_m(dim: int) -> int:
+    # largest sub-quantizer count that divides dim, >= 4 dims per code
+    for m in (64, 48, 32, 24, 16, 12, 8, 4, 2, 1):
+        if dim % m == 0 and dim // m >= 4:
+            return m
+    return 1
+
+
+def index_kind(index) -> str:
+    """Map a FAISS index back to one of INDEX_TYPES."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPreTransform):
+        return "opq"
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def index_storage(index) -> str:
+    """Map a FAISS index to one of STORAGE_TYPES (PQ kinds report float32)."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexRefine):
+        return "binary"
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        for name, qtype in _SQ_TYPES.items():
+            if index.sq.qtype == qtype:
+                return name
+    return "float32"
 
 
 class FaissStore:
     """
-    Simple FAISS wrapper with in-memory metadata mapping.
+    Simple FAISS wrapper with columnar metadata (see MetaStore) keyed by
+    FAISS row id.
+
+    index_type: "flat" (exact), "hnsw", "ivf" (IVF-Flat), "ivfpq",
+    "opq" (OPQ + IVF-PQ) or "auto" (chosen from corpus size by
+    choose_index_type). None is "auto" for a new store and keeps the
+    saved choice on load(). Vectors always go into a flat index first so
+    they are searchable immediately; build() (called by save()) trains
+    the target index on a sample and moves the vectors over.
+
+    Recall knobs: nprobe (IVF lists probed) and ef_search (HNSW beam).
+
+    Vectors are L2-normalised on add() and search(), so scores are cosine
+    similarities whatever the embedder returns.
+
+    storage: how flat / HNSW / IVF indexes keep vectors: "float32",
+    "float16" (2x smaller), "int8" (scalar-quantised, 4x) or "binary"
+    (sign bits, 32x, exhaustive Hamming search whose top k * rerank
+    candidates are re-ranked against float16 copies; load(mmap=True)
+    leaves those on disk). None keeps the storage of a loaded index.
+    PQ index types are already compressed and ignore it.
+
+    Mutations: remove() / remove_urls() tombstone rows (search skips
+    them), upsert() replaces chunks by chunk_id, so refreshing one page
+    costs O(page). Once more than COMPACT_DEAD_FRACTION of the rows are
+    dead, remove() starts compact() on a background thread (and save()
+    finishes it inline): it rewrites the index and metadata without the
+    dead rows, which renumbers row ids and changes version.
     """
-    def __init__(self, dim: int, index_path: str | None = None):
+    def __init__(
+        self,
+        dim: int,
+        index_path: str | None = None,
+        index_type: str | None = None,
+        nprobe: int = 16,
+        ef_search: int = 64,
+        hnsw_m: int = 32,
+        train_size: int = 100_000,
+        storage: str | None = VECTOR_STORAGE,
+        rerank: int = 8,
+    ):
+        if index_type is not None and index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {INDEX_TYPES}")
+        if storage is not None and storage not in STORAGE_TYPES:
+            raise ValueError(f"storage must be one of {STORAGE_TYPES}")
         self.dim = dim
         self.index_path = index_path
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.hnsw_m = hnsw_m
+        self.train_size = train_size
+        self.storage = storage
+        self.rerank = rerank
         self.index = faiss.IndexFlatIP(dim)  # using inner product (cosine if normalized)
-        self.id_to_meta = {}
+        self.metadata = MetaStore()
         self.next_id = 0
+        self.version = uuid.uuid4().hex  # changes on every add/remove
+        self._mmapped = False
+        self._lock = threading.RLock()  # guards index/metadata swaps
+        self._compactor = None  # background compaction thread
+
+    @property
+    def kind(self) -> str:
+        return index_kind(self.index)
 
+    @property
+    def storage_kind(self) -> str:
+        return index_storage(self.index)
+
+    def _ensure_writable(self):
+        # a memory-mapped index is a read-only view; pull it into RAM first
+        if self._mmapped:
+            self.index = faiss.read_index(self.index_path + ".index")
+            self._mmapped = False
+
+    @timed("faiss_add")
     def add(self, vectors: np.ndarray, metas: list[dict]):
-        vectors = vectors.astype("float32")
-        self.index.add(vectors)
-        n = vectors.shape[0]
-        for i in range(n):
-            self.id_to_meta[self.next_id + i] = metas[i]
-        self.next_id += n
-
-    def search(self, qvec: np.ndarray, k: int = 5):
-        qvec = qvec.astype("float32")
-        D, I = self.index.search(qvec, k)
-        results = []
+        vectors = np.array(vectors, dtype="float32", order="C")  # copy: normalised in place
+        count("vectors", vectors.shape[0])
+        faiss.normalize_L2(vectors)
+        with self._lock:
+            self._ensure_writable()
+            self.index.add(vectors)
+            self.metadata.append(metas[:vectors.shape[0]])
+            self.next_id += vectors.shape[0]
+            self.version = uuid.uuid4().hex
+
+    def remove(self, chunk_ids):
+        """
+        Drop chunks by chunk_id. Rows stay in the FAISS index but lose their
+        metadata, so search skips them until the next compact().
+        """
+        with self._lock:
+            removed = len(self.metadata.remove(set(chunk_ids)))
+            if removed:
+                self.version = uuid.uuid4().hex
+                self.maybe_compact(background=True)
+        return removed
+
+    def remove_urls(self, urls):
+        """Drop every chunk stored under these page urls."""
+        with self._lock:
+            chunk_ids = [cid for url in urls for cid in self.metadata.chunk_ids_for_url(url)]
+            return self.remove(chunk_ids)
+
+    def chunk_ids_for_url(self, url: str) -> list[str]:
+        return self.metadata.chunk_ids_for_url(url)
+
+    def upsert(self, vectors: np.ndarray, metas: list[dict]):
+        """add() that first removes any live chunks with the same chunk_ids."""
+        with self._lock:
+            self.remove(m["chunk_id"] for m in metas[:len(vectors)])
+            self.add(vectors, metas)
+
+    # ---------- compaction ----------
+    @property
+    def dead_fraction(self) -> float:
+        n = self.index.ntotal
+        return (n - len(self.metadata)) / n if n else 0.0
+
+    def _compacted_index(self, source, live: np.ndarray, kind: str, storage: str):
+        if isinstance(source, np.ndarray):
+            # graph / IVF / refine indexes: re-encode the surviving vectors
+            return self._fill(self._make_index(kind, len(live), storage), source)
+        # flat float / SQ codes: drop rows from the copy, survivors shift down in order
+        source.remove_ids(np.setdiff1d(np.arange(source.ntotal, dtype="int64"), live))
+        return source
+
+    @timed("compact")
+    def compact(self) -> int:
+        """
+        Rewrite index + metadata without removed rows. Returns the number of
+        rows reclaimed (0 if nothing was dead, or if the index was replaced,
+        e.g. by build() or load(), while compacting).
+
+        Writers are only blocked while the index is copied (flat codes) or
+        its live vectors are read out; the new index is built without the
+        lock, so searches and writes keep running. Rows added or removed
+        meanwhile are replayed onto the result before it is swapped in.
+        Row ids are renumbered. PQ codes are re-trained on their own
+        reconstructions, which loses a little accuracy; build() from the
+        original vectors avoids that.
+        """
+        compactor = self._compactor
+        if compactor is not None and compactor is not threading.current_thread():
+            compactor.join()  # let a background compaction finish first
+        with self._lock:
+            index, metadata = self.index, self.metadata
+            live = metadata.live_rows()
+            n0 = index.ntotal
+            n_dead = n0 - len(live)
+            if n_dead == 0:
+                return 0
+            kind, storage = index_kind(index), index_storage(index)
+            # copied under the lock: add() mutates the index in place
+            if isinstance(faiss.downcast_index(index), faiss.IndexFlatCodes):
+                source = faiss.clone_index(index)
+            else:
+                source = self._all_vectors(index)[live]
+        new_index = self._compacted_index(source, live, kind, storage)
+        new_meta = metadata.compacted(live)
+        with self._lock:
+            if self.index is not index or self.metadata is not metadata:
+                logger.info("Store rebuilt during compaction; discarded")
+                return 0
+            # replay writes made since the snapshot
+            dead = [j for j, i in enumerate(live) if not metadata.is_alive(int(i))]
+            n1 = index.ntotal
+            if n1 > n0:
+                new_index.add(self._all_vectors(index, start=n0))  # already normalised
+                new_meta.append([metadata.decode(i) for i in range(n0, n1)])
+                dead += [len(live) + i - n0 for i in range(n0, n1) if not metadata.is_alive(i)]
+            new_meta.remove_rows(dead)
+            self.index, self.metadata = new_index, new_meta
+            self._mmapped = False
+            self.next_id = new_index.ntotal
+            self.version = uuid.uuid4().hex
+        logger.info("Compacted %d dead rows (%d live)", n_dead, len(new_meta))
+        return n_dead
+
+    def compact_async(self) -> threading.Thread:
+        """
+        Run compact() on a daemon thread, unless one is already running;
+        returns that thread (join() it to wait).
+        """
+        with self._lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self.compact, name="faiss-compact", daemon=True)
+                self._compactor.start()
+            return self._compactor
+
+    def maybe_compact(self, threshold: float = COMPACT_DEAD_FRACTION, background: bool = False):
+        """
+        compact() if more than `threshold` of the rows are dead. background:
+        start it with compact_async() and return the thread (or None).
+        """
+        if self.dead_fraction <= threshold:
+            return None if background else 0
+        return self.compact_async() if background else self.compact()
+
+    def metas(self) -> list[dict]:
+        """Live chunk metas in insertion order."""
+        return self.metadata.metas()
+
+    # ---------- ANN build ----------
+    def _target_kind(self, index_type: str, n: int, storage: str = "float32") -> str:
+        if storage == "binary":
+            return "flat"
+        kind = choose_index_type(n) if index_type == "auto" else index_type
+        # fall back when there is too little data to train
+        if kind in ("ivfpq", "opq") and n < 10_000:
+            kind = "ivf"
+        if kind == "ivf" and n < 1_000:
+            kind = "flat"
+        return kind
+
+    def _make_index(self, kind: str, n: int, storage: str = "float32"):
+        d, ip = self.dim, faiss.METRIC_INNER_PRODUCT
+        if storage == "binary":
+            # L2 on unit vectors ranks like cosine; search_batch converts the distances
+            lsh = faiss.IndexLSH(d, d, False, False)
+            refine = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+            index = faiss.IndexRefine(lsh, refine)
+            index.own_fields = index.own_refine_index = True
+            lsh.this.disown()
+            refine.this.disown()
+            index.k_factor = self.rerank
+            return index
+        qtype = _SQ_TYPES.get(storage)
+        if kind == "hnsw":
+            if qtype is not None:
+                index = faiss.IndexHNSWSQ(d, qtype, self.hnsw_m, ip)
+            else:
+                index = faiss.IndexHNSWFlat(d, self.hnsw_m, ip)
+            index.hnsw.efConstruction = 80
+            return index
+        nlist, m = _nlist(n), _pq_m(d)
+        if kind == "ivf":
+            codec = {"float16": "SQfp16", "int8": "SQ8"}.get(storage, "Flat")
+            return faiss.index_factory(d, f"IVF{nlist},{codec}", ip)
+        if kind == "ivfpq":
+            return faiss.index_factory(d, f"IVF{nlist},PQ{m}", ip)
+        if kind == "opq":
+            return faiss.index_factory(d, f"OPQ{m},IVF{nlist},PQ{m}", ip)
+        if qtype is not None:
+            return faiss.IndexScalarQuantizer(d, qtype, ip)
+        return faiss.IndexFlatIP(d)
+
+    def _all_vectors(self, index=None, start: int = 0) -> np.ndarray:
+        """Vectors of rows start.. of `index` (default self.index), decoded."""
+        index = self.index if index is None else index
+        if index_kind(index) in ("ivf", "ivfpq", "opq"):
+            faiss.extract_index_ivf(index).make_direct_map()
+        return index.reconstruct_n(start, index.ntotal - start)
+
+    def _fill(self, index, vecs: np.ndarray):
+        """Train `index` on a sample of vecs if needed, then add them all."""
+        n = len(vecs)
+        if not index.is_trained:
+            rng = np.random.default_rng(0)
+            sample = vecs[rng.choice(n, size=min(n, self.train_size), replace=False)]
+            index.train(sample)
+        for start in range(0, n, 65_536):
+            index.add(vecs[start:start + 65_536])
+        return index
+
+    def build(self, index_type: str | None = None, storage: str | None = None):
+        """
+        (Re)build the index as `index_type` (default: self.index_type) with
+        `storage` (default: self.storage, else the current one). Trains on a
+        random sample of up to train_size vectors. Row ids are preserved.
+        No-op if the index already has the target type and storage.
+        """
+        n = self.index.ntotal
+        storage = storage or self.storage or self.storage_kind
+        kind = self._target_kind(index_type or self.index_type or "auto", n, storage)
+        if kind in ("ivfpq", "opq"):
+            storage = "float32"  # PQ codes; storage does not apply
+        if (kind, storage) == (self.kind, self.storage_kind) or n == 0:
+            return
+
+        index = self._fill(self._make_index(kind, n, storage), self._all_vectors())
+        logger.info(
+            "Rebuilt %d vectors as %s/%s (was %s/%s)", n, kind, storage, self.kind, self.storage_kind
+        )
+        self.index = index
+
+    def _search_params(self, index, k, nprobe=None, ef_search=None, sel=None):
+        """
+        Per-call faiss.SearchParameters, so concurrent searches don't race on
+        the index's own nprobe / efSearch. `sel` restricts results to its ids
+        wherever the index supports that (all but binary LSH + refine).
+        """
+        if isinstance(faiss.downcast_index(index), faiss.IndexRefine):
+            return faiss.IndexRefineSearchParameters(k_factor=self.rerank)
+        kind = index_kind(index)
+        if kind in ("ivf", "ivfpq", "opq"):
+            params = faiss.SearchParametersIVF(nprobe=nprobe or self.nprobe)
+        elif kind == "hnsw":
+            params = faiss.SearchParametersHNSW(efSearch=max(ef_search or self.ef_search, k))
+        else:
+            params = faiss.SearchParameters()
+        if sel is not None:
+            params.sel = sel
+        if kind == "opq":  # the IVF sits behind the OPQ rotation, which keeps ids
+            params = faiss.SearchParametersPreTransform(index_params=params)
+        return params
+
+    def search(self, qvec: np.ndarray, k: int = 5, nprobe: int | None = None, ef_search: int | None = None):
+        """Top-k for each row of qvec, concatenated into one list."""
+        return [r for row in self.search_batch(qvec, k, nprobe, ef_search) for r in row]
+
+    @timed("faiss_search")
+    def search_batch(self, qvecs: np.ndarray, k: int = 5, nprobe: int | None = None, ef_search: int | None = None):
+        """
+        One FAISS search over the whole (n_queries, dim) matrix.
+        Returns one result list per query row.
+        """
+        qvecs = np.array(np.atleast_2d(qvecs), dtype="float32", order="C")
+        faiss.normalize_L2(qvecs)
+        with self._lock:  # a consistent pair even if compact() swaps them
+            index, metadata = self.index, self.metadata
+            n_total = index.ntotal
+            bitmap = metadata.alive_bitmap() if n_total > len(metadata) else None
+        k_search = min(k, len(metadata))
+        if k_search <= 0:
+            return [[] for _ in range(len(qvecs))]
+        # removed rows are skipped inside FAISS, so they don't eat into k or ef
+        sel = None if bitmap is None else faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        params = self._search_params(index, k_search, nprobe, ef_search, sel)
+        unfiltered = sel is not None and isinstance(params, faiss.IndexRefineSearchParameters)
+        if unfiltered:
+            # LSH can't filter by id: over-fetch, widening only while removed rows crowd out k
+            k_search = min(2 * k, n_total)
+        while True:
+            D, I = index.search(qvecs, k_search, params=params)
+            if not unfiltered or k_search >= n_total:
+                break
+            if all(sum(metadata.is_alive(int(i)) for i in row) >= k for row in I):
+                break
+            k_search = min(2 * k_search, n_total)
+        if index.metric_type == faiss.METRIC_L2:
+            D = 1.0 - D / 2.0  # squared L2 between unit vectors -> cosine
+        out = []
         for row_scores, row_idxs in zip(D, I):
+            results = []
             for score, idx in zip(row_scores, row_idxs):
+                if len(results) == k:
+                    break
                 if idx == -1:
                     continue
-                meta = self.id_to_meta.get(int(idx))
+                meta = metadata.get(int(idx))
                 if meta is None:
                     continue
                 results.append(
@@ -41,28 +445,65 @@ class FaissStore:
                         "meta": meta,
                     }
                 )
-        return results
+            out.append(results)
+        return out
 
     def save(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        self.maybe_compact()
+        self.build()
         if not self.index_path:
             return
         os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-        faiss.write_index(self.index, self.index_path + ".index")
-        with open(self.index_path + ".meta.json", "w", encoding="utf-8") as f:
-            json.dump(self.id_to_meta, f, ensure_ascii=False, indent=2)
+        with self._lock:  # a consistent triple even if a compaction swaps them
+            index, metadata, version = self.index, self.metadata, self.version
+        # write-then-rename: a memory-mapped index may still be reading the old file
+        faiss.write_index(index, self.index_path + ".index.tmp")
+        os.replace(self.index_path + ".index.tmp", self.index_path + ".index")
+        metadata.save(self.index_path + ".meta")
+        with open(self.index_path + ".version", "w") as f:
+            f.write(version)
+        with open(self.index_path + ".index_type", "w") as f:
+            f.write(self.index_type or "auto")
 
-    def load(self):
+    def load(self, mmap: bool = False) -> bool:
+        """
+        Load index + metadata from index_path. Returns False if missing.
+        Metadata is always memory-mapped; with mmap=True the vector codes
+        are too (read-only until the next add()).
+        """
         if not self.index_path:
-            return
+            return False
         idx_path = self.index_path + ".index"
-        meta_path = self.index_path + ".meta.json"
-        if not os.path.exists(idx_path) or not os.path.exists(meta_path):
-            return
-        self.index = faiss.read_index(idx_path)
-        with open(meta_path, "r", encoding="utf-8") as f:
-            self.id_to_meta = json.load(f)
-        # next_id = max key + 1
-        if self.id_to_meta:
-            self.next_id = max(map(int, self.id_to_meta.keys())) + 1
+        meta_path = self.index_path + ".meta"
+        legacy_path = self.index_path + ".meta.json"
+        if not os.path.exists(idx_path):
+            return False
+        if os.path.isdir(meta_path):
+            self.metadata = MetaStore.load(meta_path)
+        elif os.path.exists(legacy_path):
+            self.metadata = None
+        else:
+            return False
+
+        flag = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) if mmap else 0
+        self.index = faiss.read_index(idx_path, flag)
+        self._mmapped = bool(flag)
+        if self.metadata is None:
+            self.metadata = MetaStore.from_json(legacy_path, self.index.ntotal)
+        self.dim = self.index.d
+        # ids are row positions; removed rows leave gaps, so use ntotal
+        self.next_id = self.index.ntotal
+        version_path = self.index_path + ".version"
+        if os.path.exists(version_path):
+            with open(version_path) as f:
+                self.version = f.read().strip()
         else:
-            self.next_id = 0
+            self.version = str(os.stat(idx_path).st_mtime_ns)
+        type_path = self.index_path + ".index_type"
+        if self.index_type is None and os.path.exists(type_path):
+            with open(type_path) as f:
+                self.index_type = f.read().strip()
+        return True
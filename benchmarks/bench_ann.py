@@ -0,0 +1,84 @@
+# benchmarks/bench_ann.py
+"""
+Recall@k vs. latency for FaissStore index types against the flat baseline.
+
+    python -m benchmarks.bench_ann --n 200000 --dim 384
+
+Vectors are synthetic and clustered (roughly like sentence embeddings),
+L2-normalised so inner product == cosine.
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from backend.vectordb import FaissStore
+
+
+def make_vectors(n, dim, n_clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype("float32")
+    labels = rng.integers(0, n_clusters, size=n)
+    x = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(x)
+    return x
+
+
+def index_bytes(index) -> int:
+    return faiss.serialize_index(index).nbytes
+
+
+def run(store, queries, truth, k, **params):
+    t0 = time.perf_counter()
+    hits = 0
+    for q, gt in zip(queries, truth):
+        res = store.search(q[None, :], k=k, **params)
+        hits += len({r["meta"]["chunk_id"] for r in res} & gt)
+    dt = time.perf_counter() - t0
+    return hits / (len(queries) * k), dt / len(queries) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--types", nargs="+", default=["flat", "hnsw", "ivf", "ivfpq", "opq"])
+    args = ap.parse_args()
+
+    xb = make_vectors(args.n, args.dim)
+    xq = make_vectors(args.queries, args.dim, seed=1)
+    metas = [{"chunk_id": str(i)} for i in range(args.n)]
+
+    flat = faiss.IndexFlatIP(args.dim)
+    flat.add(xb)
+    _, gt = flat.search(xq, args.k)
+    truth = [set(map(str, row)) for row in gt]
+
+    sweeps = {
+        "flat": [{}],
+        "hnsw": [{"ef_search": ef} for ef in (16, 32, 64, 128, 256)],
+        "ivf": [{"nprobe": p} for p in (1, 4, 16, 64)],
+        "ivfpq": [{"nprobe": p} for p in (4, 16, 64)],
+        "opq": [{"nprobe": p} for p in (4, 16, 64)],
+    }
+
+    print(f"n={args.n} dim={args.dim} k={args.k} queries={args.queries}")
+    print(f"{'type':>6} {'params':>16} {'recall@k':>9} {'ms/query':>9} {'build s':>8} {'MB':>8}")
+    for kind in args.types:
+        store = FaissStore(dim=args.dim, index_type=kind)
+        t0 = time.perf_counter()
+        store.add(xb, metas)
+        store.build()
+        build_s = time.perf_counter() - t0
+        mb = index_bytes(store.index) / 2**20
+        for params in sweeps[kind]:
+            recall, ms = run(store, xq, truth, args.k, **params)
+            label = ",".join(f"{key}={v}" for key, v in params.items()) or "-"
+            print(f"{store.kind:>6} {label:>16} {recall:>9.3f} {ms:>9.3f} {build_s:>8.1f} {mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
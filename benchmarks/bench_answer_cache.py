@@ -0,0 +1,68 @@
+"""
+AnswerCache hit rate and lookup latency on repeated / paraphrased questions.
+
+    python -m benchmarks.bench_answer_cache --repeats 20 --thresholds 0.85 0.9 0.92 0.95
+
+Each topic has a few paraphrases; the stream asks them in random order
+with random case / punctuation, `--repeats` times. A hit is "wrong" when
+the cached answer belongs to another topic. Query vectors come from the
+local embedding model.
+"""
+import argparse
+import random
+import time
+
+from backend.answer_cache import AnswerCache
+from backend.embedder import embed_queries
+
+TOPICS = [
+    ["summarize this page", "give me a summary", "what is this page about", "summary please"],
+    ["how do I reset my password", "I forgot my password, how can I reset it", "password reset steps"],
+    ["what are the pricing plans", "how much does it cost", "list the prices"],
+    ["who wrote this article", "who is the author", "author of this page"],
+    ["how do I install it", "installation instructions", "how to set it up"],
+    ["what films are at the top of the list", "which movies rank highest", "top ranked films"],
+    ["is there an API", "does it have an API", "API access"],
+    ["what is the refund policy", "can I get my money back", "refunds"],
+]
+
+
+def noisy(q, rng):
+    q = q.upper() if rng.random() < 0.2 else q.capitalize() if rng.random() < 0.5 else q
+    return q + rng.choice(["", "?", "!", " ?", "."])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeats", type=int, default=20)
+    ap.add_argument("--thresholds", type=float, nargs="+", default=[0.85, 0.9, 0.92, 0.95])
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    stream = [(t, noisy(q, rng)) for _ in range(args.repeats) for t, qs in enumerate(TOPICS) for q in qs]
+    rng.shuffle(stream)
+    qvecs = embed_queries([q for _, q in stream], provider="local")
+    ns = ("site", "v1")
+
+    print(f"{len(stream)} questions over {len(TOPICS)} topics")
+    print(f"{'threshold':>9} {'exact':>6} {'similar':>7} {'miss':>5} {'hit rate':>8} {'wrong':>5} {'us/lookup':>9}")
+    for threshold in args.thresholds:
+        cache = AnswerCache(threshold=threshold)
+        wrong = 0
+        t0 = time.perf_counter()
+        for (topic, q), v in zip(stream, qvecs):
+            value = cache.exact(ns, q)
+            if value is None:
+                value, _ = cache.similar(ns, v)
+            if value is None:
+                cache.put(ns, q, v, topic)
+            elif value != topic:
+                wrong += 1
+        us = (time.perf_counter() - t0) / len(stream) * 1e6
+        s = cache.stats()
+        print(f"{threshold:>9.2f} {s['exact_hits']:>6} {s['semantic_hits']:>7} {s['misses']:>5} "
+              f"{s['hit_rate']:>8.1%} {wrong:>5} {us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_bm25.py
+"""
+Native CSR BM25 (backend.bm25) vs. rank_bm25 on a synthetic Zipfian corpus.
+
+    python -m benchmarks.bench_bm25 --sizes 10000 100000 1000000
+
+Checks that scores match rank_bm25 within tolerance and reports build
+time and per-query top-k latency for both. rank_bm25 is only run up to
+--ref-max docs (it needs minutes and GBs beyond that).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.bm25 import BM25Index
+
+
+def make_corpus(n_docs, doc_len=100, vocab=50_000, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = rng.zipf(1.2, size=n_docs * doc_len) % vocab
+    words = np.array([f"w{i}" for i in range(vocab)])
+    flat = words[ids]
+    return [flat[i * doc_len:(i + 1) * doc_len].tolist() for i in range(n_docs)]
+
+
+def make_queries(n, vocab=50_000, terms=3, seed=1):
+    rng = np.random.default_rng(seed)
+    return [[f"w{i}" for i in rng.zipf(1.3, size=terms) % vocab] for _ in range(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--ref-max", type=int, default=100_000)
+    args = ap.parse_args()
+
+    queries = make_queries(args.queries)
+    print(f"{'docs':>9} {'engine':>9} {'build s':>8} {'ms/query':>9} {'speedup':>8} {'max |Δ|':>9}")
+    for n in args.sizes:
+        corpus = make_corpus(n)
+
+        t0 = time.perf_counter()
+        ours = BM25Index.build(tokenized=corpus)
+        build_ours = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for q in queries:
+            ours.top_k(" ".join(q), args.k)
+        ms_ours = (time.perf_counter() - t0) / len(queries) * 1000
+
+        ms_ref, diff, build_ref = None, None, None
+        if n <= args.ref_max:
+            from rank_bm25 import BM25Okapi
+
+            t0 = time.perf_counter()
+            ref = BM25Okapi(corpus)
+            build_ref = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for q in queries:
+                np.argsort(ref.get_scores(q))[::-1][:args.k]
+            ms_ref = (time.perf_counter() - t0) / len(queries) * 1000
+            diff = max(
+                float(np.abs(ref.get_scores(q) - ours.get_scores(q)).max()) for q in queries[:10]
+            )
+            print(f"{n:>9} {'rank_bm25':>9} {build_ref:>8.1f} {ms_ref:>9.2f} {'':>8} {'':>9}")
+
+        speedup = f"{ms_ref / ms_ours:.0f}x" if ms_ref else "-"
+        d = f"{diff:.2e}" if diff is not None else "-"
+        print(f"{n:>9} {'csr':>9} {build_ours:>8.1f} {ms_ours:>9.2f} {speedup:>8} {d:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Token-aware chunker (backend.chunker.chunk_spans) vs. the old 500-word
+sliding window, on generated multi-MB pages.
+
+    python -m benchmarks.bench_chunker --mb 1 4 16
+
+Reports MB/s, chunk counts and how many chunks exceed the embedding
+model's token limit (i.e. would be silently truncated). --tokenizer words
+skips loading the model and counts whitespace words instead.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from backend.chunker import chunk_spans, get_tokenizer, token_offsets
+from tests.fixtures.site_server import WORDS
+
+
+def word_window_chunks(text, chunk_size=500, overlap=100):
+    """The previous chunk_text: 500-word windows re-joined with 100 overlap."""
+    words = text.split()
+    chunks = []
+    start = 0
+    while start < len(words):
+        end = min(start + chunk_size, len(words))
+        chunks.append(" ".join(words[start:end]))
+        if end == len(words):
+            break
+        start = end - overlap
+    return chunks
+
+
+def make_text(mb, seed=0):
+    """Cleaner-style page text: headings and paragraphs separated by blank lines."""
+    rng = random.Random(seed)
+    blocks, size = [], 0
+    while size < mb * 1_000_000:
+        if rng.random() < 0.2:
+            block = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title()
+        else:
+            block = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 400))) + "."
+        blocks.append(block)
+        size += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=float, nargs="+", default=[1, 4, 16])
+    ap.add_argument("--tokenizer", choices=["model", "words"], default="model")
+    ap.add_argument("--max-tokens", type=int, default=None)
+    args = ap.parse_args()
+
+    if args.tokenizer == "model":
+        tokenizer, max_tokens = get_tokenizer()
+    else:
+        tokenizer, max_tokens = "words", 500
+    max_tokens = args.max_tokens or max_tokens
+
+    print(f"tokenizer={args.tokenizer} max_tokens={max_tokens}")
+    print(f"{'MB':>6} {'chunker':>12} {'MB/s':>7} {'chunks':>7} {'over limit':>10}")
+    for mb in args.mb:
+        text = make_text(mb)
+        size = len(text) / 1e6
+
+        t0 = time.perf_counter()
+        old = word_window_chunks(text)
+        dt_old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        offsets = token_offsets(text, tokenizer)
+        spans = chunk_spans(text, max_tokens, tokenizer=tokenizer, offsets=offsets)
+        dt_new = time.perf_counter() - t0
+
+        # tokens per chunk from the page's token offsets (no re-tokenizing)
+        lo = np.searchsorted(offsets[:, 0], spans[:, 0], side="left")
+        hi = np.searchsorted(offsets[:, 0], spans[:, 1], side="left")
+        over_new = int(((hi - lo) > max_tokens).sum())
+        over_old = sum(len(token_offsets(c, tokenizer)) > max_tokens for c in old[:200])
+
+        print(f"{mb:>6g} {'word window':>12} {size / dt_old:>7.1f} {len(old):>7} {over_old:>7}/{min(len(old), 200)}")
+        print(f"{mb:>6g} {'token spans':>12} {size / dt_new:>7.1f} {len(spans):>7} {over_new:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# benchmarks/bench_crawler.py
+"""
+Crawler throughput vs. concurrency against a local stand-in site.
+
+    python -m benchmarks.bench_crawler --pages 200 --latency 0.05
+"""
+import argparse
+import time
+
+from backend.crawler import crawl
+from tests.fixtures.site_server import serve_site
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=0.05, help="server latency per response (s)")
+    ap.add_argument("--delay", type=float, default=0.0, help="per-host politeness delay (s)")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = ap.parse_args()
+
+    with serve_site(num_pages=args.pages, latency=args.latency) as base:
+        print(f"{'concurrency':>11} {'pages':>6} {'seconds':>8} {'pages/s':>8}")
+        for c in args.concurrency:
+            t0 = time.perf_counter()
+            pages = crawl(base + "/", max_pages=args.pages, delay=args.delay, concurrency=c)
+            dt = time.perf_counter() - t0
+            print(f"{c:>11} {len(pages):>6} {dt:>8.2f} {len(pages) / dt:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Dedup report: embeddings saved by backend.dedup on a synthetic site with
+the usual duplication (?sort= / ?page= copies of the same listing and
+lightly edited reposts, all sharing a cookie / newsletter banner).
+
+    python -m benchmarks.bench_dedup --pages 2000 --copies 0.3 --edits 0.1
+
+Runs the indexer's page + chunk dedup logic without crawling or
+embedding and reports what would have been embedded with and without it.
+"""
+import argparse
+import random
+import time
+
+from backend.chunker import chunk_spans
+from backend.dedup import Deduper
+from tests.fixtures.site_server import WORDS
+
+BOILERPLATE = [
+    "Accept cookies We use cookies to improve your experience on this site",
+    "Sign up for our newsletter and get the weekly list of new releases in your inbox",
+]
+
+
+def make_pages(n, copies, edits, seed=0):
+    rng = random.Random(seed)
+    pages = []
+    for i in range(n):
+        r = rng.random()
+        if pages and r < copies:
+            # same listing under another query string
+            url, text = rng.choice(pages)
+            pages.append((f"{url}?sort={i}", text))
+            continue
+        if pages and r < copies + edits:
+            # repost with a couple of words changed
+            url, text = rng.choice(pages)
+            words = text.split(" ")
+            for _ in range(2):
+                words[rng.randrange(len(words))] = rng.choice(WORDS)
+            pages.append((f"https://example.test/repost/{i}", " ".join(words)))
+            continue
+        paras = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 200))) + "." for _ in range(6)]
+        pages.append((f"https://example.test/page/{i}", "\n\n".join(BOILERPLATE + paras)))
+    return pages
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=2000)
+    ap.add_argument("--copies", type=float, default=0.3, help="share of exact copies under another URL")
+    ap.add_argument("--edits", type=float, default=0.1, help="share of lightly edited copies")
+    ap.add_argument("--max-tokens", type=int, default=254)
+    args = ap.parse_args()
+
+    pages = make_pages(args.pages, args.copies, args.edits)
+    deduper = Deduper()
+    chunk_ids_of = {}
+    total = embedded = 0
+    t0 = time.perf_counter()
+    for url, text in pages:
+        spans = chunk_spans(text, args.max_tokens, tokenizer="words")
+        total += len(spans)
+        canonical = deduper.match_page(url, text)
+        if canonical is not None:
+            chunk_ids_of[url] = deduper.reuse_page(url, chunk_ids_of[canonical])
+            continue
+        ids = []
+        for i, (s, e) in enumerate(spans):
+            dup, h = deduper.match_chunk(text[s:e])
+            if dup is not None:
+                deduper.ref(dup, url)
+                ids.append(dup)
+                continue
+            deduper.add_chunk(f"{url}#{i}", h, url)
+            ids.append(f"{url}#{i}")
+            embedded += 1
+        chunk_ids_of[url] = ids
+    dt = time.perf_counter() - t0
+
+    report = deduper.report()
+    shared = max(deduper.chunks.values(), key=lambda c: len(c["urls"]))
+    print(f"pages:               {report['pages']}")
+    print(f"duplicate pages:     {report['dup_pages']}")
+    print(f"chunks without dedup {total}")
+    print(f"chunks embedded:     {embedded}")
+    print(f"embeddings saved:    {report['embeddings_saved']} ({report['saved_ratio']:.0%})")
+    print(f"most shared chunk:   {len(shared['urls'])} source URLs")
+    print(f"dedup time:          {dt * 1000 / len(pages):.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+End-to-end pipeline benchmark on a generated local site, with a JSON report.
+
+    python -m benchmarks.bench_e2e --pages 200 --queries 200 --out e2e.json
+
+Serves a synthetic site (tests.fixtures.site_server), runs index_site on it
+(crawl -> extract -> chunk -> dedup -> embed -> index), then answers
+--queries retrieval queries. Index and embedding cache live in a temp
+directory, so every run starts cold and runs are comparable. The report
+has the config, environment, index / query summaries and the per-stage
+timers, counters and memory high-water marks from backend.metrics; diff
+two reports to track regressions.
+"""
+import os
+import shutil
+import tempfile
+
+# keep runs self-contained: these are read when backend modules are imported
+_TMP = tempfile.mkdtemp(prefix="bench_e2e_")
+os.environ.setdefault("INDEX_DIR", os.path.join(_TMP, "index"))
+os.environ.setdefault("EMBED_CACHE_DIR", os.path.join(_TMP, "embed_cache"))
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+import random  # noqa: E402
+import subprocess  # noqa: E402
+import time  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from backend.embedder import embed_query, warm_up  # noqa: E402
+from backend.indexer import index_site  # noqa: E402
+from backend.metrics import METRICS  # noqa: E402
+from backend.retriever import get_retriever  # noqa: E402
+from tests.fixtures.site_server import WORDS, serve_site  # noqa: E402
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--paragraphs", type=int, default=8, help="paragraphs per page")
+    ap.add_argument("--latency", type=float, default=0.0, help="server latency per response (s)")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--parse-workers", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="e2e_report.json")
+    ap.add_argument("--keep", action="store_true", help="keep the temp index directory")
+    args = ap.parse_args()
+
+    report = {
+        "config": vars(args),
+        "env": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "commit": git_commit(),
+        },
+    }
+    try:
+        report["warm_up"] = warm_up()  # model load is reported, not charged to indexing
+        METRICS.reset()
+
+        with serve_site(num_pages=args.pages, latency=args.latency, paragraphs=args.paragraphs,
+                        seed=args.seed) as base:
+            t0 = time.perf_counter()
+            store, texts, _ = index_site(
+                base + "/", max_pages=args.pages, render=False, delay=0.0,
+                parse_workers=args.parse_workers,
+            )
+            index_s = time.perf_counter() - t0
+        counters = METRICS.snapshot()["counters"]
+        report["index"] = {
+            "seconds": index_s,
+            "pages": counters.get("pages", 0),
+            "chunks": len(texts),
+            "pages_per_s": counters.get("pages", 0) / index_s,
+            "vectors_per_s": counters.get("vectors", 0) / index_s,
+        }
+
+        rng = random.Random(args.seed)
+        queries = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) for _ in range(args.queries)]
+        retriever = get_retriever(store)
+        lat = []
+        t0 = time.perf_counter()
+        for q in queries:
+            t1 = time.perf_counter()
+            retriever.retrieve(q, embed_query(q), top_k=args.k)
+            lat.append((time.perf_counter() - t1) * 1000)
+        query_s = time.perf_counter() - t0
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        report["query"] = {"qps": len(queries) / query_s, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+        report["metrics"] = METRICS.snapshot()
+    finally:
+        if not args.keep:
+            shutil.rmtree(_TMP, ignore_errors=True)
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    idx, q = report["index"], report["query"]
+    print(f"index: {idx['pages']} pages, {idx['chunks']} chunks in {idx['seconds']:.2f}s "
+          f"({idx['pages_per_s']:.1f} pages/s, {idx['vectors_per_s']:.1f} vectors/s)")
+    print(f"query: {q['qps']:.1f} q/s, p50 {q['p50_ms']:.2f} ms, p95 {q['p95_ms']:.2f} ms, p99 {q['p99_ms']:.2f} ms")
+    print(f"{'stage':>16} {'calls':>7} {'total s':>8} {'mean ms':>9} {'max ms':>9} {'RSS MB':>7}")
+    for name, s in sorted(report["metrics"]["stages"].items(), key=lambda x: -x[1]["total_s"]):
+        print(f"{name:>16} {s['count']:>7} {s['total_s']:>8.2f} {s['mean_ms']:>9.2f} "
+              f"{s['max_ms']:>9.2f} {s['rss_peak_mb']:>7.0f}")
+    print(f"peak RSS {report['metrics']['rss_peak_mb']:.0f} MB; report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Chunks/sec of local embedding modes on chunk-like texts of mixed length.
+
+    python -m benchmarks.bench_embed --n 4000 --workers 2 4 --backends torch int8 onnx
+
+"baseline" is the old path: SentenceTransformer.encode in fixed batches
+of 64 in insertion order. The other rows use LocalEmbeddingEngine
+(length-sorted, token-budgeted batches) per backend, in-process and with
+worker processes. Each mode's vectors are compared with the baseline
+(min cosine), and all are checked to come back in input order.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from backend.embed_engine import LocalEmbeddingEngine
+from backend.embedder import LOCAL_MODEL
+from tests.fixtures.site_server import WORDS
+
+
+def make_texts(n, seed=0):
+    rng = random.Random(seed)
+    # mostly short chunks with a long tail, like real pages
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(min(int(rng.paretovariate(1.2) * 15), 250)))
+        for _ in range(n)
+    ]
+
+
+def min_cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return float((a * b).sum(axis=1).min())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=4000)
+    ap.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    ap.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    ap.add_argument("--token-budget", type=int, default=16_384)
+    args = ap.parse_args()
+
+    texts = make_texts(args.n)
+    model = SentenceTransformer(LOCAL_MODEL)
+    model.encode(texts[:64])  # warm up
+
+    t0 = time.perf_counter()
+    ref = np.vstack([
+        model.encode(texts[i:i + 64], batch_size=64, convert_to_numpy=True)
+        for i in range(0, len(texts), 64)
+    ])
+    base = len(texts) / (time.perf_counter() - t0)
+    print(f"{'mode':>22} {'chunks/s':>9} {'speedup':>8} {'min cos':>8}")
+    print(f"{'baseline':>22} {base:>9.1f} {'1.0x':>8} {1.0:>8.4f}")
+
+    for backend in args.backends:
+        for workers in [0] + args.workers:
+            try:
+                engine = LocalEmbeddingEngine(
+                    LOCAL_MODEL, backend=backend, workers=workers, token_budget=args.token_budget
+                )
+            except Exception as e:
+                print(f"{backend:>22} unavailable: {e}")
+                break
+            engine.encode(texts[:256])  # warm up (and start workers)
+            t0 = time.perf_counter()
+            vecs = engine.encode(texts)
+            cps = len(texts) / (time.perf_counter() - t0)
+            engine.close()
+            name = f"{backend} sorted" + (f" x{workers} procs" if workers else "")
+            print(f"{name:>22} {cps:>9.1f} {cps / base:>7.1f}x {min_cosine(ref, vecs):>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Single-pass lxml extraction (backend.extractor) vs. the BeautifulSoup
+html.parser path (cleaner.extract_text_and_meta + link extraction).
+
+    python -m benchmarks.bench_extract --pages 2000 --workers 1 2 4 8
+
+First checks that extract_page matches the BeautifulSoup output on a
+fixture corpus (generated site pages plus hand-written edge cases), then
+reports pages/sec for both parsers on one core and for extract_page on a
+ProcessPoolExecutor, with pages/sec per core.
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.extractor import extract_page
+from tests.fixtures.extract_corpus import BASE, FIXTURES, reference
+from tests.fixtures.site_server import make_page
+
+
+def _extract_all(args):
+    return [extract_page(html, url) for html, url in args]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=2000)
+    ap.add_argument("--paragraphs", type=int, default=8)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = ap.parse_args()
+
+    corpus = [(make_page(i, args.pages, args.paragraphs), f"{BASE}{i}") for i in range(args.pages)]
+
+    fixtures = FIXTURES + [html for html, _ in corpus[:200]]
+    matched = 0
+    for i, html in enumerate(fixtures):
+        url = f"{BASE}{i}"
+        ref, ours = reference(html, url), extract_page(html, url)
+        diff = [key for key in ("title", "description", "text", "links") if ref[key] != ours[key]]
+        for key in diff:
+            print(f"fixture {i} differs in {key}: {ref[key]!r} != {ours[key]!r}")
+        matched += not diff
+    print(f"equivalence: {matched}/{len(fixtures)} fixtures identical")
+
+    print(f"{'parser':>14} {'workers':>7} {'pages/s':>9} {'pages/s/core':>12} {'speedup':>8}")
+    t0 = time.perf_counter()
+    for html, url in corpus:
+        reference(html, url)
+    base = len(corpus) / (time.perf_counter() - t0)
+    print(f"{'html.parser':>14} {1:>7} {base:>9.1f} {base:>12.1f} {'1.0x':>8}")
+
+    t0 = time.perf_counter()
+    _extract_all(corpus)
+    pps = len(corpus) / (time.perf_counter() - t0)
+    print(f"{'lxml':>14} {1:>7} {pps:>9.1f} {pps:>12.1f} {pps / base:>7.1f}x")
+
+    chunk = 50
+    parts = [corpus[i:i + chunk] for i in range(0, len(corpus), chunk)]
+    for w in args.workers:
+        with ProcessPoolExecutor(w) as pool:
+            list(pool.map(_extract_all, parts[:w]))  # warm up workers
+            t0 = time.perf_counter()
+            list(pool.map(_extract_all, parts))
+            pps = len(corpus) / (time.perf_counter() - t0)
+        print(f"{'lxml (procs)':>14} {w:>7} {pps:>9.1f} {pps / w:>12.1f} {pps / base:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_metastore.py
+"""
+Cold-start load and hit-decoding cost of FaissStore metadata.
+
+    python -m benchmarks.bench_metastore --n 1000000
+
+Compares the columnar MetaStore against the old pretty-printed JSON
+sidecar (only for --json-max rows or fewer, since JSON gets slow).
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from backend.metastore import MetaStore
+from tests.fixtures.site_server import WORDS
+
+
+def make_metas(n, chunks_per_page=20, words=60, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        page = i // chunks_per_page
+        if i % chunks_per_page == 0:
+            description = f"Synthetic page {page} " + " ".join(rng.choices(WORDS, k=20))
+        yield {
+            "url": f"https://example.com/page/{page}",
+            "title": f"Page {page}",
+            "description": description,
+            "chunk_id": f"{i:032x}",
+            "text": " ".join(rng.choices(WORDS, k=words)),
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--words", type=int, default=60)
+    ap.add_argument("--hits", type=int, default=10)
+    ap.add_argument("--json-max", type=int, default=200_000)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        metas = list(make_metas(args.n, words=args.words))
+        store = MetaStore()
+        t0 = time.perf_counter()
+        for start in range(0, args.n, 64):
+            store.append(metas[start:start + 64])
+        t_append = time.perf_counter() - t0
+
+        path = os.path.join(tmp, "site.meta")
+        t0 = time.perf_counter()
+        store.save(path)
+        t_save = time.perf_counter() - t0
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+        t0 = time.perf_counter()
+        loaded = MetaStore.load(path)
+        t_load = time.perf_counter() - t0
+
+        rows = np.random.default_rng(0).integers(0, args.n, size=args.hits)
+        t0 = time.perf_counter()
+        hits = [loaded.get(int(r)) for r in rows]
+        t_hits = time.perf_counter() - t0
+        assert hits[0] == metas[rows[0]]
+
+        print(f"n={args.n}")
+        print(f"columnar  append {t_append:7.2f}s  save {t_save:7.2f}s  "
+              f"size {size / 2**20:8.1f} MB  load {t_load * 1000:8.1f} ms  "
+              f"decode {args.hits} hits {t_hits * 1000:.2f} ms")
+
+        if args.n <= args.json_max:
+            jpath = os.path.join(tmp, "site.meta.json")
+            t0 = time.perf_counter()
+            with open(jpath, "w", encoding="utf-8") as f:
+                json.dump(dict(enumerate(metas)), f, ensure_ascii=False, indent=2)
+            t_save = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            with open(jpath, "r", encoding="utf-8") as f:
+                {int(k): v for k, v in json.load(f).items()}
+            t_load = time.perf_counter() - t0
+            print(f"json                     save {t_save:7.2f}s  "
+                  f"size {os.path.getsize(jpath) / 2**20:8.1f} MB  load {t_load * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+FaissStore page refresh and compaction cost vs. a full rebuild.
+
+    python -m benchmarks.bench_mutations --n 200000 --chunks-per-page 20 --refresh 500
+
+Refreshes `--refresh` random pages (remove_urls + add, new vectors) and
+times it per page against rebuilding the whole store, then compacts and
+checks that top-k results equal an exact search over the live vectors.
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from backend.vectordb import FaissStore
+from benchmarks.bench_ann import make_vectors
+
+
+def page_metas(page, per_page, gen):
+    url = f"https://example.com/p{page}"
+    return [{"chunk_id": f"{url}#{gen}-{j}", "url": url, "text": ""} for j in range(per_page)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--chunks-per-page", type=int, default=20)
+    ap.add_argument("--refresh", type=int, default=500, help="pages to re-index")
+    ap.add_argument("--type", default="flat")
+    ap.add_argument("--k", type=int, default=10)
+    args = ap.parse_args()
+
+    per = args.chunks_per_page
+    n_pages = args.n // per
+    xb = make_vectors(n_pages * per, args.dim)
+    metas = [m for p in range(n_pages) for m in page_metas(p, per, 0)]
+
+    t0 = time.perf_counter()
+    store = FaissStore(dim=args.dim, index_type=args.type)
+    store.add(xb, metas)
+    store.build()
+    full_s = time.perf_counter() - t0
+
+    rng = np.random.default_rng(0)
+    pages = rng.choice(n_pages, size=min(args.refresh, n_pages), replace=False)
+    fresh = make_vectors(len(pages) * per, args.dim, seed=2)
+    live = {m["chunk_id"]: xb[i] for i, m in enumerate(metas)}
+    t0 = time.perf_counter()
+    for j, p in enumerate(pages):
+        url = f"https://example.com/p{p}"
+        for cid in store.chunk_ids_for_url(url):
+            live.pop(cid)
+        store.remove_urls([url])
+        new = page_metas(p, per, 1)
+        vecs = fresh[j * per:(j + 1) * per]
+        store.add(vecs, new)
+        live.update({m["chunk_id"]: v for m, v in zip(new, vecs)})
+    refresh_s = (time.perf_counter() - t0) / len(pages)
+
+    dead = store.dead_fraction
+    t0 = time.perf_counter()
+    reclaimed = store.compact()
+    compact_s = time.perf_counter() - t0
+
+    ids = list(live)
+    exact = faiss.IndexFlatIP(args.dim)
+    exact.add(np.stack([live[c] for c in ids]))
+    xq = make_vectors(200, args.dim, seed=1)
+    _, gt = exact.search(xq, args.k)
+    hits = sum(
+        len({r["meta"]["chunk_id"] for r in res} & {ids[i] for i in row})
+        for res, row in zip(store.search_batch(xq, k=args.k), gt)
+    )
+
+    print(f"n={len(xb)} pages={n_pages} type={store.kind}")
+    print(f"full build        {full_s * 1000:>10.1f} ms")
+    print(f"refresh one page  {refresh_s * 1000:>10.3f} ms  ({full_s / refresh_s:,.0f}x cheaper)")
+    print(f"compact           {compact_s * 1000:>10.1f} ms  ({reclaimed} rows, {dead:.1%} dead)")
+    print(f"recall@{args.k} after   {hits / (len(xq) * args.k):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
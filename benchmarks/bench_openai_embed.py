@@ -0,0 +1,52 @@
+"""
+OpenAIEmbedder throughput vs. concurrency against the local mock endpoint.
+
+    python -m benchmarks.bench_openai_embed --n 20000 --latency 0.2 --errors 0.05 --dimensions 256
+
+Every run checks that vectors come back in input order and match the
+mock's deterministic (Matryoshka-truncated) vectors, and reports
+requests, 429s retried and texts/sec.
+"""
+import argparse
+import time
+
+import numpy as np
+from openai import OpenAI
+
+from backend.openai_embed import OpenAIEmbedder
+from tests.fixtures.mock_openai import fake_embedding, serve_openai
+from tests.fixtures.site_server import WORDS
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20_000)
+    ap.add_argument("--latency", type=float, default=0.2, help="mock latency per request (s)")
+    ap.add_argument("--errors", type=float, default=0.05, help="share of requests answered with 429")
+    ap.add_argument("--dimensions", type=int, default=256)
+    ap.add_argument("--items", type=int, default=512, help="inputs per request")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = ap.parse_args()
+
+    texts = [f"chunk {i} " + " ".join(WORDS[(i + j) % len(WORDS)] for j in range(40)) for i in range(args.n)]
+    check = np.stack([fake_embedding(t, 3072)[:args.dimensions] for t in texts[:50]])
+    check /= np.linalg.norm(check, axis=1, keepdims=True)
+
+    print(f"{'concurrency':>11} {'requests':>8} {'429s':>5} {'seconds':>8} {'texts/s':>9} {'ok':>3}")
+    for c in args.concurrency:
+        with serve_openai(latency=args.latency, error_rate=args.errors) as (base_url, state):
+            client = OpenAI(api_key="test", base_url=base_url)
+            embedder = OpenAIEmbedder(
+                client, "text-embedding-3-large", dimensions=args.dimensions,
+                concurrency=c, max_items=args.items, backoff=0.05,
+            )
+            t0 = time.perf_counter()
+            vecs = embedder.embed(texts)
+            dt = time.perf_counter() - t0
+            ok = vecs.shape == (args.n, args.dimensions) and np.allclose(vecs[:50], check, atol=1e-5)
+            print(f"{c:>11} {state['requests']:>8} {state['rate_limited']:>5} {dt:>8.2f} "
+                  f"{args.n / dt:>9.1f} {'yes' if ok else 'NO':>3}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Headless rendering of client-side pages: a fresh browser per URL (the old
+fetch_selenium behaviour, minus its fixed sleeps) vs. the warm RenderPool.
+
+    python -m benchmarks.bench_render --pages 40 --sizes 1 2 4
+
+Serves a local site whose pages build their content with JS, checks that
+the static HTML is detected as needing rendering and that rendered pages
+contain the real text, then reports pages/sec. Needs Chrome installed.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from backend.extractor import extract_page
+from backend.renderer import MIN_TEXT_LEN, RenderPool, needs_render
+from tests.fixtures.site_server import serve_site
+
+
+def check(url, html):
+    text = extract_page(html, url)["text"]
+    if len(text) < MIN_TEXT_LEN:
+        raise SystemExit(f"{url}: rendered page has only {len(text)} chars of text")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=40)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--cold", type=int, default=5, help="pages rendered with a fresh browser each")
+    args = ap.parse_args()
+
+    with serve_site(num_pages=args.pages, js=True) as base:
+        urls = [f"{base}/page/{i}" for i in range(args.pages)]
+        static = requests.get(urls[0], timeout=10).text
+        print(f"static shell needs rendering: {needs_render(static)}")
+
+        t0 = time.perf_counter()
+        for url in urls[:args.cold]:
+            pool = RenderPool(size=1)
+            check(url, pool.render(url))
+            pool.close()
+        cold = args.cold / (time.perf_counter() - t0)
+        print(f"{'mode':>10} {'pages/s':>8} {'speedup':>8}")
+        print(f"{'cold':>10} {cold:>8.2f} {'1.0x':>8}")
+
+        for size in args.sizes:
+            pool = RenderPool(size=size)
+            with ThreadPoolExecutor(size) as ex:
+                list(ex.map(pool.render, urls[:size]))  # start the browsers
+                t0 = time.perf_counter()
+                for url, html in zip(urls, ex.map(pool.render, urls)):
+                    check(url, html)
+                pps = len(urls) / (time.perf_counter() - t0)
+            pool.close()
+            print(f"{'pool=' + str(size):>10} {pps:>8.2f} {pps / cold:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_retrieval_batch.py
+"""
+Queries/sec of HybridRetriever.retrieve (one at a time) vs. retrieve_batch
+at growing batch sizes, on a synthetic corpus with random unit vectors.
+
+    python -m benchmarks.bench_retrieval_batch --n 100000 --batches 1 8 32 128
+
+Query embedding is excluded (qvecs are passed in) so only BM25 + FAISS +
+fusion is measured.
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from backend.retriever import HybridRetriever
+from backend.vectordb import FaissStore
+from benchmarks.bench_bm25 import make_corpus, make_queries
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=256)
+    ap.add_argument("--batches", type=int, nargs="+", default=[1, 8, 32, 128])
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    texts = [" ".join(doc) for doc in make_corpus(args.n, doc_len=60)]
+    vecs = rng.standard_normal((args.n, args.dim)).astype("float32")
+    faiss.normalize_L2(vecs)
+    store = FaissStore(dim=args.dim, index_type="flat")
+    store.add(vecs, [{"chunk_id": str(i), "text": t} for i, t in enumerate(texts)])
+    retriever = HybridRetriever(store, texts, rows=np.arange(args.n))
+
+    queries = [" ".join(q) for q in make_queries(args.queries)]
+    qvecs = rng.standard_normal((args.queries, args.dim)).astype("float32")
+    faiss.normalize_L2(qvecs)
+
+    t0 = time.perf_counter()
+    single = [retriever.retrieve(q, qvecs[i:i + 1], top_k=args.k) for i, q in enumerate(queries)]
+    base_qps = len(queries) / (time.perf_counter() - t0)
+    print(f"n={args.n} dim={args.dim} k={args.k}")
+    print(f"{'mode':>14} {'q/s':>9} {'speedup':>8}")
+    print(f"{'retrieve':>14} {base_qps:>9.1f} {'1.0x':>8}")
+
+    for bs in args.batches:
+        out = []
+        t0 = time.perf_counter()
+        for start in range(0, len(queries), bs):
+            out += retriever.retrieve_batch(
+                queries[start:start + bs], qvecs[start:start + bs], top_k=args.k
+            )
+        qps = len(queries) / (time.perf_counter() - t0)
+        same = all(
+            [r["meta"]["chunk_id"] for r in a] == [r["meta"]["chunk_id"] for r in b]
+            for a, b in zip(single, out)
+        )
+        print(f"{'batch=' + str(bs):>14} {qps:>9.1f} {qps / base_qps:>7.1f}x" + ("" if same else "  (MISMATCH)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Cold-start cost of the embedding path, each case in a fresh interpreter.
+
+    python -m benchmarks.bench_startup --runs 3
+
+  import        `import backend.embedder` (and whether torch got imported)
+  first query   embed_query() with nothing loaded: import + model load + encode
+  warm query    embed_query() of a new query after warm_up()
+  repeat query  the same query again (served by the query LRU)
+
+Medians over --runs processes.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+SNIPPETS = {
+    "import": """
+import json, sys, time
+t0 = time.perf_counter()
+import backend.embedder
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000, "torch": "torch" in sys.modules}))
+""",
+    "first query": """
+import json, time
+from backend.embedder import embed_query
+t0 = time.perf_counter()
+embed_query("how do I reset my password")
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000}))
+""",
+    "warm query": """
+import json, time
+from backend.embedder import embed_query, warm_up
+w = warm_up()
+t0 = time.perf_counter()
+embed_query("how do I reset my password")
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000, "warm_up_s": w["import_s"] + w["load_s"]}))
+""",
+    "repeat query": """
+import json, time
+from backend.embedder import embed_query, warm_up
+warm_up()
+embed_query("how do I reset my password")
+t0 = time.perf_counter()
+embed_query("how do I reset my password")
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000}))
+""",
+}
+
+
+def run(snippet: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'case':>13} {'ms':>9}  notes")
+    for name, snippet in SNIPPETS.items():
+        results = [run(snippet) for _ in range(args.runs)]
+        ms = statistics.median(r["ms"] for r in results)
+        notes = ""
+        if "torch" in results[0]:
+            notes = "torch imported" if results[0]["torch"] else "torch not imported"
+        if "warm_up_s" in results[0]:
+            notes = f"after {statistics.median(r['warm_up_s'] for r in results):.1f}s warm-up"
+        print(f"{name:>13} {ms:>9.1f}  {notes}")
+
+
+if __name__ == "__main__":
+    main()
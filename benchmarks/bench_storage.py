@@ -0,0 +1,60 @@
+"""
+Recall@k and memory of FaissStore vector storage modes vs. float32.
+
+    python -m benchmarks.bench_storage --n 200000 --dim 384 --types flat hnsw
+
+Vectors are the clustered synthetic set from bench_ann. Ground truth is
+exact float32 search. "MB" is the serialized index; "RAM MB" is what has
+to stay resident (for binary, only the sign codes: the float16 re-rank
+copies are read on demand when loaded with mmap=True).
+"""
+import argparse
+import time
+
+import faiss
+
+from backend.vectordb import STORAGE_TYPES, FaissStore
+from benchmarks.bench_ann import index_bytes, make_vectors, run
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--types", nargs="+", default=["flat", "hnsw"])
+    ap.add_argument("--storage", nargs="+", default=list(STORAGE_TYPES))
+    ap.add_argument("--rerank", type=int, default=8)
+    args = ap.parse_args()
+
+    xb = make_vectors(args.n, args.dim)
+    xq = make_vectors(args.queries, args.dim, seed=1)
+    metas = [{"chunk_id": str(i)} for i in range(args.n)]
+
+    flat = faiss.IndexFlatIP(args.dim)
+    flat.add(xb)
+    _, gt = flat.search(xq, args.k)
+    truth = [set(map(str, row)) for row in gt]
+    base_mb = index_bytes(flat) / 2**20
+
+    print(f"n={args.n} dim={args.dim} k={args.k} float32 flat = {base_mb:.1f} MB")
+    print(f"{'type':>6} {'storage':>8} {'recall@k':>9} {'ms/query':>9} {'MB':>8} {'RAM MB':>8} {'smaller':>8}")
+    for kind in args.types:
+        for storage in args.storage:
+            store = FaissStore(dim=args.dim, index_type=kind, storage=storage, rerank=args.rerank)
+            t0 = time.perf_counter()
+            store.add(xb, metas)
+            store.build()
+            build_s = time.perf_counter() - t0
+            recall, ms = run(store, xq, truth, args.k)
+            mb = index_bytes(store.index) / 2**20
+            resident = args.n * args.dim / 8 / 2**20 if store.storage_kind == "binary" else mb
+            print(
+                f"{store.kind:>6} {store.storage_kind:>8} {recall:>9.3f} {ms:>9.3f} "
+                f"{mb:>8.1f} {resident:>8.1f} {base_mb / resident:>7.1f}x  (build {build_s:.1f}s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
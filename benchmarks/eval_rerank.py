@@ -0,0 +1,98 @@
+"""
+Cross-encoder reranking: quality vs. candidate pool size and latency.
+
+    python -m benchmarks.eval_rerank --site https://example.com/docs --queries qrels.jsonl \
+        --pools 10 20 50 100 --budgets 0 50 150 --backends torch int8 --k 5
+
+qrels.jsonl as for eval_retrieval. The "none" row is first-stage hybrid
+retrieval alone; the others rerank `pool` candidates under a per-query
+budget in ms (0 = unlimited). Reports recall@k, MRR@k, rerank latency
+p50/p95 and how many candidates were actually scored on average.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.catalog import index_path_for
+from backend.embedder import embed_queries
+from backend.reranker import CrossEncoderReranker, retrieve_reranked
+from backend.retriever import HybridRetriever
+from backend.vectordb import FaissStore
+from benchmarks.eval_retrieval import load_qrels
+
+
+def score(hits, rel):
+    found, rr = set(), 0.0
+    for rank, r in enumerate(hits, 1):
+        labels = {r["meta"].get("chunk_id"), r["meta"].get("url")} & rel
+        if labels and not found:
+            rr = 1.0 / rank
+        found |= labels
+    return (len(found) / len(rel) if rel else 0.0), rr
+
+
+def run(retriever, reranker, queries, qvecs, relevant, k, pool, budget):
+    recall = mrr = scored = 0.0
+    rerank_ms, total_ms = [], []
+    for i, (query, rel) in enumerate(zip(queries, relevant)):
+        t0 = time.perf_counter()
+        if reranker is None:
+            hits = retriever.retrieve(query, qvecs[i:i + 1], top_k=k)
+        else:
+            timings = {}
+            hits = retrieve_reranked(
+                retriever, reranker, query, qvecs[i:i + 1], top_k=k, pool=pool, budget_ms=budget,
+                timings=timings,
+            )
+            rerank_ms.append(timings["rerank_ms"])
+            scored += timings["reranked"]
+        total_ms.append((time.perf_counter() - t0) * 1000)
+        r, rr = score(hits, rel)
+        recall += r
+        mrr += rr
+    n = len(queries)
+    p50, p95 = np.percentile(rerank_ms, [50, 95]) if rerank_ms else (0.0, 0.0)
+    return recall / n, mrr / n, p50, p95, float(np.mean(total_ms)), scored / n
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--site", help="root URL of an indexed site (see backend.catalog)")
+    ap.add_argument("--index", help="index path, instead of --site")
+    ap.add_argument("--queries", required=True)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--pools", type=int, nargs="+", default=[10, 20, 50, 100])
+    ap.add_argument("--budgets", type=float, nargs="+", default=[0, 150])
+    ap.add_argument("--backends", nargs="+", default=["torch"])
+    args = ap.parse_args()
+    if not (args.site or args.index):
+        ap.error("--site or --index is required")
+    args.index = args.index or index_path_for(args.site)
+
+    store = FaissStore(dim=384, index_path=args.index)
+    if not store.load():
+        raise SystemExit(f"no index at {args.index}")
+    retriever = HybridRetriever.from_store(store)
+    queries, relevant = load_qrels(args.queries)
+    qvecs = embed_queries(queries, provider="local")
+
+    print(f"{len(queries)} queries, {len(store.metadata)} chunks, k={args.k}")
+    print(f"{'backend':>7} {'pool':>5} {'budget':>6} {f'recall@{args.k}':>9} {'MRR':>6} "
+          f"{'rr p50':>7} {'rr p95':>7} {'ms/query':>8} {'scored':>6}")
+    recall, mrr, _, _, ms, _ = run(retriever, None, queries, qvecs, relevant, args.k, 0, 0)
+    print(f"{'none':>7} {'-':>5} {'-':>6} {recall:>9.3f} {mrr:>6.3f} {'-':>7} {'-':>7} {ms:>8.2f} {'-':>6}")
+    for backend in args.backends:
+        reranker = CrossEncoderReranker(backend=backend)
+        reranker.score("warm up", ["warm up"])
+        for pool in args.pools:
+            for budget in args.budgets:
+                recall, mrr, p50, p95, ms, scored = run(
+                    retriever, reranker, queries, qvecs, relevant, args.k, pool, budget
+                )
+                print(f"{backend:>7} {pool:>5} {budget:>6.0f} {recall:>9.3f} {mrr:>6.3f} "
+                      f"{p50:>7.1f} {p95:>7.1f} {ms:>8.2f} {scored:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Offline retrieval quality vs. latency for fusion methods and candidate depths.
+
+    python -m benchmarks.eval_retrieval --site https://example.com/docs --queries qrels.jsonl \
+        --fusions rrf minmax zscore weighted --depths 5 20 50 100 --k 5
+
+qrels.jsonl has one labelled query per line:
+
+    {"query": "how do I reset my password", "relevant": ["<chunk_id or url>", ...]}
+
+A hit counts as relevant if its chunk_id or its url is listed. Reports
+recall@k, MRR@k and mean retrieve() latency (query embedding excluded;
+all queries are embedded once up front).
+"""
+import argparse
+import json
+import time
+
+from backend.catalog import index_path_for
+from backend.embedder import embed_queries
+from backend.retriever import HybridRetriever
+from backend.vectordb import FaissStore
+
+
+def load_qrels(path):
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [r["query"] for r in rows], [set(r["relevant"]) for r in rows]
+
+
+def evaluate(retriever, queries, qvecs, relevant, k, fusion, depth, mix_weight=0.5):
+    recall = mrr = 0.0
+    t0 = time.perf_counter()
+    for i, (query, rel) in enumerate(zip(queries, relevant)):
+        hits = retriever.retrieve(
+            query, qvecs[i:i + 1], top_k=k, mix_weight=mix_weight, fusion=fusion, depth=depth
+        )
+        found = set()
+        for rank, r in enumerate(hits, 1):
+            labels = {r["meta"].get("chunk_id"), r["meta"].get("url")} & rel
+            if labels and not found:
+                mrr += 1.0 / rank
+            found |= labels
+        recall += len(found) / len(rel) if rel else 0.0
+    ms = (time.perf_counter() - t0) / len(queries) * 1000
+    return recall / len(queries), mrr / len(queries), ms
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--site", help="root URL of an indexed site (see backend.catalog)")
+    ap.add_argument("--index", help="index path, instead of --site")
+    ap.add_argument("--queries", required=True)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--fusions", nargs="+", default=["rrf", "minmax", "zscore", "weighted"])
+    ap.add_argument("--depths", type=int, nargs="+", default=[5, 20, 50, 100])
+    ap.add_argument("--mix-weight", type=float, default=0.5)
+    args = ap.parse_args()
+    if not (args.site or args.index):
+        ap.error("--site or --index is required")
+    args.index = args.index or index_path_for(args.site)
+
+    store = FaissStore(dim=384, index_path=args.index)
+    if not store.load():
+        raise SystemExit(f"no index at {args.index}")
+    retriever = HybridRetriever.from_store(store)
+    queries, relevant = load_qrels(args.queries)
+    qvecs = embed_queries(queries, provider="local")
+
+    print(f"{len(queries)} queries, {len(store.metadata)} chunks, k={args.k}")
+    print(f"{'fusion':>9} {'depth':>6} {f'recall@{args.k}':>9} {'MRR':>6} {'ms/query':>9}")
+    for fusion in args.fusions:
+        for depth in args.depths:
+            recall, mrr, ms = evaluate(
+                retriever, queries, qvecs, relevant, args.k, fusion, depth, args.mix_weight
+            )
+            print(f"{fusion:>9} {depth:>6} {recall:>9.3f} {mrr:>6.3f} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Latency of the HTTP service under concurrent users.
+
+    uvicorn backend.service:app --port 8000 &
+    python -m benchmarks.load_test --site https://example.com/docs --users 1 8 32 --requests 200
+
+Each simulated user sends requests back to back (no think time) to
+/query, /query/batch or /answer (stream read to the end). Reports
+throughput and p50/p95/p99 latency per concurrency level; for /answer,
+"first" is the time to the first streamed event.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from tests.fixtures.site_server import WORDS
+
+DEFAULT_QUERIES = [
+    "what is this page about",
+    "summarize the main points",
+    "how does it work",
+    "who is it for",
+    "what are the requirements",
+    "list the key examples",
+]
+
+
+def make_queries(n, path=None):
+    if path:
+        with open(path, encoding="utf-8") as f:
+            base = [line.strip() for line in f if line.strip()]
+    else:
+        base = DEFAULT_QUERIES + [f"{WORDS[i % len(WORDS)]} {WORDS[(i * 7) % len(WORDS)]}" for i in range(50)]
+    return [base[i % len(base)] for i in range(n)]
+
+
+def one_request(session, base, endpoint, site, query, top_k, batch):
+    t0 = time.perf_counter()
+    first = None
+    if endpoint == "batch":
+        r = session.post(f"{base}/query/batch", json={"site": site, "queries": [query] * batch, "top_k": top_k})
+    elif endpoint == "answer":
+        r = session.post(
+            f"{base}/answer", json={"site": site, "query": query, "top_k": top_k}, stream=True
+        )
+        for line in r.iter_lines():
+            if line and first is None:
+                first = time.perf_counter() - t0
+    else:
+        r = session.post(f"{base}/query", json={"site": site, "query": query, "top_k": top_k})
+    r.content  # drain
+    return time.perf_counter() - t0, first, r.status_code < 400
+
+
+def run_level(args, users, queries):
+    local = threading.local()
+
+    def task(q):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return one_request(local.session, args.url, args.endpoint, args.site, q, args.k, args.batch)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(users) as ex:
+        results = list(ex.map(task, queries))
+    wall = time.perf_counter() - t0
+    lat = np.array([r[0] for r in results]) * 1000
+    firsts = np.array([r[1] for r in results if r[1] is not None]) * 1000
+    errors = sum(not r[2] for r in results)
+    return wall, lat, firsts, errors
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--site", required=True, help="root URL of an indexed site")
+    ap.add_argument("--endpoint", choices=["query", "batch", "answer"], default="query")
+    ap.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    ap.add_argument("--batch", type=int, default=16, help="queries per /query/batch request")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--queries", help="file with one query per line")
+    ap.add_argument("--warmup", type=int, default=5)
+    args = ap.parse_args()
+    args.url = args.url.rstrip("/")
+
+    queries = make_queries(args.requests, args.queries)
+    run_level(args, 1, queries[:args.warmup])  # load the index and model
+
+    print(f"endpoint=/{args.endpoint} site={args.site} requests={args.requests}")
+    print(f"{'users':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'first p50':>9} {'errors':>6}")
+    for users in args.users:
+        wall, lat, firsts, errors = run_level(args, users, queries)
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        first = f"{np.percentile(firsts, 50):>9.1f}" if len(firsts) else f"{'-':>9}"
+        print(f"{users:>5} {len(lat) / wall:>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {first} {errors:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# tests/fixtures/extract_corpus.py
+"""
+Edge-case HTML for the extractor and the BeautifulSoup path it replaced
+(reference()), which extract_page must match.
+"""
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from backend.cleaner import extract_text_and_meta
+from backend.utils import normalize_url
+
+BASE = "http://example.test/page/"
+
+FIXTURES = [
+    "<html><head><title> Spaced  title </title></head><body><p>one</p></body></html>",
+    '<html><head><meta name="description" content="  desc  "></head>'
+    "<body><header><p>skip me</p></header><main><h2>Head</h2><p>keep <b>bold</b> text</p>"
+    "</main><footer><a href='/f'>foot</a></footer></body></html>",
+    "<ul><li>outer <ul><li>inner</li></ul></li></ul><p>a &amp; b <!-- hidden --> c</p>",
+    "<p>x<script>var a = 1;</script>y</p><style>p {}</style><noscript>n</noscript>",
+    '<a href="mailto:a@b.c">m</a><a href="tel:1">t</a><a href=" rel#frag ">r</a><a>none</a>',
+    "<?xml version='1.0' encoding='utf-8'?><html><body><h1>decl</h1></body></html>",
+    "<html><body><nav><a href='/n'>n</a></nav><iframe src='x'></iframe><h3>  </h3></body></html>",
+    "",
+]
+
+
+def reference(html, url):
+    """The pre-extractor path: two html.parser parses per page."""
+    out = extract_text_and_meta(html, url)
+    links = set()
+    for a in BeautifulSoup(html, "html.parser").find_all("a", href=True):
+        href = a["href"].strip()
+        if href.startswith("mailto:") or href.startswith("tel:"):
+            continue
+        links.add(normalize_url(urljoin(url, href)))
+    out["links"] = links
+    return out
@@ -0,0 +1,117 @@
+# tests/fixtures/mock_openai.py
+"""
+Local stand-in for the OpenAI embeddings endpoint (POST /v1/embeddings).
+
+Returns deterministic unit vectors per input text (full `dim` or the
+requested `dimensions`, Matryoshka-style prefix + renormalise), in float
+or base64 encoding like the real API. Enforces the per-request item
+limit and can inject latency and 429s (with Retry-After) to exercise
+retry and rate limiting.
+"""
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def fake_embedding(text: str, dim: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    v = np.random.default_rng(seed).standard_normal(dim).astype("float32")
+    return v / np.linalg.norm(v)
+
+
+def _make_handler(state, dim, latency, error_rate, max_items, seed):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with lock:
+                state["requests"] += 1
+                fail = rng.random() < error_rate
+            if latency:
+                time.sleep(latency)
+            if self.path.rstrip("/") != "/v1/embeddings":
+                return self._send(404, {"error": {"message": "not found"}})
+            if fail:
+                with lock:
+                    state["rate_limited"] += 1
+                return self._send(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                                  {"Retry-After": "0.05"})
+            inputs = body.get("input")
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            if not inputs or len(inputs) > max_items:
+                return self._send(400, {"error": {"message": f"input must have 1..{max_items} items"}})
+
+            full = np.stack([fake_embedding(t, dim) for t in inputs])
+            n = body.get("dimensions") or dim
+            vecs = full[:, :n] / np.linalg.norm(full[:, :n], axis=1, keepdims=True)
+            b64 = body.get("encoding_format") == "base64"
+            data = [
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": base64.b64encode(v.astype("<f4").tobytes()).decode() if b64 else v.tolist(),
+                }
+                for i, v in enumerate(vecs)
+            ]
+            tokens = sum(len(t.split()) for t in inputs)
+            with lock:
+                state["inputs"] += len(inputs)
+            self._send(200, {
+                "object": "list",
+                "data": data,
+                "model": body.get("model"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            })
+
+        def _send(self, status, payload, headers=None):
+            raw = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@contextmanager
+def serve_openai(
+    dim: int = 3072,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    max_items: int = 2048,
+    seed: int = 0,
+):
+    """
+    Yields (base_url, state) for a running mock; base_url ends in /v1 and
+    can be passed as the OpenAI client's base_url. state counts
+    "requests", "rate_limited" and "inputs".
+    """
+    state = {"requests": 0, "rate_limited": 0, "inputs": 0}
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), _make_handler(state, dim, latency, error_rate, max_items, seed)
+    )
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/v1", state
+    finally:
+        server.shutdown()
+        server.server_close()
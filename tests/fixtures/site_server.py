@@ -0,0 +1,112 @@
+# tests/fixtures/site_server.py
+"""
+Local stand-in website for tests and benchmarks.
+
+Serves `num_pages` generated HTML pages under /page/<i>, each linking to a
+few others, with an optional per-response latency to mimic a real server.
+Pages carry ETags and answer If-None-Match with 304.
+
+With js=True the page body is an empty shell whose script fetches the
+real content from /api/page/<i> after a short delay, like a client-side
+rendered site.
+"""
+import hashlib
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "film director actor scene camera story review rating list cinema drama "
+    "comedy festival award script studio release audience critic genre plot "
+    "character sequel classic score editing premiere documentary animation"
+).split()
+
+
+def make_body(i: int, num_pages: int, paragraphs: int = 8, seed: int = 0) -> str:
+    rng = random.Random(seed * 1_000_003 + i)
+    links = "".join(
+        f'<li><a href="/page/{rng.randrange(num_pages)}">link</a></li>' for _ in range(5)
+    )
+    links += f'<li><a href="/page/{(i + 1) % num_pages}">next</a></li>'
+    body = "".join(
+        "<p>" + " ".join(rng.choice(WORDS) for _ in range(80)) + "</p>"
+        for _ in range(paragraphs)
+    )
+    return f"<nav><ul>{links}</ul></nav><h1>Page {i}</h1>{body}"
+
+
+def make_page(i: int, num_pages: int, paragraphs: int = 8, seed: int = 0, js: bool = False) -> str:
+    if js:
+        body = (
+            '<div id="app"></div><script>setTimeout(() => fetch("/api/page/%d")'
+            '.then(r => r.text()).then(h => { app.innerHTML = h; }), 100);</script>' % i
+        )
+    else:
+        body = make_body(i, num_pages, paragraphs, seed)
+    return (
+        f"<html><head><title>Page {i}</title>"
+        f'<meta name="description" content="Synthetic page {i}"></head>'
+        f"<body>{body}</body></html>"
+    )
+
+
+def _make_handler(num_pages, latency, paragraphs, seed, js=False):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            if self.path == "/robots.txt":
+                return self._send(404, b"")
+            parts = self.path.strip("/").split("/")
+            if (
+                js and len(parts) == 3 and parts[:2] == ["api", "page"]
+                and parts[2].isdigit() and int(parts[2]) < num_pages
+            ):
+                return self._send(200, make_body(int(parts[2]), num_pages, paragraphs, seed).encode())
+            if self.path in ("/", "") or (
+                len(parts) == 2 and parts[0] == "page" and parts[1].isdigit()
+                and int(parts[1]) < num_pages
+            ):
+                i = int(parts[1]) if len(parts) == 2 else 0
+                body = make_page(i, num_pages, paragraphs, seed, js).encode()
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, b"", etag)
+                return self._send(200, body, etag)
+            return self._send(404, b"")
+
+        def _send(self, status, body, etag=None):
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@contextmanager
+def serve_site(
+    num_pages: int = 200, latency: float = 0.0, paragraphs: int = 8, seed: int = 0, js: bool = False
+):
+    """Yields the base URL of a running local site; shuts it down on exit."""
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), _make_handler(num_pages, latency, paragraphs, seed, js)
+    )
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,80 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from backend import answer_cache  # noqa: E402
+from backend.answer_cache import AnswerCache, normalize_query  # noqa: E402
+
+NS = ("site-a", "v1", False, 5)
+
+
+def vec(*head, dim=8):
+    v = np.zeros(dim, dtype="float32")
+    v[:len(head)] = head
+    return v
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_exact_hits_ignore_case_and_punctuation():
+    cache = AnswerCache()
+    cache.put(NS, "How do I reset my password?", vec(1), "answer")
+    assert normalize_query("  how do I reset   my PASSWORD ") == "how do i reset my password"
+    assert cache.exact(NS, "how do i reset my password") == "answer"
+    assert cache.exact(NS, "how do I change my password?") is None
+    assert cache.exact(NS[:3] + (10,), "how do i reset my password") is None  # other top_k
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_semantic_hits_respect_the_threshold():
+    cache = AnswerCache(threshold=0.9)
+    cache.put(NS, "reset password", vec(1, 0), "answer")
+    value, sim = cache.similar(NS, vec(1, 0.3))  # cosine ~0.958
+    assert value == "answer" and sim == pytest.approx(1 / np.sqrt(1.09), abs=1e-6)
+    value, sim = cache.similar(NS, vec(1, 0.6))  # cosine ~0.857
+    assert value is None and sim == pytest.approx(1 / np.sqrt(1.36), abs=1e-6)
+    assert cache.similar(("site-b", "v1", False, 5), vec(1, 0)) == (None, 0.0)
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = AnswerCache(ttl=60)
+    cache.put(NS, "q", vec(1), "answer")
+    clock[0] += 59
+    assert cache.exact(NS, "q") == "answer"
+    clock[0] += 2
+    assert cache.exact(NS, "q") is None
+    assert cache.similar(NS, vec(1)) == (None, 0.0)  # gone from the vector index too
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_are_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.put(NS, "one", vec(1, 0, 0), 1)
+    cache.put(NS, "two", vec(0, 1, 0), 2)
+    assert cache.exact(NS, "one") == 1  # now most recently used
+    cache.put(NS, "three", vec(0, 0, 1), 3)
+    assert cache.exact(NS, "two") is None and cache.similar(NS, vec(0, 1, 0))[0] is None
+    assert cache.exact(NS, "one") == 1 and cache.exact(NS, "three") == 3
+
+
+def test_new_site_version_invalidates_old_entries():
+    cache = AnswerCache()
+    other = ("site-b", "v1", False, 5)
+    cache.put(NS, "q", vec(1), "old answer")
+    cache.put(other, "q", vec(1), "site b answer")
+    v2 = ("site-a", "v2", False, 5)
+    assert cache.exact(v2, "q") is None
+    assert cache.similar(v2, vec(1))[0] is None
+    # the old version's entries are gone, not just hidden
+    assert cache.exact(NS, "q") is None
+    assert cache.exact(other, "q") == "site b answer"
+    assert cache.stats()["entries"] == 1
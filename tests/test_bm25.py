@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+from backend.bm25 import BM25Index, tokenize  # noqa: E402
+
+WORDS = "film director actor scene camera story review rating list cinema drama comedy".split()
+VOCAB = WORDS + [f"term{i}" for i in range(200)]
+
+
+def corpus(n=60, seed=0):
+    rng = random.Random(seed)
+    docs = [rng.choices(VOCAB, weights=[20] * len(WORDS) + [1] * 200, k=rng.randint(3, 30)) for _ in range(n)]
+    docs.append(["film"] * 40)  # common terms have negative IDF, floored
+    return docs
+
+
+@pytest.mark.parametrize("query", [["film"], ["director", "drama"], ["camera", "camera", "review"], ["unknown"]])
+def test_scores_match_rank_bm25(query):
+    docs = corpus()
+    ours = BM25Index.build(tokenized=docs)
+    ref = rank_bm25.BM25Okapi(docs)
+    np.testing.assert_allclose(ours.get_scores(query), ref.get_scores(query), atol=1e-6)
+
+
+def test_top_k_ranks_like_rank_bm25():
+    texts = [" ".join(doc) for doc in corpus(seed=1)]
+    ours = BM25Index.build(texts)
+    scores = rank_bm25.BM25Okapi([tokenize(t) for t in texts]).get_scores(tokenize("story cinema"))
+    idxs, top = ours.top_k("story cinema", 5)
+    np.testing.assert_allclose(top, np.sort(scores)[::-1][:5], atol=1e-6)
+    np.testing.assert_allclose(scores[idxs], top, atol=1e-6)
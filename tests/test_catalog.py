@@ -0,0 +1,40 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from backend import retriever  # noqa: E402
+from backend.catalog import IndexCatalog, index_path_for  # noqa: E402
+from backend.vectordb import FaissStore  # noqa: E402
+
+ROOT = "http://site.test/docs"
+
+
+def build(path, n):
+    store = FaissStore(dim=16, index_path=path)
+    texts = [f"doc {i}" for i in range(n)]
+    store.add(
+        np.random.default_rng(n).random((n, 16), dtype="float32"),
+        [{"chunk_id": str(i), "url": f"{ROOT}/{i}", "text": t} for i, t in enumerate(texts)],
+    )
+    store.save()
+    return store
+
+
+def test_put_keeps_the_new_stores_retriever(tmp_path, monkeypatch):
+    monkeypatch.setattr(retriever, "_RETRIEVERS", {})
+    catalog = IndexCatalog(base_dir=str(tmp_path))
+    path = index_path_for(ROOT, str(tmp_path))
+    old = build(path, 20)
+    catalog.put(ROOT, old)
+    old_retriever = retriever.get_retriever(old)
+
+    # index_site builds the new version's retriever before registering it
+    new = build(path, 30)
+    new_retriever = retriever.get_retriever(new)
+    catalog.put(ROOT, new)
+    assert retriever.get_retriever(new) is new_retriever
+    assert old_retriever not in retriever._RETRIEVERS.values()
+
+    catalog.evict(ROOT)
+    assert not retriever._RETRIEVERS
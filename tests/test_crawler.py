@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from backend.crawler import _fetch
+
+KNOWN = {"etag": '"v1"', "last_modified": None, "links": []}
+
+
+class Session:
+    def __init__(self, status=200, exc=None):
+        self.status, self.exc = status, exc
+
+    def get(self, url, timeout=None, headers=None):
+        if self.exc is not None:
+            raise self.exc
+        return SimpleNamespace(status_code=self.status, headers={}, text="<html></html>")
+
+
+@pytest.mark.parametrize("session", [Session(503), Session(exc=requests.Timeout("slow"))])
+def test_known_page_that_fails_is_kept(session):
+    page = _fetch(session, "http://site.test/a", KNOWN)
+    assert page["error"] and not page["gone"]
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_known_page_that_is_gone(status):
+    page = _fetch(Session(status), "http://site.test/a", KNOWN)
+    assert page["gone"] and not page["error"]
+
+
+def test_unknown_page_that_fails_is_skipped():
+    assert _fetch(Session(503), "http://site.test/a") is None
+    with pytest.raises(requests.ConnectionError):
+        _fetch(Session(exc=requests.ConnectionError()), "http://site.test/a")
+
+
+@pytest.mark.parametrize("concurrency", [1, 8, 32])
+def test_crawl_stops_at_max_pages(concurrency):
+    from backend.crawler import crawl
+    from tests.fixtures.site_server import serve_site
+
+    with serve_site(num_pages=300, paragraphs=40) as base:
+        for max_pages in (25, 100):
+            pages = crawl(base + "/", max_pages=max_pages, delay=0, concurrency=concurrency, parse_workers=0)
+            assert len(pages) == max_pages
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from backend.dedup import Deduper, simhash  # noqa: E402
+
+
+def test_add_chunk_keeps_an_id_already_in_use():
+    d = Deduper()
+    h = simhash("the quick brown fox jumps over the lazy dog")
+    assert d.add_chunk("c1", h, "http://a")
+    assert not d.add_chunk("c1", h ^ 0xFF, "http://b")
+    assert d.sources("c1") == ["http://a", "http://b"]
+    assert d.release("http://a", ["c1"]) == []
+    assert d.release("http://b", ["c1"]) == ["c1"]
+
+
+def test_ref_to_unknown_chunk_is_refused():
+    d = Deduper()
+    assert not d.ref("missing", "http://a")
+    assert d.sources("missing") == []
@@ -0,0 +1,53 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.embed_cache import EmbeddingCache, text_key  # noqa: E402
+
+DIM = 4
+
+
+def vec(text: str) -> np.ndarray:
+    return np.frombuffer(text_key(text)[:DIM * 4], dtype=np.uint8)[:DIM].astype(np.float32)
+
+
+def put(cache, texts):
+    cache.put_many([text_key(t) for t in texts], np.stack([vec(t) for t in texts]))
+
+
+def check(cache, texts):
+    """Every cached text gets its own vector; returns how many were hits."""
+    out, missing = cache.get_many([text_key(t) for t in texts])
+    for t, v in zip(texts, out):
+        if v is not None:
+            np.testing.assert_array_equal(v, vec(t))
+    return len(texts) - len(missing)
+
+
+def test_roundtrip_and_lru_eviction(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_bytes=8 * DIM * 4)  # 8 rows
+    first = [f"a{i}" for i in range(8)]
+    put(cache, first)
+    assert check(cache, first[4:]) == 4  # a4..a7 now most recent
+    put(cache, [f"b{i}" for i in range(4)])
+    assert cache.evictions == 4
+    assert check(cache, first[:4]) == 0
+    assert check(cache, first[4:] + [f"b{i}" for i in range(4)]) == 8
+
+    cache.flush()
+    reopened = EmbeddingCache(str(tmp_path), max_bytes=8 * DIM * 4)
+    assert len(reopened) == 8
+    assert check(reopened, first[4:] + [f"b{i}" for i in range(4)]) == 8
+
+
+def test_eviction_without_flush_never_serves_another_texts_vector(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_bytes=8 * DIM * 4)
+    first = [f"a{i}" for i in range(8)]
+    put(cache, first)
+    cache.flush()
+    put(cache, [f"b{i}" for i in range(8)])  # evicts and rewrites every row
+
+    # "crash": reopen from disk without flushing
+    reopened = EmbeddingCache(str(tmp_path), max_bytes=8 * DIM * 4)
+    assert check(reopened, first) == 0
+    assert check(reopened, [f"b{i}" for i in range(8)]) == 8
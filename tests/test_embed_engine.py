@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend import embed_engine  # noqa: E402
+from backend.embed_engine import LocalEmbeddingEngine, plan_batches  # noqa: E402
+
+
+class FakeModel:
+    """One token per word (+2 special tokens); the vector of a text encodes its length and first word."""
+    max_seq_length = 64
+
+    def __init__(self):
+        self.batches = []
+        self.tokenizer = self._tokenize
+
+    def _tokenize(self, texts, add_special_tokens=True, truncation=True, max_length=None):
+        return {"input_ids": [[0] * min(len(t.split()) + 2, max_length) for t in texts]}
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, show_progress_bar=False):
+        self.batches.append(list(texts))
+        return np.array([[len(t.split()), int(t.split()[0][1:])] for t in texts], dtype="float32")
+
+
+def test_vectors_come_back_in_input_order_across_batches(monkeypatch):
+    monkeypatch.setattr(embed_engine, "load_model", lambda name, backend="torch": FakeModel())
+    engine = LocalEmbeddingEngine("fake", token_budget=64, max_batch=8)
+    rng = random.Random(0)
+    texts = [" ".join([f"w{i}"] + ["x"] * rng.randrange(40)) for i in range(100)]
+
+    out = engine.encode(texts)
+    expected = [[len(t.split()), i] for i, t in enumerate(texts)]
+    np.testing.assert_array_equal(out, np.array(expected, dtype="float32"))
+
+    batches = engine.model.batches
+    assert len(batches) > 1
+    assert sorted(t for b in batches for t in b) == sorted(texts)
+    for b in batches:
+        padded = len(b) * max(min(len(t.split()) + 2, FakeModel.max_seq_length) for t in b)
+        assert len(b) <= 8 and (padded <= 64 or len(b) == 1)
+
+
+def test_plan_batches_longest_first():
+    lengths = np.array([3, 50, 10, 50, 1])
+    batches = plan_batches(lengths, token_budget=100, max_batch=4)
+    assert [b.tolist() for b in batches] == [[1, 3], [2, 0, 4]]
+    assert plan_batches(np.array([500]), 100, 4)[0].tolist() == [0]  # over budget alone
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend import embedder  # noqa: E402
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    """Fake model: the vector of a text is [len(text), 1, 2, 3]; records every encode call."""
+    calls = []
+
+    def encode(texts, provider, model):
+        calls.append(list(texts))
+        return np.array([[len(t), 1, 2, 3] for t in texts], dtype="float32")
+
+    monkeypatch.setattr(embedder, "_resolve_provider", lambda provider: ("local", "fake-model"))
+    monkeypatch.setattr(embedder, "_encode", encode)
+    monkeypatch.setattr(embedder, "_QUERY_CACHE", embedder.QueryVectorCache(max_entries=8))
+    monkeypatch.setattr(embedder, "get_embedding_cache", lambda *a: pytest.fail("disk cache used"))
+    return calls
+
+
+def test_embed_queries_uses_the_query_cache_not_the_disk_cache(encoder):
+    vecs = embedder.embed_queries(["a", "bbb", "a"])
+    assert vecs[:, 0].tolist() == [1, 3, 1]
+    assert encoder == [["a", "bbb"]]  # one encode, each distinct query once
+
+    vecs = embedder.embed_queries(["cc", "bbb"])
+    assert vecs[:, 0].tolist() == [2, 3]
+    assert encoder[1:] == [["cc"]]
+    assert embedder.embed_query("a")[0, 0] == 1 and len(encoder) == 2
+
+
+def test_query_vector_cache_hits_and_evicts(encoder):
+    first = embedder.embed_query("reset password")
+    assert embedder.embed_query("reset password") is first
+    assert len(encoder) == 1
+    assert not first.flags.writeable  # shared between callers
+
+    for i in range(8):  # fills the 8-entry cache
+        embedder.embed_query(f"q{i}")
+    embedder.embed_query("reset password")
+    assert len(encoder) == 10  # evicted, encoded again
+    assert embedder.query_cache_stats() == {"hits": 1, "misses": 10, "hit_rate": 1 / 11, "entries": 8}
+
+
+def test_importing_the_service_does_not_import_torch():
+    pytest.importorskip("fastapi")
+    script = (
+        "import sys, backend.service; "
+        "print(sorted(m for m in ('torch', 'sentence_transformers', 'transformers') if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, "WARM_UP": "0"},
+    )
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("lxml")
+pytest.importorskip("bs4")
+
+from backend.extractor import extract_page  # noqa: E402
+from tests.fixtures.extract_corpus import BASE, FIXTURES, reference  # noqa: E402
+from tests.fixtures.site_server import make_page  # noqa: E402
+
+CORPUS = FIXTURES + [make_page(i, 50) for i in range(50)]
+
+
+@pytest.mark.parametrize("i", range(len(CORPUS)))
+def test_extract_page_matches_beautifulsoup(i):
+    url = f"{BASE}{i}"
+    assert extract_page(CORPUS[i], url) == reference(CORPUS[i], url)
+
+
+def test_text_around_comments_and_dropped_tags_is_kept():
+    assert extract_page("<p>a &amp; b <!-- hidden --> c</p>", BASE)["text"] == "a & b c"
+    assert extract_page("<p>x<script>var a = 1;</script>y</p>", BASE)["text"] == "x y"
@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.fusion import FUSION_METHODS, RRF_K, fuse  # noqa: E402
+
+BM25 = [("a", 12.0), ("b", 8.0), ("c", 4.0)]
+DENSE = [("b", 0.9), ("d", 0.7), ("a", 0.5)]
+
+
+def test_rrf_uses_ranks_only():
+    fused = fuse([BM25, DENSE], [0.5, 0.5], "rrf")
+    assert fused["a"] == pytest.approx(0.5 / (RRF_K + 1) + 0.5 / (RRF_K + 3))
+    assert fused["b"] == pytest.approx(0.5 / (RRF_K + 2) + 0.5 / (RRF_K + 1))
+    assert fused["d"] == pytest.approx(0.5 / (RRF_K + 2))
+    scaled = fuse([[(k, s * 100) for k, s in BM25], DENSE], [0.5, 0.5], "rrf")
+    assert scaled == pytest.approx(fused)
+
+
+@pytest.mark.parametrize("method", FUSION_METHODS)
+def test_tied_scores_fuse_equally(method):
+    branch = [("a", 3.0), ("b", 2.0), ("c", 2.0), ("d", 1.0)]
+    for ranked in (branch, [branch[0], branch[2], branch[1], branch[3]]):
+        fused = fuse([ranked], [1.0], method)
+        assert fused["b"] == pytest.approx(fused["c"])
+        assert fused["a"] > fused["b"] > fused["d"]
+
+
+def test_minmax_and_zscore_normalise_per_branch():
+    fused = fuse([BM25, []], [0.7, 0.3], "minmax")
+    assert fused == pytest.approx({"a": 0.7, "b": 0.35, "c": 0.0})
+    fused = fuse([BM25], [1.0], "zscore")
+    assert sum(fused.values()) == pytest.approx(0.0)
+    assert fused["a"] == pytest.approx(-fused["c"]) and fused["b"] == pytest.approx(0.0)
+
+
+def test_weighted_sums_raw_scores():
+    fused = fuse([BM25, DENSE], [0.25, 0.75], "weighted")
+    assert fused["a"] == pytest.approx(0.25 * 12.0 + 0.75 * 0.5)
+    assert fused["c"] == pytest.approx(0.25 * 4.0)
+    assert fused["d"] == pytest.approx(0.75 * 0.7)
+
+
+@pytest.mark.parametrize("method", FUSION_METHODS)
+def test_single_branch(method):
+    only_dense = fuse([[], DENSE], [0.5, 0.5], method)
+    assert set(only_dense) == {"b", "d", "a"}
+    assert sorted(only_dense, key=only_dense.get, reverse=True) == ["b", "d", "a"]
+    assert fuse([[], []], [0.5, 0.5], method) == {}
+
+
+def test_constant_scores():
+    flat = [("a", 0.4), ("b", 0.4), ("c", 0.4)]
+    assert fuse([flat], [1.0], "zscore") == {"a": 0.0, "b": 0.0, "c": 0.0}
+    assert fuse([flat], [0.5], "minmax") == {"a": 0.5, "b": 0.5, "c": 0.5}
+    assert fuse([[("a", 5.0)]], [1.0], "zscore") == {"a": 0.0}
+    assert fuse([[("a", 5.0)]], [1.0], "minmax") == {"a": 1.0}
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        fuse([BM25], [1.0], "borda")
@@ -0,0 +1,87 @@
+import random
+import re
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from backend import indexer  # noqa: E402
+
+ROOT = "http://site.test/"
+
+
+def paragraph(seed: int, words: int = 40) -> str:
+    rng = random.Random(seed)
+    return " ".join(f"w{rng.randrange(10**6)}" for _ in range(words))
+
+
+def page(url: str, text: str | None) -> dict:
+    """Crawled page; text=None is a failed fetch of a known URL."""
+    return {
+        "url": url, "html": "", "etag": None, "last_modified": None,
+        "not_modified": False, "gone": False, "error": text is None, "links": [],
+        "content": {"url": url, "title": "", "description": "", "text": text},
+    }
+
+
+@pytest.fixture
+def run_index(tmp_path, monkeypatch):
+    """index_site over {url: text} with the crawler and embedder stubbed out."""
+    monkeypatch.setattr(indexer, "chunk_spans", lambda text: [m.span() for m in re.finditer(r"[^\n]+", text)])
+    monkeypatch.setattr(
+        indexer, "embed_texts",
+        lambda texts, provider=None: np.random.default_rng(len(texts)).random((len(texts), 384), dtype="float32"),
+    )
+    monkeypatch.setattr(indexer, "flush_embed_caches", lambda: None)
+    monkeypatch.setattr(indexer, "get_retriever", lambda store: None)
+    monkeypatch.setattr(indexer, "get_catalog", lambda: SimpleNamespace(put=lambda *a: None))
+    path = str(tmp_path / "site")
+
+    def run(pages: dict):
+        monkeypatch.setattr(
+            indexer, "iter_crawl", lambda *a, **kw: iter([page(u, t) for u, t in pages.items()])
+        )
+        store, _, _ = indexer.index_site(ROOT, max_pages=100, index_path=path, render=False, delay=0)
+        return store
+
+    return run
+
+
+def test_changing_a_page_keeps_chunks_other_pages_share(run_index):
+    a, r = ROOT + "a", ROOT + "r"
+    shared = paragraph(1)
+    run_index({a: shared + "\n" + paragraph(2), r: shared + "\n" + paragraph(3)})
+
+    # A changes twice while R still references the chunk it shared
+    run_index({a: paragraph(4) + "\n" + paragraph(5), r: shared + "\n" + paragraph(3)})
+    store = run_index({a: paragraph(6) + "\n" + paragraph(5), r: shared + "\n" + paragraph(3)})
+
+    metas = store.metas()
+    ids = [m["chunk_id"] for m in metas]
+    assert len(ids) == len(set(ids))
+    texts = {m["text"] for m in metas}
+    assert shared in texts
+    assert paragraph(2) not in texts and paragraph(4) not in texts
+
+    # a new page repeating A's old text is indexed, not a stale reference
+    store = run_index({
+        a: paragraph(6) + "\n" + paragraph(5),
+        r: shared + "\n" + paragraph(3),
+        ROOT + "s": paragraph(2) + "\n" + paragraph(7),
+    })
+    texts = {m["text"] for m in store.metas()}
+    assert {shared, paragraph(2), paragraph(7)} <= texts
+
+
+def test_failed_fetch_keeps_the_page(run_index):
+    pages = {ROOT + f"p{i}": paragraph(10 + i) for i in range(3)}
+    run_index(pages)
+    store = run_index({**pages, ROOT + "p1": None})
+    assert paragraph(11) in {m["text"] for m in store.metas()}
+
+    # no longer linked at all: removed
+    del pages[ROOT + "p1"]
+    store = run_index(pages)
+    assert paragraph(11) not in {m["text"] for m in store.metas()}
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from backend.metastore import MetaStore  # noqa: E402
+
+METAS = [
+    {"chunk_id": "a", "text": "alpha", "url": "http://p/1", "title": "T", "description": "", "start": 0, "end": 5},
+    {"chunk_id": "b", "text": "beta", "url": "http://p/1", "title": "T", "description": "", "start": 7, "end": 11},
+    {"chunk_id": "c", "text": "gamma", "url": "http://p/2", "title": "", "description": ""},
+]
+
+
+def test_offsets_survive_save_and_load(tmp_path):
+    store = MetaStore()
+    store.append(METAS)
+    store.save(str(tmp_path / "meta"))
+    loaded = MetaStore.load(str(tmp_path / "meta"))
+    assert loaded.metas() == METAS
+
+    loaded.append([{**METAS[0], "chunk_id": "d", "start": 20, "end": 25}])
+    loaded.remove(["b"])
+    assert [(m["chunk_id"], m.get("start")) for m in loaded.compacted().metas()] == [
+        ("a", 0), ("c", None), ("d", 20),
+    ]
+
+
+def test_store_saved_without_offsets_loads(tmp_path):
+    store = MetaStore()
+    store.append(METAS)
+    path = str(tmp_path / "meta")
+    store.save(path)
+    for f in ("start", "end"):
+        os.remove(os.path.join(path, f + ".npy"))
+    assert [set(m) for m in MetaStore.load(path).metas()] == [set(METAS[2])] * 3
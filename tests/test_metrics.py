@@ -0,0 +1,80 @@
+import re
+
+import pytest
+
+from backend.metrics import BUCKETS, Metrics
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+
+def parse(text):
+    """{(metric name, frozenset of labels): value}, checking every line is valid exposition format."""
+    assert text.endswith("\n")
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            assert line.split()[3] in ("counter", "gauge", "histogram")
+            continue
+        m = SAMPLE.match(line)
+        assert m, line
+        labels = frozenset(re.findall(r'(\w+)="([^"]*)"', m.group(2) or ""))
+        samples[(m.group(1), labels)] = float(m.group(3))
+    return samples
+
+
+def histogram(samples, stage):
+    buckets = {
+        dict(labels)["le"]: v for (name, labels), v in samples.items()
+        if name == "rag_stage_seconds_bucket" and ("stage", stage) in labels
+    }
+    count = samples[("rag_stage_seconds_count", frozenset({("stage", stage)}))]
+    return buckets, count
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    for seconds in (0.0005, 0.003, 0.003, 0.2, 1000.0):
+        metrics.observe("embed", seconds)
+    metrics.count("pages", 3)
+    samples = parse(metrics.prometheus())
+
+    buckets, count = histogram(samples, "embed")
+    assert list(buckets) == [str(b) for b in BUCKETS] + ["+Inf"]
+    assert buckets["0.001"] == 1 and buckets["0.005"] == 3 and buckets["0.25"] == 4
+    assert buckets["300.0"] == 4 and buckets["+Inf"] == count == 5  # 1000 s is past the last bound
+    assert samples[("rag_stage_seconds_sum", frozenset({("stage", "embed")}))] == pytest.approx(1000.2065)
+    assert samples[("rag_pages_total", frozenset())] == 3
+
+
+def test_metrics_endpoint_serves_the_timed_stages():
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from backend.metrics import METRICS
+    from backend.retriever import HybridRetriever
+    from backend.service import app
+    from backend.vectordb import FaissStore
+
+    METRICS.reset()
+    texts = [f"doc {i} about topic{i % 5}" for i in range(50)]
+    store = FaissStore(dim=8)
+    store.add(
+        np.random.default_rng(0).random((50, 8), dtype="float32"),
+        [{"chunk_id": str(i), "url": f"http://site.test/{i}", "text": t} for i, t in enumerate(texts)],
+    )
+    HybridRetriever(store, texts, store.metas()).retrieve("topic1", np.ones((1, 8), dtype="float32"))
+
+    client = TestClient(app)
+    client.get("/metrics")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = parse(resp.text)
+    for stage in ("faiss_add", "faiss_search", "retrieve", "http GET /metrics"):
+        buckets, count = histogram(samples, stage)
+        assert count >= 1 and buckets["+Inf"] == count
+        assert list(buckets.values()) == sorted(buckets.values())
+    assert samples[("rag_queries_total", frozenset())] == 1
@@ -0,0 +1,63 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+openai = pytest.importorskip("openai")
+
+from backend import openai_embed  # noqa: E402
+from backend.openai_embed import OpenAIEmbedder  # noqa: E402
+from tests.fixtures.mock_openai import fake_embedding, serve_openai  # noqa: E402
+
+DIM = 32
+RETRY_AFTER = 0.05  # what the mock sends with every 429
+
+
+def texts(n):
+    return [f"chunk {i} " + "word " * (i % 13) for i in range(n)]
+
+
+def embedder(base_url, **kw):
+    client = openai.OpenAI(api_key="test", base_url=base_url)
+    return OpenAIEmbedder(client, "text-embedding-3-small", backoff=0.001, **kw)
+
+
+def test_order_is_preserved_across_concurrent_requests():
+    inputs = texts(250)
+    with serve_openai(dim=DIM, latency=0.01) as (base_url, state):
+        vecs = embedder(base_url, concurrency=8, max_items=16).embed(inputs)
+    assert state["requests"] == 16 and state["inputs"] == 250
+    np.testing.assert_allclose(vecs, np.stack([fake_embedding(t, DIM) for t in inputs]), atol=1e-6)
+
+
+def test_dimensions_are_requested():
+    with serve_openai(dim=DIM) as (base_url, _):
+        vecs = embedder(base_url, dimensions=8).embed(["a", "b"])
+    assert vecs.shape == (2, 8)
+    np.testing.assert_allclose(np.linalg.norm(vecs, axis=1), 1.0, atol=1e-6)
+
+
+def test_rate_limits_are_retried_after_retry_after(monkeypatch):
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        time.sleep(seconds)
+
+    monkeypatch.setattr(openai_embed, "time", SimpleNamespace(sleep=sleep, monotonic=time.monotonic))
+    inputs = texts(120)
+    with serve_openai(dim=DIM, error_rate=0.3, seed=1) as (base_url, state):
+        vecs = embedder(base_url, concurrency=4, max_items=10, max_retries=20).embed(inputs)
+    assert state["rate_limited"] > 0
+    assert state["requests"] == 12 + state["rate_limited"]
+    # one back-off per 429, never shorter than Retry-After (backoff alone is ~1ms)
+    assert sum(s >= RETRY_AFTER for s in sleeps) == state["rate_limited"]
+    np.testing.assert_allclose(vecs, np.stack([fake_embedding(t, DIM) for t in inputs]), atol=1e-6)
+
+
+def test_gives_up_after_max_retries():
+    with serve_openai(dim=DIM, error_rate=1.0) as (base_url, state):
+        with pytest.raises(openai.RateLimitError):
+            embedder(base_url, max_retries=2).embed(["a"])
+    assert state["requests"] == 3
@@ -0,0 +1,98 @@
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from backend import renderer  # noqa: E402
+from backend.crawler import crawl  # noqa: E402
+from backend.extractor import extract_page  # noqa: E402
+from backend.renderer import MIN_TEXT_LEN, RenderPool, needs_render  # noqa: E402
+from tests.fixtures.site_server import make_page, serve_site  # noqa: E402
+
+NUM_PAGES = 6
+
+
+class Driver:
+    page_source = "<html><body>rendered</body></html>"
+
+    def __init__(self):
+        self.quit_called = False
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script):
+        return ["complete", 0, 10_000, 100]
+
+    def quit(self):
+        self.quit_called = True
+
+
+class StubPool:
+    """RenderPool stand-in serving the non-JS version of serve_site's pages."""
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.urls = []
+
+    def render(self, url):
+        self.urls.append(url)
+        if self.fail:
+            raise RuntimeError("headless browser unavailable")
+        i = int(url.rstrip("/").rsplit("/", 1)[-1]) if "/page/" in url else 0
+        return make_page(i, NUM_PAGES)
+
+
+def test_pool_retries_chrome_after_a_failed_start(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(renderer.time, "monotonic", lambda: clock[0])
+    pool = RenderPool(size=1, retry_after=30)
+    starts = []
+
+    def make_driver():
+        starts.append(clock[0])
+        if len(starts) == 1:
+            raise OSError("chromedriver not found")
+        return Driver()
+
+    monkeypatch.setattr(pool, "_make_driver", make_driver)
+    with pytest.raises(RuntimeError):
+        pool.render("http://site.test/")
+    clock[0] = 10.0
+    with pytest.raises(RuntimeError):  # still cooling down: no new attempt
+        pool.render("http://site.test/")
+    assert len(starts) == 1
+
+    clock[0] = 31.0
+    assert pool.render("http://site.test/") == Driver.page_source
+    assert pool.unavailable is None and len(starts) == 2
+
+
+def test_crawl_renders_pages_with_little_static_text():
+    with serve_site(num_pages=NUM_PAGES, js=True) as base:
+        pool = StubPool()
+        pages = crawl(base + "/", max_pages=NUM_PAGES, delay=0, parse_workers=0, render=pool)
+        assert len(pages) == NUM_PAGES  # links only exist in the rendered pages
+        assert sorted(pool.urls) == sorted(pages)
+        assert not any(needs_render(html) for html in pages.values())
+
+        # rendering fails: the static shell is kept
+        pool = StubPool(fail=True)
+        pages = crawl(base + "/", max_pages=NUM_PAGES, delay=0, parse_workers=0, render=pool)
+        assert len(pages) == 1 and list(pages) == pool.urls
+        assert needs_render(pages[pool.urls[0]])
+
+
+@pytest.mark.skipif(
+    not (os.getenv("CHROMEDRIVER") or shutil.which("chromedriver")),
+    reason="needs Chrome and chromedriver",
+)
+def test_pool_renders_a_js_page():
+    with serve_site(num_pages=2, js=True) as base:
+        pool = RenderPool(size=1)
+        try:
+            html = pool.render(f"{base}/page/1")
+        finally:
+            pool.close()
+    assert len(extract_page(html, base)["text"]) >= MIN_TEXT_LEN
@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.reranker import CrossEncoderReranker  # noqa: E402
+
+
+class SlowReranker(CrossEncoderReranker):
+    """No model: scores by text length, 20 ms per batch."""
+    def __init__(self):
+        self.batch_size = 2
+        self.budget_ms = 30
+
+    def score(self, query, texts):
+        time.sleep(0.02)
+        return np.array([-len(t) for t in texts], dtype="float32")
+
+
+def test_unscored_tail_ranks_below_scored_head():
+    # first-stage scores are far above the cross-encoder's
+    candidates = [{"meta": {"text": "x" * (i + 1)}, "score": 100.0 - i} for i in range(10)]
+    timings = {}
+    out = SlowReranker().rerank("q", candidates, top_k=10, timings=timings)
+
+    n = timings["reranked"]
+    assert 0 < n < 10
+    assert [c["reranked"] for c in out] == [True] * n + [False] * (10 - n)
+    scores = [c["score"] for c in out]
+    assert scores == sorted(scores, reverse=True)
+    assert [c["first_score"] for c in out[n:]] == [100.0 - i for i in range(n, 10)]
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from backend.retriever import HybridRetriever  # noqa: E402
+from backend.vectordb import FaissStore  # noqa: E402
+
+
+@pytest.fixture
+def retriever():
+    rng = np.random.default_rng(0)
+    texts = [f"doc {i} about topic{i % 7}" for i in range(200)]
+    metas = [{"chunk_id": str(i), "url": f"http://site.test/{i}", "text": t} for i, t in enumerate(texts)]
+    store = FaissStore(dim=16)
+    store.add(rng.random((len(texts), 16), dtype="float32"), metas)
+    return HybridRetriever(store, texts, store.metas())
+
+
+def test_timings_are_per_call(retriever):
+    qvecs = np.random.default_rng(1).random((32, 16), dtype="float32")
+
+    def one(i):
+        timings = {}
+        retriever.retrieve(f"topic{i % 7}", qvecs[i:i + 1], top_k=3, timings=timings)
+        return timings
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(one, range(32)))
+    assert all(set(t) == {"bm25_ms", "dense_ms", "fuse_ms"} for t in results)
+    assert not hasattr(retriever, "last_timings")
+
+    timings = {}
+    batch = retriever.retrieve_batch(["topic1", "topic2"], qvecs[:2], top_k=3, timings=timings)
+    assert len(batch) == 2 and set(timings) == {"embed_ms", "bm25_ms", "dense_ms", "fuse_ms"}
+
+
+def test_results_carry_every_source_url(tmp_path):
+    from backend.dedup import Deduper, dedup_path
+
+    path = str(tmp_path / "site")
+    store = FaissStore(dim=16, index_path=path)
+    metas = [{"chunk_id": c, "url": f"http://site.test/{c}", "text": f"text about {c}"} for c in ("x", "y")]
+    store.add(np.random.default_rng(0).random((2, 16), dtype="float32"), metas)
+    store.save()
+    deduper = Deduper(dedup_path(path))
+    deduper.add_chunk("x", 1, "http://site.test/x")
+    deduper.add_chunk("x", 1, "http://site.test/mirror")
+    deduper.save()
+
+    retriever = HybridRetriever.from_store(store)
+    qvec = np.ones((1, 16), dtype="float32")
+    results = {r["meta"]["chunk_id"]: r["meta"] for r in retriever.retrieve("text", qvec, top_k=2)}
+    assert results["x"]["sources"] == ["http://site.test/x", "http://site.test/mirror"]
+    assert results["y"]["sources"] == ["http://site.test/y"]  # not in the deduper: its own url
+    assert "sources" not in store.metadata.get(0)
@@ -0,0 +1,51 @@
+import json
+from typing import get_args
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("faiss")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.fusion import FUSION_METHODS  # noqa: E402
+from backend.service import Fusion, app  # noqa: E402
+
+
+def test_fusion_values_match_backend():
+    assert set(get_args(Fusion)) == set(FUSION_METHODS)
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/query", {"site": "http://site.test/", "query": "q", "fusion": "bogus"}),
+    ("/query/batch", {"site": "http://site.test/", "queries": ["q"], "fusion": "bogus"}),
+    ("/answer", {"site": "http://site.test/", "query": "q", "fusion": "bogus"}),
+])
+def test_unknown_fusion_is_rejected(path, body):
+    assert TestClient(app).post(path, json=body).status_code == 422
+
+
+def test_answer_falls_back_to_excerpts_when_the_llm_fails(monkeypatch):
+    from backend import service
+
+    results = [{"meta": {"text": "Excerpt one."}, "score": 1.0}]
+
+    def failing_stream(prompt):
+        yield "partial"
+        raise RuntimeError("rate limited")
+
+    cached = []
+    monkeypatch.setattr(service, "get_openai_client", lambda: object())
+    monkeypatch.setattr(service, "_cache_lookup", lambda req, use_llm: ("ns", None, None))
+    monkeypatch.setattr(service, "_query", lambda req, qvec=None: (results, {}))
+    monkeypatch.setattr(service, "pack_prompt", lambda *a, **kw: ("prompt", results, {"prompt_tokens": 3}))
+    monkeypatch.setattr(service, "stream_answer_with_openai", failing_stream)
+    monkeypatch.setattr(service.get_answer_cache(), "put", lambda *a: cached.append(a))
+
+    resp = TestClient(app).post("/answer", json={"site": "http://site.test/", "query": "q", "use_llm": True})
+    events = [json.loads(line) for line in resp.text.splitlines()]
+    assert [e["type"] for e in events] == ["sources", "token", "error", "token", "done"]
+    assert events[2]["message"] == "rate limited"
+    assert events[3] == {"type": "token", "text": service.excerpt_answer(results), "replace": True}
+    assert not cached
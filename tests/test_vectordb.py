@@ -0,0 +1,100 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+faiss = pytest.importorskip("faiss")
+
+from backend.vectordb import FaissStore  # noqa: E402
+
+DIM = 16
+
+
+def vectors(n, seed):
+    v = np.random.default_rng(seed).standard_normal((n, DIM)).astype("float32")
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def metas(prefix, n):
+    return [{"chunk_id": f"{prefix}{i}", "url": f"http://site.test/{prefix}", "text": ""} for i in range(n)]
+
+
+def check_exact(store, live):
+    """Top-5 of every live vector is itself, with the right metadata."""
+    ids = list(live)
+    res = store.search_batch(np.stack([live[c] for c in ids]), k=5)
+    assert [r[0]["meta"]["chunk_id"] for r in res] == ids
+    assert len(store.metadata) == store.index.ntotal == len(ids)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_writes_during_compaction_are_replayed(index_type, monkeypatch):
+    store = FaissStore(dim=DIM, index_type=index_type)
+    xa, xb = vectors(300, 0), vectors(50, 1)
+    store.add(xa, metas("a", 300))
+    store.build()
+    store.metadata.remove([f"a{i}" for i in range(0, 300, 4)])  # 25% dead, no auto-compaction
+
+    build = store._compacted_index
+
+    def concurrent_writes(*args):
+        monkeypatch.setattr(store, "_compacted_index", build)
+        store.add(xb, metas("b", 50))
+        store.metadata.remove(["a1", "b0"])
+        return build(*args)
+
+    monkeypatch.setattr(store, "_compacted_index", concurrent_writes)
+    assert store.compact() == 75
+    assert store._compactor is None
+
+    live = {f"a{i}": xa[i] for i in range(300) if i % 4 and i != 1}
+    live.update({f"b{i}": xb[i] for i in range(1, 50)})
+    assert store.compact() == 2
+    check_exact(store, live)
+
+
+def test_remove_compacts_in_the_background(tmp_path):
+    store = FaissStore(dim=DIM, index_path=str(tmp_path / "site"))
+    x = vectors(100, 0)
+    store.add(x, metas("a", 100))
+    store.remove([f"a{i}" for i in range(50)])
+    thread = store._compactor
+    assert thread is not None
+    store.save()
+    assert not thread.is_alive()
+    check_exact(store, {f"a{i}": x[i] for i in range(50, 100)})
+
+
+@pytest.mark.parametrize("index_type,storage", [("flat", "float32"), ("hnsw", "int8"), ("flat", "binary")])
+def test_search_skips_removed_rows_without_over_fetching(index_type, storage):
+    store = FaissStore(dim=DIM, index_type=index_type, storage=storage)
+    x = vectors(400, 0)
+    store.add(x, metas("a", 400))
+    store.build()
+    store.metadata.remove([f"a{i}" for i in range(0, 400, 2)])  # 50% dead, no auto-compaction
+    assert store.index.ntotal == 400
+    ef = faiss.downcast_index(store.index).hnsw.efSearch if index_type == "hnsw" else None
+
+    res = store.search_batch(x[:20], k=5)
+    assert all(len(r) == 5 for r in res)
+    assert all(int(r["meta"]["chunk_id"][1:]) % 2 for row in res for r in row)
+    if index_type == "hnsw":
+        assert faiss.downcast_index(store.index).hnsw.efSearch == ef  # per-call params, not inflated
+        return
+
+    # fewer live rows than k
+    store.metadata.remove([f"a{i}" for i in range(1, 397, 2)])
+    assert [len(r) for r in store.search_batch(x[:3], k=5)] == [2, 2, 2]
+
+
+def test_load_keeps_the_saved_index_type(tmp_path):
+    path = str(tmp_path / "site")
+    store = FaissStore(dim=DIM, index_path=path, index_type="hnsw")
+    store.add(vectors(100, 0), metas("a", 100))
+    store.save()
+    assert store.kind == "hnsw"
+
+    loaded = FaissStore(dim=DIM, index_path=path)
+    assert loaded.load()
+    assert loaded.index_type == "hnsw"
+    loaded.add(vectors(10, 1), metas("b", 10))
+    loaded.save()  # "auto" would rebuild 110 vectors as flat
+    assert loaded.kind == "hnsw"